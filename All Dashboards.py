@@ -1,3 +1,5 @@
+import multiprocessing
+# Every stage is imported here so a bundled executable includes them, Pipeline.py runs them by name
 import Consignment
 import Quotation
 import ScrapExport
@@ -9,19 +11,18 @@ import Consolidate_Format_Data
 import Combine_Data
 import Delete_Excel
 import Marketshare
+import Session_Manager
+import Data_Store
+import salescalculation
+import Pipeline
 
 def main():
-    New.main_new()
-    ScrapExport.main_scrapexport()
-    Quotation.main_quotation()
-    Consignment.main_consignment()
-    Sold.main_sold()
-    Void.main_void()
-    SalesDashboard.main_salesdashboard()
-    Consolidate_Format_Data.main_consolidate_format_data()
-    Combine_Data.main_combine_data()
-    Delete_Excel.main_delete()
-    Marketshare.main_marketshare()
-    
+    # Scrapers and the sales dashboard run at the same time, see Pipeline.STAGES for what waits for what
+    results = Pipeline.run(Pipeline.STAGES)
+    salescalculation.invalidate_cache()  # New filtered data has landed
+    Session_Manager.close_session()
+    Pipeline.serve(Pipeline.STAGES, results)
+
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
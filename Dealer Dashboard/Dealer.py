@@ -2,16 +2,20 @@ import dash
 from dash import dcc, html, dash_table
 from dash.dependencies import Input, Output, State
 import pandas as pd
-import base64
-from io import BytesIO, StringIO
+from io import StringIO
 import webview
 import threading
 from datetime import datetime, timedelta, date
-import calendar
 import plotly.express as px
 import time
 import io
 from screeninfo import get_monitors
+import os
+import sys
+
+# The dealer analysis and its upload cache are shared with the Motorist Sales Dashboard
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Motorist Sales Dashboard'))
+import Dealer_Analytics
 
 external_stylesheets = ['https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap']
 
@@ -97,25 +101,8 @@ def dealer_dashboard():
         [State('upload-data', 'filename')]
     )
     def update_upload_output(contents, filename):
-        if contents is None:
-            return 'No file uploaded yet. Please upload a file.', '', [], None
-    
-        content_string = contents.split(',')[1]  # Assuming content_string is the second part after splitting by ','
-        
-        decoded = base64.b64decode(content_string)
-        
-        # Determine file type and read data accordingly
-        if 'xls' in filename:
-            xls = pd.ExcelFile(BytesIO(decoded))
-            sheet_names = xls.sheet_names
-            options = [{'label': sheet, 'value': sheet} for sheet in sheet_names]
-            return f'File "{filename}" loaded successfully with {len(sheet_names)} sheets.', '', options, contents
-    
-        elif 'csv' in filename:
-            df = pd.read_csv(BytesIO(decoded))
-            return f'File "{filename}" loaded successfully with {len(df)} rows.', '', [], contents
-        
-        return 'Unsupported file format.', '', [], None
+        message, options, key = Dealer_Analytics.load_upload(contents, filename)
+        return message, '', options, key
     
     # Callback to update data based on selected sheet
     """    [
@@ -140,119 +127,28 @@ def dealer_dashboard():
     def update_main_content(sheet_name, start_date, end_date, stored_data, filename):
         if stored_data is None or sheet_name is None:
             return dash.no_update, ''
-    
-        content_type, content_string = stored_data.split(',')
-        decoded = base64.b64decode(content_string)
-        
-        if 'xls' in filename:
-            xls = pd.ExcelFile(BytesIO(decoded))
-            df = pd.read_excel(xls, sheet_name=sheet_name)
-        elif 'csv' in filename:
-            df = pd.read_csv(BytesIO(decoded))
-        else:
-            return 'Unsupported file format.', ''
-        
-        # Ensure 'Date' column is in datetime format if needed
-        if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce', format='%d/%m/%y')
-        
-        # Filter DataFrame based on date range
-        if start_date and end_date:
-            # Parse start_date and end_date without time
-            start_date = datetime.strptime(start_date.split('T')[0], '%Y-%m-%d').strftime('%d/%m/%y')
-            end_date = datetime.strptime(end_date.split('T')[0], '%Y-%m-%d').strftime('%d/%m/%y')
-        
-            start_date = datetime.strptime(start_date, '%d/%m/%y')
-            end_date = datetime.strptime(end_date, '%d/%m/%y')
-            # Filter for the current year and previous year's same date range
-            current_year_data = df[(df['Date'].dt.year == start_date.year) & 
-                                   (df['Date'] >= start_date) & (df['Date'] <= end_date)]
-            
-            prev_year_data = df[(df['Date'].dt.year == (start_date.year - 1)) & 
-                                (df['Date'] >= start_date.replace(year=start_date.year - 1)) & 
-                                (df['Date'] <= end_date.replace(year=start_date.year - 1))]
-            
-            return show_main_content(df, current_year_data, prev_year_data, start_date, end_date), ''
-        
-        # If no date range is selected, use entire dataset
-        return show_main_content(df, None, None, start_date, end_date), ''
-    
-    
+
+        cube, message = Dealer_Analytics.upload_cube(stored_data, filename, sheet_name)
+        if cube is None:
+            return message, ''
+
+        # Without a date range the current and the previous year are shown
+        analysis = Dealer_Analytics.analyse(cube, Dealer_Analytics.parse_date(start_date), Dealer_Analytics.parse_date(end_date))
+        return show_main_content(analysis), ''
+
+
     # Function to display main content
-    def show_main_content(df, current_year_data, prev_year_data, start_date, end_date):
-        current_year = datetime.now().year
-    
-        if current_year_data is None and prev_year_data is None:
-            current_year_data = df[df['Date'].dt.year == current_year]
-            prev_year_data = df[df['Date'].dt.year == (current_year - 1)]
-    
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_full = today.strftime("%d %B %Y")
-        
-        if start_date and end_date:
-            # Filter for the current year and previous year's same date range
-            current_year_data = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
-            
-            prev_year_data = df[(df['Date'] >= start_date.replace(year=start_date.year - 1)) & 
-                                (df['Date'] <= end_date.replace(year=start_date.year - 1))]
-        
-        if start_date:
-            start_of_the_week = start_date - timedelta(days=start_date.weekday())
-            end_of_the_week = start_of_the_week + timedelta(days=6)
-            
-            prev_year_start_of_week = start_of_the_week - timedelta(days=365)
-            prev_year_end_of_the_week = end_of_the_week - timedelta(days=365)
-        else:
-            start_of_the_week = today - timedelta(days=today.weekday())
-            end_of_the_week = start_of_the_week + timedelta(days=6)
-            
-            prev_year_start_of_week = start_of_the_week - timedelta(days=365)
-            prev_year_end_of_the_week = end_of_the_week - timedelta(days=365)
-    
-        current_week_data = current_year_data[(current_year_data['Date'] >= start_of_the_week) & 
-                                              (current_year_data['Date'] <= end_of_the_week)]
-        
-        prev_year_week_data = prev_year_data[(prev_year_data['Date'] >= prev_year_start_of_week) & 
-                                             (prev_year_data['Date'] <= prev_year_end_of_the_week)]
-    
-        # Aggregated and formatted data
-        def aggregate_data(data):
-            agg_data = data.groupby('Date').agg({'Bids': 'sum', 'Dealer Name': 'nunique'}).reset_index()
-            agg_data.rename(columns={'Dealer Name': 'Dealer Count'}, inplace=True)
-            agg_data['Date'] = agg_data['Date'].dt.strftime('%d/%m/%Y')
-            agg_data['Day'] = agg_data['Date'].apply(lambda x: calendar.day_name[datetime.strptime(x, '%d/%m/%Y').weekday()])
-            agg_data['Average Bids per Dealer'] = (agg_data['Bids'] / agg_data['Dealer Count']).round(2)
-            return agg_data
-    
-        current_week_bids = aggregate_data(current_week_data)
-        prev_year_week_bids = aggregate_data(prev_year_week_data)
-    
+    def show_main_content(analysis):
+        today_full = analysis['today'].strftime("%d %B %Y")
+        current_week_bids = analysis['current_week']
+        prev_year_week_bids = analysis['previous_week']
+        result_df = analysis['yearly_averages']
+        week_avg_bids_per_day_df = analysis['weekly_averages']
+
         # Create time series plots
-        fig_current_year = px.line(current_year_data.groupby('Date').agg({'Bids': 'sum'}).reset_index(), x='Date', y='Bids', color_discrete_sequence=['#1f77b4'])
-        fig_previous_year = px.line(prev_year_data.groupby('Date').agg({'Bids': 'sum'}).reset_index(), x='Date', y='Bids', color_discrete_sequence=['#ff7f0e'])
-            
-        df['Year'] = df['Date'].dt.year
-        total_bids_per_year = df.groupby('Year')['Bids'].sum()
-        
-        # Calculate average number of bids per day for each year
-        avg_bids_per_day = total_bids_per_year.copy()  # Make a copy to avoid modifying original
-        
-        # Calculate the number of days in each year
-        for year in avg_bids_per_day.index:
-            if year == today.year:
-                days_in_year = (today - pd.to_datetime(f'{year}-01-01')).days + 1
-            else:
-                days_in_year = 365 if pd.Timestamp(f'{year}-12-31').dayofyear == 365 else 366
-            
-            avg_bids_per_day.loc[year] /= days_in_year
-        
-        avg_bids_per_day = avg_bids_per_day.astype(int)
-        # Create a DataFrame to display the results
-        result_df = pd.DataFrame({
-            'Year': avg_bids_per_day.index,
-            'Average Bids per Day': avg_bids_per_day.values
-        })
-        
+        fig_current_year = px.line(analysis['current_daily'], x='Date', y='Bids', color_discrete_sequence=['#1f77b4'])
+        fig_previous_year = px.line(analysis['previous_daily'], x='Date', y='Bids', color_discrete_sequence=['#ff7f0e'])
+
         avg_bids_table = dash_table.DataTable(
             id='average-bids-table',
             columns=[{"name": i, "id": i} for i in result_df.columns],
@@ -261,37 +157,7 @@ def dealer_dashboard():
             style_header={'backgroundColor': 'white', 'color': 'black', 'fontFamily': 'Roboto'},
             style_cell={'backgroundColor': 'white', 'color': 'black', 'fontFamily': 'Roboto', 'textAlign': 'center'}
         )
-        
-        current_year_data = df[df['Date'].dt.year == current_year]
-        current_year_data['Week'] = current_year_data['Date'].dt.strftime('%W')  # Assign week number
-        current_year_data['Day'] = current_year_data['Date'].dt.strftime('%A')  # Assign day name
-        
-        # Calculate total bids per day for each week
-        bids_per_day_per_week = current_year_data.groupby(['Week', 'Day'])['Bids'].sum().reset_index()
-        
-        # Calculate average bids per day for each week
-        avg_bids_per_day_per_week = bids_per_day_per_week.groupby('Week')['Bids'].mean().reset_index()
-        
-        # Create a DataFrame to display the results
-        week_avg_bids_per_day_df = pd.DataFrame({
-            'Week': avg_bids_per_day_per_week['Week'],
-            'Average Bids per Day': avg_bids_per_day_per_week['Bids'].round(0)  # Round to 0 decimal places
-        })
-        
-        # Function to get start and end date of each week
-        def get_week_dates(week_number, year):
-            from datetime import datetime, timedelta
-            
-            # Adjust the week number to 1-indexed for datetime calculation
-            start = datetime.strptime(f'{year}-W{int(week_number):02d}-1', "%Y-W%W-%w")
-            end = start + timedelta(days=6)
-            
-            return start.strftime("%d/%m/%Y"), end.strftime("%d/%m/%Y")
-        
-        # Add start and end dates to the DataFrame
-        week_avg_bids_per_day_df['Start Date'], week_avg_bids_per_day_df['End Date'] = zip(*week_avg_bids_per_day_df.apply(
-            lambda row: get_week_dates(row['Week'], current_year), axis=1))
-        
+
         # Create a DataTable for Week-On-Week Average Bids per Day Table
         week_avg_bids_per_day_table = dash_table.DataTable(
             id='week-average-bids-per-day-table',
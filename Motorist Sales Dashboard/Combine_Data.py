@@ -1,68 +1,95 @@
 import pandas as pd
-from openpyxl import load_workbook
+import argparse
+import tempfile
+import time
 import os
 import sys
-
-def combine_excel_files(file1, file2, output_file):
-    # Load the Excel files
-    xl1 = pd.ExcelFile(file1)
-    xl2 = pd.ExcelFile(file2)
-
-    # Get the sheet names from both files
-    sheets1 = xl1.sheet_names
-    sheets2 = xl2.sheet_names
-
-    # Create a writer object for the output file
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        # Iterate through sheets in xl1 (file1)
-        for sheet in sheets1:
-            df1 = xl1.parse(sheet)
-
-            # Check if the sheet exists in xl2 (file2)
-            if sheet in sheets2:
-                df2 = xl2.parse(sheet)
-            else:
-                # If the sheet doesn't exist in xl2, create an empty dataframe
-                df2 = pd.DataFrame()
-
-            # Skip empty sheets
-            if df1.empty and df2.empty:
-                print(f"Skipping empty sheet: {sheet}")
-                continue
-
-            # Check if the last row of df1 and the first row of df2 have the same value in the first cell
-            if not df1.empty and not df2.empty:
-                if df1.iloc[-1, 0] == df2.iloc[0, 0]:
-                    # If they match, drop the last row of df1
-                    df1 = df1.iloc[:-1]
-
-            # Concatenate the dataframes
-            combined_df = pd.concat([df1, df2], ignore_index=True)
-
-            # Write the combined dataframe to the output file
-            combined_df.to_excel(writer, sheet_name=sheet, index=False)
-
-    # Update file1 with the combined data
-    # Load the workbook for file1
-    wb = load_workbook(file1)
-    # Remove all existing sheets in file1
-    for sheet in wb.sheetnames:
-        del wb[sheet]
-
-    # Load the workbook for the output file
-    combined_wb = load_workbook(output_file)
-    # Copy sheets from the combined workbook to file1
-    for sheet_name in combined_wb.sheetnames:
-        source_sheet = combined_wb[sheet_name]
-        target_sheet = wb.create_sheet(sheet_name)
-
-        for row in source_sheet.iter_rows(values_only=True):
-            target_sheet.append(row)
-
-    # Save file1 with updated data
-    wb.save(file1)
-
-    print(f"Combined Excel file saved as {output_file} and updated in {file1}")
+import Data_Store
+import Table_Schemas
+
+historical_name = "consolidated_&_formatted_data (historical)"
+new_name = "consolidated_&_formatted_data (new)"
+output_name = "cleaned_consolidated_data"
+
+def new_rows(script_dir):
+    # Weeks from this run for the sheets the historical data keeps
+    if not Data_Store.exists(script_dir, new_name):
+        return {}
+    history_sheets = Data_Store.sheet_names(script_dir, historical_name)
+    tables = Data_Store.read_tables(script_dir, new_name)
+    return {sheet: df for sheet, df in tables.items() if sheet in history_sheets and not df.empty}
+
+def convert_history(script_dir):
+    # Histories stored before the weeks were typed are converted once, the typed rows are appended after
+    if not Data_Store.exists(script_dir, historical_name):
+        return
+    first_sheet = Data_Store.sheet_names(script_dir, historical_name)[0]
+    dates = Data_Store.read_table(script_dir, historical_name, first_sheet, columns=['Date'])
+    if dates.empty or Table_Schemas.is_typed(historical_name, {first_sheet: dates}):
+        return
+    history = Table_Schemas.convert_tables(historical_name, Data_Store.read_tables(script_dir, historical_name))
+    Data_Store.write_tables(script_dir, historical_name, history)
+    Data_Store.write_tables(script_dir, output_name, history)
+    print(f"Converted {historical_name} to typed columns")
+
+def combine_data(script_dir):
+    convert_history(script_dir)
+    rows = new_rows(script_dir)
+    if not rows:
+        print("No new weeks to combine.")
+
+    # Only the new rows are appended, a week that is already stored (the last, partial week of the
+    # previous run) is replaced by its new values
+    Data_Store.append_tables(script_dir, historical_name, rows, key='Date')
+    if Data_Store.exists(script_dir, output_name) and Data_Store.get_backend() != 'excel':
+        Data_Store.append_tables(script_dir, output_name, rows, key='Date')
+    else:
+        Data_Store.write_tables(script_dir, output_name, Data_Store.read_tables(script_dir, historical_name))
+
+    print(f"Combined data saved as {output_name} and updated in {historical_name}")
+
+def benchmark(history_weeks=(52, 520, 10000), backend='parquet'):
+    # Time adding one week to histories of different lengths, rewriting everything versus appending
+    columns = ["Date", "New", "Scrap", "Quotation", "Consignment", "Sales", "Coe Renewal", "Loan Paperwork",
+               "Consignment Purchase", "Dealer Purchase", "Floor", "Purchases", "Insurances", "Total"]
+    sheets = ["New", "Active", "Follow-up", "Appt Set", "Conversion", "Consigned", "Loan Submission",
+              "Appt Today", "Sold", "Conversion_1", "Revenue", "Void", "Void Sold", "Revert"]
+
+    def weeks(start, count):
+        dates = pd.date_range('1800-01-05', periods=start + count, freq='7D')[start:]
+        df = pd.DataFrame({column: [index % 200 for index in range(start, start + count)] for column in columns[1:]})
+        df.insert(0, "Date", "Week " + dates.strftime('%Y-%m-%d'))
+        return df
+
+    previous_backend = Data_Store.BACKEND
+    Data_Store.BACKEND = backend
+    try:
+        for count in history_weeks:
+            history = {sheet: weeks(0, count) for sheet in sheets}
+            # The new data repeats the last stored week, as the weekly run does
+            previous = {sheet: weeks(count - 1, 2) for sheet in sheets}
+            new = {sheet: weeks(count, 2) for sheet in sheets}
+            with tempfile.TemporaryDirectory() as data_dir:
+                history = {sheet: pd.concat([df.iloc[:-1], previous[sheet]], ignore_index=True) for sheet, df in history.items()}
+                Data_Store.write_tables(data_dir, "full", history)
+                start = time.perf_counter()
+                tables = Data_Store.read_tables(data_dir, "full")
+                tables = {sheet: pd.concat([df.iloc[:-1], new[sheet]], ignore_index=True) for sheet, df in tables.items()}
+                Data_Store.write_tables(data_dir, "full", tables)
+                full = time.perf_counter() - start
+
+                # The history as the previous weekly run left it
+                Data_Store.write_tables(data_dir, "incremental", {sheet: df.iloc[:-2] for sheet, df in history.items()})
+                Data_Store.append_tables(data_dir, "incremental", previous, key='Date')
+                start = time.perf_counter()
+                Data_Store.append_tables(data_dir, "incremental", new, key='Date')
+                incremental = time.perf_counter() - start
+
+                stored = Data_Store.read_tables(data_dir, "incremental")
+                same = all(stored[sheet].equals(tables[sheet]) for sheet in sheets)
+            print(f"{count:>5} weeks of history: rewrite {full:6.3f}s, append {incremental:6.3f}s, same result: {same}")
+    finally:
+        Data_Store.BACKEND = previous_backend
 
 def main_combine_data():
     if getattr(sys, 'frozen', False):
@@ -73,11 +100,16 @@ def main_combine_data():
         # When running as a script
         script_dir = os.path.dirname(os.path.abspath(__file__))
 
-    file1 = os.path.join(script_dir, "consolidated_&_formatted_data (historical).xlsx")
-    file2 = os.path.join(script_dir, "consolidated_&_formatted_data (new).xlsx")
-    output_file = os.path.join(script_dir, "cleaned_consolidated_data.xlsx")
-
-    combine_excel_files(file1, file2, output_file)
+    combine_data(script_dir)
 
 if __name__ == "__main__":
-    main_combine_data()
+    parser = argparse.ArgumentParser(description="Add the new weeks to the historical data")
+    parser.add_argument('--benchmark', action='store_true', help="Compare rewriting and appending for growing histories")
+    parser.add_argument('--backend', default='parquet', choices=Data_Store.BACKENDS)
+    parser.add_argument('--history-weeks', type=int, nargs='+', default=[52, 520, 10000])
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.history_weeks, args.backend)
+    else:
+        main_combine_data()
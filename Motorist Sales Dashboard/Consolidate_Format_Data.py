@@ -1,7 +1,12 @@
-from openpyxl import load_workbook, Workbook
+import pandas as pd
 import re
 import os
 import sys
+import Data_Store
+import Table_Schemas
+
+# Column headers (excluding "Week Start" and "Week End")
+column_headers = Table_Schemas.REPORT_COLUMNS
 
 def sanitize_sheet_name(name):
     # Replace invalid characters with underscores
@@ -9,92 +14,72 @@ def sanitize_sheet_name(name):
     # Truncate to 31 characters if necessary
     return sanitized_name[:31]
 
-def main_consolidate_format_data():
+def consolidate_format_data(script_dir):
+    input_name = "sales_dashboard (new)"
+    output_name = "consolidated_&_formatted_data (new)"
 
-    if getattr(sys, 'frozen', False):
-        # When running as a bundled executable (e.g., PyInstaller)
-        script_dir = os.path.dirname(sys.executable)
-
-    else:
-        # When running as a script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
+    weeks = Data_Store.read_tables(script_dir, input_name) if Data_Store.exists(script_dir, input_name) else {}
+    if not weeks:
+        print("Data is up to date. No new file to process.")
+        # Save an empty set of tables
+        Data_Store.write_tables(script_dir, output_name, {})
+        print(f"Empty data saved as {output_name}")
+        return  # Exit the function after saving the empty data
 
-    # Path to your Excel file
-    input_file_path = os.path.join(script_dir, "sales_dashboard (new).xlsx")
-    output_file_path = os.path.join(script_dir, "formatted_sales_dashboard (new).xlsx")
+    # The report has two 'Conversion' rows, rename the second one (cell C11 of each week's sheet)
+    for week_df in weeks.values():
+        if len(week_df) > 9:
+            week_df.iloc[9, 2] = 'Conversion_1'
 
-    if not os.path.exists(input_file_path):
-        print("Data is up to date. No new file to process.")
-        # Create a new, empty workbook
-        output_wb = Workbook()
-        # Save the empty workbook
-        output_empty_file_path = os.path.join(script_dir, "consolidated_&_formatted_data (new).xlsx")
-        output_wb.save(output_empty_file_path)
-        print(f"Empty Excel file saved at {output_empty_file_path}")
-        return  # Exit the function after saving the empty file
-
-    # Load the original workbook
-    input_wb1 = load_workbook(input_file_path)
-
-    # Modify each sheet
-    for sheet in input_wb1.worksheets:
-        sheet['C11'] = 'Conversion_1'
-
-    # Save the modified workbook
-    input_wb1.save(output_file_path)
-
-    # Load formatted workbook
-    input_wb2 = load_workbook(os.path.join(script_dir, "formatted_sales_dashboard (new).xlsx"))
-
-    # Create a new workbook for consolidated data
-    output_wb = Workbook()
-    output_wb.remove(output_wb.active)  # Remove the default sheet
-
-    # Column headers (excluding "Week Start" and "Week End")
-    column_headers = [
-        "New", "Scrap", "Quotation", "Consignment", "Sales", "Coe Renewal",
-        "Loan Paperwork", "Consignment Purchase", "Dealer Purchase", "Floor",
-        "Purchases", "Insurances", "Total"
-    ]
-
-    # Create a dictionary to hold each new sheet by row header name
+    # Create a dictionary to hold the rows of each new sheet by row header name
     sheets_dict = {}
 
-    # Initialize each sheet in the new workbook with headers
-    for row_header in input_wb2.active.iter_rows(min_row=2, max_row=15, min_col=3, max_col=3, values_only=True):
-        row_header = row_header[0]  # Get the header from the tuple
-        if row_header:
+    # Initialize each sheet from the row headers of the first week
+    first_week = next(iter(weeks.values()))
+    for row_header in first_week.iloc[:14, 2]:
+        if pd.notna(row_header) and row_header:
             if row_header in sheets_dict:
                 row_header = row_header + "_1"
-            sanitized_name = sanitize_sheet_name(row_header)
-            sheets_dict[row_header] = output_wb.create_sheet(title=sanitized_name)
-            sheets_dict[row_header].append(["Date"] + column_headers)
-
-    # Loop through each sheet (week) in the input workbook
-    for sheet_name in input_wb2.sheetnames:
-        # Get the current sheet
-        input_sheet = input_wb2[sheet_name]
+            sheets_dict[row_header] = []
 
+    # Loop through each sheet (week) in the input data
+    for sheet_name, week_df in weeks.items():
         # Extract the date range from the sheet name
         date_range = sheet_name.split(' to ')[0]
 
-        # Extract row headers dynamically from the current sheet
-        for row_idx in range(2, input_sheet.max_row + 1):  # Adjust the range as needed
-            row_header = input_sheet.cell(row=row_idx, column=3).value  # Get the row header from column 3
-            if row_header and row_header in sheets_dict:
+        for row in week_df.itertuples(index=False):
+            row_header = row[2]  # Get the row header from column 3
+            if row_header in sheets_dict:
                 # Get the data for this row across the defined columns
-                data_row = []
-                for col_idx in range(4, len(column_headers) + 4):  # Start from 4 to skip "Week Start" and "Week End"
-                    cell_value = input_sheet.cell(row=row_idx, column=col_idx).value
-                    data_row.append(cell_value)
+                data_row = list(row[3:len(column_headers) + 3])
+                data_row += [None] * (len(column_headers) - len(data_row))
 
                 # Append the date and data row to the corresponding sheet
                 sheets_dict[row_header].append([date_range] + data_row)
 
-    # Save the consolidated workbook
-    print("Excel file saved at consolidated_&_formatted_data (new).xlsx")
-    output_file_path = os.path.join(script_dir, "consolidated_&_formatted_data (new).xlsx")
-    output_wb.save(output_file_path)
+    tables = {
+        sanitize_sheet_name(row_header): pd.DataFrame(rows, columns=["Date"] + column_headers)
+        for row_header, rows in sheets_dict.items()
+    }
+
+    # Each sheet holds a single report row, its values are stored as numbers and its weeks as dates
+    tables = Table_Schemas.convert_tables(output_name, tables)
+
+    # Save the consolidated data
+    Data_Store.write_tables(script_dir, output_name, tables)
+    print(f"Consolidated data saved as {output_name}")
+
+def main_consolidate_format_data():
+
+    if getattr(sys, 'frozen', False):
+        # When running as a bundled executable (e.g., PyInstaller)
+        script_dir = os.path.dirname(sys.executable)
+
+    else:
+        # When running as a script
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    consolidate_format_data(script_dir)
 
 if __name__ == "__main__":
     main_consolidate_format_data()
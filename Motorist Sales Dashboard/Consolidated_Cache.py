@@ -0,0 +1,123 @@
+import threading
+import atexit
+import argparse
+import time
+import os
+import sys
+import Data_Store
+import Table_Schemas
+
+# The consolidated data the dashboard callbacks plot, kept in memory. The weeks are stored as dates and the
+# values as numbers (Table_Schemas), data stored before that is converted once when it is loaded. A callback
+# only stats the stored file, when it was rewritten the new version is loaded in the background while the
+# previous one is still served. Marketshare and LTA_Dashboard share this module. The hit and miss counts are
+# printed after every background reload and once when the dashboard stops, not from the callbacks.
+
+CONSOLIDATED_NAME = 'cleaned_consolidated_data'
+
+_cache = {}  # (output_dir, name) -> {'signature', 'tables', 'seconds'}
+_cache_lock = threading.Lock()
+_reloading = set()
+_summary_at_exit = False
+
+# hits: served from memory, stale: served the previous version while the new one loads,
+# misses: loaded while the callback waited
+stats = {'hits': 0, 'stale': 0, 'misses': 0, 'reloads': 0, 'load_seconds': 0.0}
+
+def _print_summary():
+    print(summary())
+
+def _load(output_dir, name, signature):
+    global _summary_at_exit
+    start = time.perf_counter()
+    tables = Table_Schemas.convert_tables(name, Data_Store.read_tables(output_dir, name))
+    seconds = time.perf_counter() - start
+    with _cache_lock:
+        _cache[(output_dir, name)] = {'signature': signature, 'tables': tables, 'seconds': seconds}
+        stats['load_seconds'] += seconds
+        register = not _summary_at_exit
+        _summary_at_exit = True
+    if register:
+        atexit.register(_print_summary)
+    print(f"Loaded {name} ({len(tables)} sheets) in {seconds:.3f}s")
+    return tables
+
+def _reload(output_dir, name, signature):
+    try:
+        _load(output_dir, name, signature)
+        with _cache_lock:
+            stats['reloads'] += 1
+        print(summary())
+    except Exception as e:
+        # Most likely caught in the middle of a write, the next access tries again
+        print(f"Error reloading {name}: {e}")
+    finally:
+        with _cache_lock:
+            _reloading.discard((output_dir, name))
+
+def get_tables(output_dir, name=CONSOLIDATED_NAME):
+    # {sheet: cleaned DataFrame} or None if the data does not exist. The frames are shared, do not modify them
+    signature = Data_Store.signature(output_dir, name)
+    key = (output_dir, name)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached['signature'] == signature:
+            stats['hits'] += 1
+            return cached['tables']
+        if cached is not None and signature is not None:
+            stats['stale'] += 1
+            if key not in _reloading:
+                _reloading.add(key)
+                threading.Thread(target=_reload, args=(output_dir, name, signature), daemon=True).start()
+            return cached['tables']
+        if signature is None:
+            return None
+        stats['misses'] += 1
+    return _load(output_dir, name, signature)
+
+def get_table(output_dir, sheet, name=CONSOLIDATED_NAME):
+    tables = get_tables(output_dir, name)
+    if tables is None or sheet not in tables:
+        return None
+    # A shallow copy, assigning columns to it does not touch the cached frame
+    return tables[sheet].copy(deep=False)
+
+def sheet_names(output_dir, name=CONSOLIDATED_NAME):
+    tables = get_tables(output_dir, name)
+    return list(tables) if tables is not None else []
+
+def summary():
+    with _cache_lock:
+        served = stats['hits'] + stats['stale']
+        loads = stats['misses'] + stats['reloads']
+        average = stats['load_seconds'] / loads if loads else 0.0
+        return (f"consolidated data cache: {stats['hits']} hits, {stats['stale']} stale, {stats['misses']} misses, "
+                f"{stats['reloads']} background reloads, about {served * average:.2f}s of loading saved")
+
+def benchmark(output_dir, sheet, repeat=50):
+    # Reading the sheet on every callback as before, against the cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Table_Schemas.convert_table(CONSOLIDATED_NAME, sheet, Data_Store.read_table(output_dir, CONSOLIDATED_NAME, sheet))
+    previous = (time.perf_counter() - start) / repeat
+    get_tables(output_dir)  # The only load (the miss), printed as 'Loaded ...'
+    start = time.perf_counter()
+    for _ in range(repeat):
+        get_table(output_dir, sheet)
+    cached = (time.perf_counter() - start) / repeat
+    print(f"{sheet}: read per callback {previous * 1000:.2f} ms, cached {cached * 1000:.3f} ms")  # The summary follows at exit
+
+if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # When running as a bundled executable (e.g., PyInstaller)
+        script_dir = os.path.dirname(sys.executable)
+    else:
+        # When running as a script
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="In-memory cache of the consolidated data")
+    parser.add_argument('--data-dir', default=script_dir)
+    parser.add_argument('--sheet', default='Revenue')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    benchmark(args.data_dir, args.sheet, args.repeat)
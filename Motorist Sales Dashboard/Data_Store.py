@@ -0,0 +1,465 @@
+import pandas as pd
+import argparse
+import tempfile
+import threading
+import shutil
+import json
+import time
+import os
+import re
+import sys
+import Run_Report
+
+# Storage for the tables passed between pipeline stages. Every artifact is a set of named sheets, stored as
+#   'parquet' (default) - a folder '<name>.parquet' with one Parquet file per sheet
+#   'feather'           - the same layout with Feather files
+#   'excel'             - a single '<name>.xlsx' workbook, as the pipeline always did
+# Reading an artifact that does not exist in the chosen backend falls back to '<name>.xlsx', so the
+# historical workbooks keep working until the first run writes them in the new backend.
+BACKEND = os.environ.get('DASHBOARD_STORE', 'parquet').lower()
+BACKENDS = ('parquet', 'feather', 'excel')
+
+# Also write the final artifacts as .xlsx at the end of a run
+EXPORT_EXCEL = os.environ.get('DASHBOARD_EXPORT_EXCEL', '').lower() in ('1', 'true', 'yes')
+
+# Artifacts that are read by people or by the dashboards outside this folder
+FINAL_ARTIFACTS = [
+    "cleaned_consolidated_data",
+    "consolidated_&_formatted_data (historical)",
+    "filtered_new_data",
+    "filtered_scrapexport_data",
+    "filtered_quotation_data",
+    "filtered_consignment_data",
+    "filtered_sold_data",
+    "filtered_void_data",
+    "sales_calculations_summary",
+]
+
+# Also keep the raw scraped tables ('new_data', 'sold_data', ...), for debugging or archiving
+ARCHIVE_RAW = os.environ.get('DASHBOARD_ARCHIVE_RAW', '').lower() in ('1', 'true', 'yes')
+
+MANIFEST = "sheets.json"
+
+# Appended rows go into the last part of a sheet until that file reaches TAIL_BYTES, and a sheet stored in
+# more than COMPACT_PARTS parts is rewritten as a single file on the next append
+TAIL_BYTES = int(os.environ.get('DASHBOARD_TAIL_BYTES', 64 * 1024))
+COMPACT_PARTS = int(os.environ.get('DASHBOARD_COMPACT_PARTS', 32))
+
+# Extra attempts at reading an artifact that is missing, it may be in the middle of being replaced
+READ_RETRIES = 3
+
+_warned_no_arrow = False
+# Seconds spent reading and writing tables, reported by the benchmark. Tables read at the same time by several
+# threads (salescalculation) each add their own time, so this is thread-seconds and can exceed the wall time
+io_seconds = 0.0
+_io_lock = threading.Lock()
+
+def _add_io_seconds(seconds):
+    global io_seconds
+    with _io_lock:
+        io_seconds += seconds
+
+def get_backend(backend=None):
+    # Parquet and Feather need pyarrow, without it everything stays in Excel
+    global _warned_no_arrow
+    backend = (backend or BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {BACKENDS}")
+    if backend != 'excel':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            if not _warned_no_arrow:
+                print(f"pyarrow is not installed, storing tables as Excel instead of {backend}.")
+                _warned_no_arrow = True
+            return 'excel'
+    return backend
+
+def artifact_path(output_dir, name, backend=None):
+    backend = get_backend(backend)
+    if backend == 'excel':
+        return os.path.join(output_dir, f"{name}.xlsx")
+    return os.path.join(output_dir, f"{name}.{backend}")
+
+def _file_name(index, sheet_name):
+    return f"{index:03d}_{re.sub(r'[^A-Za-z0-9]+', '_', sheet_name).strip('_')}"
+
+def _normalise(df):
+    # Give the table the same types an Excel round trip would: empty strings become missing and
+    # text columns holding only numbers become numeric
+    df = df.copy()
+    df.columns = [str(column) for column in df.columns]
+    for column in df.columns:
+        series = df[column]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        series = series.replace('', None)
+        if series.notna().any():
+            try:
+                series = pd.to_numeric(series)
+            except (ValueError, TypeError):
+                # Mixed columns are kept as text
+                series = series.map(lambda value: value if pd.isna(value) else str(value))
+        df[column] = series
+    return df
+
+def write_tables(output_dir, name, tables, backend=None):
+    # Write a dict of sheet name -> DataFrame, replacing the artifact if it exists
+    start = time.perf_counter()
+    try:
+        with Run_Report.step('write'):
+            return _write_tables(output_dir, name, tables, backend)
+    finally:
+        _add_io_seconds(time.perf_counter() - start)
+
+def _write_tables(output_dir, name, tables, backend=None):
+    backend = get_backend(backend)
+    path = artifact_path(output_dir, name, backend)
+
+    if backend == 'excel':
+        writer = pd.ExcelWriter(path, engine='openpyxl')
+        for sheet_name, df in tables.items():
+            df.to_excel(writer, index=False, sheet_name=sheet_name[:31])
+        if not tables:
+            pd.DataFrame().to_excel(writer, index=False, sheet_name='Sheet')
+        writer.close()
+        Run_Report.count('excel bytes written', os.path.getsize(path))
+        return path
+
+    # Write into a temporary folder first so readers never see half an artifact
+    temp_path = tempfile.mkdtemp(prefix=f".{name}.", dir=output_dir)
+    manifest = []
+    for index, (sheet_name, df) in enumerate(tables.items()):
+        file_name = f"{_file_name(index, sheet_name)}.{backend}"
+        _write_part(backend, _normalise(df), os.path.join(temp_path, file_name))
+        manifest.append([sheet_name, file_name])
+    _write_manifest(temp_path, manifest)
+
+    # The old folder is moved aside before the new one takes its place and only deleted after, so the
+    # artifact is missing for no longer than between two renames
+    old_path = None
+    if os.path.exists(path):
+        old_path = os.path.join(output_dir, f".{name}.old.{time.time_ns()}")
+        os.rename(path, old_path)
+    os.rename(temp_path, path)
+    if old_path:
+        shutil.rmtree(old_path)
+    return path
+
+def _write_part(backend, df, file_path):
+    df = df.reset_index(drop=True)
+    if backend == 'parquet':
+        df.to_parquet(file_path, index=False)
+    else:
+        df.to_feather(file_path)
+    Run_Report.count(f'{backend} bytes written', os.path.getsize(file_path))
+
+def _read_part(backend, file_path, columns=None):
+    Run_Report.count(f'{backend} bytes read', os.path.getsize(file_path))
+    if backend == 'parquet':
+        if columns:
+            import pyarrow.parquet as pq
+            available = pq.read_schema(file_path).names
+            return pd.read_parquet(file_path, columns=[c for c in available if c in columns])
+        return pd.read_parquet(file_path)
+    df = pd.read_feather(file_path)
+    return df[[c for c in df.columns if c in columns]] if columns else df
+
+def _manifest(path):
+    # Entries are [sheet name, file name] or [sheet name, file name, key column, lowest key, highest key],
+    # a sheet can be stored in several parts which are read back in order
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+def _write_manifest(path, manifest):
+    temp_file = os.path.join(path, f".{MANIFEST}.tmp")
+    with open(temp_file, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temp_file, os.path.join(path, MANIFEST))
+
+def _resolve(output_dir, name, backend=None):
+    # Backend and path the artifact can actually be read from
+    backend = get_backend(backend)
+    path = artifact_path(output_dir, name, backend)
+    if os.path.exists(path):
+        return backend, path
+    excel_path = artifact_path(output_dir, name, 'excel')
+    if os.path.exists(excel_path):
+        return 'excel', excel_path
+    return backend, None
+
+def exists(output_dir, name, backend=None):
+    return _resolve(output_dir, name, backend)[1] is not None
+
+def signature(output_dir, name, backend=None):
+    # Path, modification time and size of the stored artifact, changes whenever it is rewritten
+    backend, path = _resolve(output_dir, name, backend)
+    if path is None:
+        return None
+    if backend != 'excel':
+        # Folders are replaced as a whole, the manifest is written last
+        stat = os.stat(os.path.join(path, MANIFEST))
+    else:
+        stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+def sheet_names(output_dir, name, backend=None):
+    backend, path = _resolve(output_dir, name, backend)
+    if path is None:
+        raise FileNotFoundError(f"No stored tables for '{name}' in {output_dir}")
+    if backend == 'excel':
+        return pd.ExcelFile(path).sheet_names
+    return list(dict.fromkeys(entry[0] for entry in _manifest(path)))
+
+def read_tables(output_dir, name, sheets=None, columns=None, backend=None):
+    # Read an artifact back as a dict of sheet name -> DataFrame (optionally only some sheets/columns)
+    start = time.perf_counter()
+    try:
+        with Run_Report.step('read'):
+            for attempt in range(READ_RETRIES):
+                try:
+                    return _read_tables(output_dir, name, sheets, columns, backend)
+                except FileNotFoundError:
+                    # Caught between the two renames of _write_tables, or replaced half way through the read
+                    time.sleep(0.01 * (attempt + 1))
+            return _read_tables(output_dir, name, sheets, columns, backend)
+    finally:
+        _add_io_seconds(time.perf_counter() - start)
+
+def _read_tables(output_dir, name, sheets=None, columns=None, backend=None):
+    backend, path = _resolve(output_dir, name, backend)
+    if path is None:
+        raise FileNotFoundError(f"No stored tables for '{name}' in {output_dir}")
+
+    if backend == 'excel':
+        usecols = (lambda column: column in columns) if columns else None
+        tables = pd.read_excel(path, sheet_name=list(sheets) if sheets else None, usecols=usecols)
+        Run_Report.count('excel bytes read', os.path.getsize(path))
+        return tables
+
+    parts = {}
+    for entry in _manifest(path):
+        sheet_name, file_name = entry[0], entry[1]
+        if sheets and sheet_name not in sheets:
+            continue
+        parts.setdefault(sheet_name, []).append(_read_part(backend, os.path.join(path, file_name), columns))
+    return {sheet_name: frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            for sheet_name, frames in parts.items()}
+
+def read_table(output_dir, name, sheet=0, columns=None, backend=None):
+    # Read a single sheet, by name or position
+    if isinstance(sheet, int):
+        sheet = sheet_names(output_dir, name, backend)[sheet]
+    return read_tables(output_dir, name, sheets=[sheet], columns=columns, backend=backend)[sheet]
+
+def archive_raw(output_dir, name, tables):
+    # The scrapers pass their tables straight to the filters, the raw copy is only written on request
+    if ARCHIVE_RAW:
+        write_tables(output_dir, name, tables)
+        print(f"Raw data archived to '{name}'")
+
+def _key_range(values):
+    keys = values.dropna().astype(str)
+    return (keys.min(), keys.max()) if len(keys) else None
+
+def _merge(existing, new, key):
+    # Rows of new replace the rows of existing with the same key
+    if key in new.columns and key in existing.columns:
+        new = new.drop_duplicates(subset=key, keep='last')
+        existing = existing[~existing[key].astype(str).isin(new[key].astype(str))]
+    if existing.empty:
+        return new.reset_index(drop=True)
+    return pd.concat([existing, new], ignore_index=True)
+
+def append_tables(output_dir, name, tables, key=None, backend=None):
+    # Add the rows of each table to the end of its sheet, only the sheets in tables are touched. With a key
+    # column, stored rows with the same key are replaced. Parquet and Feather only write the new rows (and
+    # rewrite the parts whose key range overlaps them), anything else falls back to rewriting the artifact.
+    start = time.perf_counter()
+    try:
+        with Run_Report.step('append'):
+            return _append_tables(output_dir, name, tables, key, backend)
+    finally:
+        _add_io_seconds(time.perf_counter() - start)
+
+def _append_tables(output_dir, name, tables, key=None, backend=None):
+    backend = get_backend(backend)
+    tables = {sheet_name: df for sheet_name, df in tables.items() if not df.empty}
+    stored_backend, path = _resolve(output_dir, name, backend)
+
+    if backend == 'excel' or stored_backend != backend:
+        # Excel can not be appended to, and a workbook is moved to the chosen backend in one go
+        existing = _read_tables(output_dir, name) if path else {}
+        for sheet_name, df in tables.items():
+            existing[sheet_name] = _merge(existing[sheet_name], df, key) if sheet_name in existing else df
+        _write_tables(output_dir, name, existing, backend)
+        return list(tables)
+
+    manifest = _manifest(path)
+    removed = []
+    for sheet_name, df in tables.items():
+        df = _normalise(df)
+        if key and key in df.columns:
+            df = df.drop_duplicates(subset=key, keep='last')
+        new_range = _key_range(df[key]) if key and key in df.columns else None
+        sheet_order = list(dict.fromkeys(entry[0] for entry in manifest))
+        sheet_index = sheet_order.index(sheet_name) if sheet_name in sheet_order else len(sheet_order)
+        parts = [entry for entry in manifest if entry[0] == sheet_name]
+        tail = parts[-1] if parts and os.path.getsize(os.path.join(path, parts[-1][1])) < TAIL_BYTES else None
+
+        if new_range:
+            for entry in parts:
+                if entry is tail:
+                    continue
+                if len(entry) < 5 or entry[2] != key:
+                    # Part written without a key range, look at its key column once and remember the range
+                    keys = _read_part(backend, os.path.join(path, entry[1]), [key])
+                    key_range = _key_range(keys[key]) if key in keys.columns else None
+                    entry[2:] = [key, *(key_range or ('', ''))]
+                if not (entry[3] <= new_range[1] and new_range[0] <= entry[4]):
+                    continue
+
+                # The key ranges overlap, drop the rows the new ones replace from this part
+                part = _read_part(backend, os.path.join(path, entry[1]))
+                kept = part[~part[key].astype(str).isin(df[key].astype(str))]
+                if len(kept) == len(part):
+                    continue
+                removed.append(entry[1])
+                if kept.empty:
+                    manifest.remove(entry)
+                    continue
+                entry[1] = f"{_file_name(sheet_index, sheet_name)}_{time.time_ns()}.{backend}"
+                entry[3:] = list(_key_range(kept[key]))
+                _write_part(backend, kept, os.path.join(path, entry[1]))
+
+        parts = [entry for entry in manifest if entry[0] == sheet_name]
+        if tail is not None:
+            # Small last part, rewrite it with the new rows added
+            df = _merge(_read_part(backend, os.path.join(path, tail[1])), df, key)
+            new_range = _key_range(df[key]) if key and key in df.columns else None
+            removed.append(tail[1])
+            position = manifest.index(tail)
+            manifest.remove(tail)
+        elif len(parts) >= COMPACT_PARTS:
+            # Too many small parts, store the whole sheet as one file again
+            frames = [_read_part(backend, os.path.join(path, entry[1])) for entry in parts]
+            df = pd.concat(frames + [df], ignore_index=True)
+            new_range = _key_range(df[key]) if key and key in df.columns else None
+            removed.extend(entry[1] for entry in parts)
+            position = manifest.index(parts[0])
+            manifest = [entry for entry in manifest if entry[0] != sheet_name]
+        else:
+            position = len(manifest)
+
+        file_name = f"{_file_name(sheet_index, sheet_name)}_{time.time_ns()}.{backend}"
+        _write_part(backend, df, os.path.join(path, file_name))
+        manifest.insert(position, [sheet_name, file_name, key, *new_range] if new_range else [sheet_name, file_name])
+
+    # The manifest is replaced last, readers see either the old or the new set of parts
+    _write_manifest(path, manifest)
+    for file_name in removed:
+        os.remove(os.path.join(path, file_name))
+    return list(tables)
+
+def delete(output_dir, name):
+    # Remove the artifact from every backend
+    removed = []
+    for backend in BACKENDS:
+        path = (os.path.join(output_dir, f"{name}.xlsx") if backend == 'excel'
+                else os.path.join(output_dir, f"{name}.{backend}"))
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+            removed.append(path)
+        elif os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+def export_excel(output_dir, name):
+    # Write a stored artifact out as '<name>.xlsx'
+    backend, path = _resolve(output_dir, name)
+    if path is None or backend == 'excel':
+        return path
+    return write_tables(output_dir, name, read_tables(output_dir, name), backend='excel')
+
+def main_export_excel(force=False):
+    if not (EXPORT_EXCEL or force):
+        return
+    if getattr(sys, 'frozen', False):
+        # When running as a bundled executable (e.g., PyInstaller)
+        script_dir = os.path.dirname(sys.executable)
+    else:
+        # When running as a script
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for name in FINAL_ARTIFACTS:
+        path = export_excel(script_dir, name)
+        if path:
+            print(f"Exported {path}")
+
+def run_offline_pipeline(data_dir, backend, weeks=8):
+    # Every stage of 'All Dashboards.py' up to the dashboards, against Mock_Admin_Server.py
+    import Mock_Admin_Server
+    import Fetch_Pages
+    import Session_Manager
+    import New, ScrapExport, Quotation, Consignment, Sold, Void
+    import SalesDashboard, Consolidate_Format_Data, Combine_Data, salescalculation
+    # The stages use the imported module, which is not this one when run as a script
+    import Data_Store as store
+
+    previous_backend = store.BACKEND
+    store.BACKEND = backend
+    store.io_seconds = 0.0
+    server, base_url = Mock_Admin_Server.start_server(latency=0)
+    Fetch_Pages.set_base_url(base_url)
+    try:
+        start = time.perf_counter()
+        New.filter(New.scrape(1, data_dir), data_dir)
+        ScrapExport.filter(ScrapExport.scrape(2, data_dir), data_dir)
+        Quotation.filter_quotation(Quotation.scrape_quotation(data_dir), data_dir)
+        Consignment.filter_consignment(Consignment.scrape_consignment(data_dir), data_dir)
+        Sold.filter(Sold.scrape(data_dir), data_dir)
+        Void.filter(Void.scrape(data_dir), data_dir)
+        SalesDashboard.scrape(data_dir, 'http', backfill_weeks=weeks)
+        Consolidate_Format_Data.consolidate_format_data(data_dir)
+        Combine_Data.combine_data(data_dir)
+        salescalculation.salescalculation(data_dir)
+        return time.perf_counter() - start, store.io_seconds
+    finally:
+        store.BACKEND = previous_backend
+        Session_Manager.close_session()
+        server.shutdown()
+
+def benchmark(sample_dir, backends=('excel', 'parquet'), weeks=8):
+    # Compare end-to-end pipeline time for each backend, starting from a copy of the sample files
+    import contextlib
+    import io
+
+    import warnings
+    warnings.simplefilter('ignore', UserWarning)
+
+    timings = {}
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as data_dir:
+            for file_name in os.listdir(sample_dir):
+                if file_name.endswith('.xlsx'):
+                    shutil.copy(os.path.join(sample_dir, file_name), data_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings[backend] = run_offline_pipeline(data_dir, backend, weeks)
+        total, storage = timings[backend]
+        print(f"{backend:<8} total {total:6.2f}s   table I/O {storage:6.2f} thread-seconds")
+    return timings
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pipeline table storage")
+    parser.add_argument('--export-excel', action='store_true', help="Write the final artifacts as .xlsx")
+    parser.add_argument('--benchmark', action='store_true', help="Time the offline pipeline with each backend")
+    parser.add_argument('--sample-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Files'))
+    parser.add_argument('--backends', nargs='+', default=['excel', 'parquet'], choices=BACKENDS)
+    parser.add_argument('--weeks', type=int, default=8, help="Weeks of sales dashboard to scrape in the benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.sample_dir, args.backends, args.weeks)
+    elif args.export_excel:
+        main_export_excel(force=True)
@@ -0,0 +1,119 @@
+import calendar
+import pandas as pd
+import numpy as np
+import argparse
+import time
+
+# Calendar attributes of a set of dates, computed with array operations so no callback parses or formats a
+# date per row. A table is built once for the dates of an upload and joined onto the daily rows on 'Date':
+#   Week         - week of the year as the dashboards show it, strftime('%W'): weeks start on Monday and the
+#                  days before the first Monday are week '00'
+#   ISO Year, ISO Week
+#   Week Start, Week End - Monday and Sunday of the date's week
+#   Weekday      - Monday is 0
+#   Day          - name of the weekday
+#   Day of Year, Leap Year, Days in Year
+
+DAY_NAMES = np.array(list(calendar.day_name), dtype=object)
+
+def is_leap_year(years):
+    years = np.asarray(years)
+    return (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+
+def calendar_table(dates):
+    # One row per distinct date, indexed by 'Date'
+    dates = pd.DatetimeIndex(pd.unique(pd.DatetimeIndex(dates).dropna().normalize())).sort_values()
+    weekday = dates.weekday.values
+    day_of_year = dates.dayofyear.values
+    week_start = dates - pd.to_timedelta(weekday, unit='D')
+    iso = dates.isocalendar()
+    leap = is_leap_year(dates.year.values)
+
+    return pd.DataFrame({
+        'Week': pd.Series((day_of_year + 6 - weekday) // 7).astype(str).str.zfill(2).values,
+        'ISO Year': iso['year'].values.astype('int64'),
+        'ISO Week': iso['week'].values.astype('int64'),
+        'Week Start': week_start,
+        'Week End': week_start + pd.Timedelta(days=6),
+        'Weekday': weekday.astype('int64'),
+        'Day': DAY_NAMES[weekday],
+        'Day of Year': day_of_year.astype('int64'),
+        'Leap Year': leap,
+        'Days in Year': np.where(leap, 366, 365),
+    }, index=pd.Index(dates, name='Date'))
+
+def add_calendar(df, table, columns, date_column='Date'):
+    # df with the calendar columns of its dates, one join instead of a computation per row
+    return df.join(table[columns], on=date_column)
+
+def days_elapsed(years, today):
+    # Days of each year that count towards a per day average: the whole year, up to today for the current one
+    years = np.asarray(years)
+    days = np.where(is_leap_year(years), 366, 365)
+    return np.where(years == today.year, pd.Timestamp(today).dayofyear, days)
+
+def benchmark(days=3650, repeat=20):
+    # The per row strptime/strftime/apply version of the Dealer tables against the calendar table
+    from datetime import datetime, timedelta
+    dates = pd.date_range('2016-01-01', periods=days, freq='D')
+    daily = pd.DataFrame({'Date': dates, 'Bids': np.arange(days) % 17})
+    year = dates[-1].year
+    today = dates[-1]
+
+    def per_row():
+        data = daily.copy()
+        data['Date'] = data['Date'].dt.strftime('%d/%m/%Y')
+        data['Day'] = data['Date'].apply(lambda x: calendar.day_name[datetime.strptime(x, '%d/%m/%Y').weekday()])
+        year_data = daily[daily['Date'].dt.year == year].copy()
+        year_data['Week'] = year_data['Date'].dt.strftime('%W')
+        year_data['Day'] = year_data['Date'].dt.strftime('%A')
+        weeks = year_data.groupby(['Week', 'Day'])['Bids'].sum().reset_index().groupby('Week')['Bids'].mean().reset_index()
+
+        def get_week_dates(week_number, year):
+            start = datetime.strptime(f'{year}-W{int(week_number):02d}-1', "%Y-W%W-%w")
+            end = start + timedelta(days=6)
+            return start.strftime("%d/%m/%Y"), end.strftime("%d/%m/%Y")
+
+        weeks['Start Date'], weeks['End Date'] = zip(*weeks.apply(lambda row: get_week_dates(row['Week'], year), axis=1))
+        totals = daily.groupby(daily['Date'].dt.year)['Bids'].sum().astype(float)
+        for total_year in totals.index:
+            if total_year == today.year:
+                days_in_year = (today - pd.to_datetime(f'{total_year}-01-01')).days + 1
+            else:
+                days_in_year = 365 if pd.Timestamp(f'{total_year}-12-31').dayofyear == 365 else 366
+            totals.loc[total_year] /= days_in_year
+        return data['Day'].tolist(), weeks.values.tolist(), totals.tolist()
+
+    def vectorized(table):
+        data = add_calendar(daily, table, ['Day'])
+        year_data = add_calendar(daily[daily['Date'].dt.year == year], table, ['Week', 'Week Start', 'Day'])
+        weeks = year_data.groupby(['Week', 'Week Start', 'Day'])['Bids'].sum().reset_index() \
+            .groupby(['Week', 'Week Start'])['Bids'].mean().reset_index()
+        weeks['Start Date'] = weeks['Week Start'].dt.strftime('%d/%m/%Y')
+        weeks['End Date'] = (weeks['Week Start'] + pd.Timedelta(days=6)).dt.strftime('%d/%m/%Y')
+        totals = daily.groupby(daily['Date'].dt.year)['Bids'].sum()
+        totals = totals.astype(float) / days_elapsed(totals.index, today)
+        return data['Day'].tolist(), weeks[['Week', 'Bids', 'Start Date', 'End Date']].values.tolist(), totals.tolist()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        expected = per_row()
+    previous = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    table = calendar_table(daily['Date'])
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = vectorized(table)
+    joined = (time.perf_counter() - start) / repeat
+
+    print(f"{days:,} days, calendar table built in {build * 1000:.2f} ms")
+    print(f"Per callback: per row {previous * 1000:.2f} ms, calendar join {joined * 1000:.2f} ms, same results: {expected == result}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Vectorised calendar attributes for the Dealer tables")
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.days, args.repeat)
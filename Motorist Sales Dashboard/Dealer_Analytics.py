@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import argparse
+import time
+import Upload_Cache
+import Dealer_Cube
+import Date_Dimension
+
+# The dealer bid analysis behind Dealer.py and the Dealer tab of Marketshare. The functions take an upload
+# (or a bid DataFrame) and a date range and return plain tables, the two apps only turn them into Dash
+# components, so a change to the numbers is made once for both.
+
+def load_upload(contents, filename):
+    # (message, sheet options, key of the cached upload) for the upload callback, the key is None on errors
+    if contents is None:
+        return 'No file uploaded yet. Please upload a file.', [], None
+
+    if Upload_Cache.file_type(filename) is None:
+        return 'Unsupported file format.', [], None
+
+    # Parsed once on the server, the browser only keeps the key of the cached upload
+    key = Upload_Cache.store_upload(contents, filename)
+
+    if Upload_Cache.file_type(filename) == 'excel':
+        sheet_names = Upload_Cache.sheet_names(key)
+        options = [{'label': sheet, 'value': sheet} for sheet in sheet_names]
+        return f'File "{filename}" loaded successfully with {len(sheet_names)} sheets.', options, key
+
+    df = Upload_Cache.get_sheet(key, Upload_Cache.CSV_SHEET)
+    return f'File "{filename}" loaded successfully with {len(df)} rows.', [], key
+
+def upload_cube(key, filename, sheet_name):
+    # (cube, None) or (None, message to show instead). The daily aggregates of the sheet are built on the
+    # first call for an upload and kept with it
+    if Upload_Cache.file_type(filename) == 'excel':
+        cube = Upload_Cache.derived(key, sheet_name, 'cube', Dealer_Cube.build_cube, Dealer_Cube.cube_bytes)
+    elif Upload_Cache.file_type(filename) == 'csv':
+        cube = Upload_Cache.derived(key, Upload_Cache.CSV_SHEET, 'cube', Dealer_Cube.build_cube, Dealer_Cube.cube_bytes)
+    else:
+        return None, 'Unsupported file format.'
+
+    if cube is None:
+        return None, 'The uploaded file is no longer in memory. Please upload it again.'
+    return cube, None
+
+def parse_date(value):
+    # A date picker value ('2024-03-01' or '2024-03-01T00:00:00') without its time, None stays None
+    if not value:
+        return None
+    return datetime.strptime(value.split('T')[0], '%Y-%m-%d')
+
+def today_date():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+def date_ranges(start_date, end_date, today):
+    # The selected range, the same range a year earlier and the two weeks compared day by day. Without a date
+    # range the current and the previous year are shown
+    if start_date and end_date:
+        current_range = (start_date, end_date)
+        prev_range = (start_date.replace(year=start_date.year - 1), end_date.replace(year=start_date.year - 1))
+    else:
+        current_range = Dealer_Cube.year_range(today.year)
+        prev_range = Dealer_Cube.year_range(today.year - 1)
+
+    # The week of the start date (of today without one) and the same week 365 days earlier
+    week_day = start_date or today
+    start_of_the_week = week_day - timedelta(days=week_day.weekday())
+    end_of_the_week = start_of_the_week + timedelta(days=6)
+    prev_year_start_of_week = start_of_the_week - timedelta(days=365)
+    prev_year_end_of_the_week = end_of_the_week - timedelta(days=365)
+
+    return {
+        'current': current_range,
+        'previous': prev_range,
+        'current_week': Dealer_Cube.intersect(current_range, (start_of_the_week, end_of_the_week)),
+        'previous_week': Dealer_Cube.intersect(prev_range, (prev_year_start_of_week, prev_year_end_of_the_week)),
+    }
+
+def daily_bids(cube, date_range):
+    # [Date, Bids] of each day with bids, for the time series plots
+    return Dealer_Cube.daily_range(cube, date_range)[['Date', 'Bids']]
+
+def week_bids(cube, date_range):
+    # [Date (dd/mm/yyyy), Bids, Dealer Count, Day, Average Bids per Dealer] of each day with bids
+    agg_data = Dealer_Cube.daily_calendar(cube, date_range, ['Day'])
+    agg_data['Date'] = agg_data['Date'].dt.strftime('%d/%m/%Y')
+    agg_data['Average Bids per Dealer'] = (agg_data['Bids'] / agg_data['Dealer Count']).round(2)
+    return agg_data
+
+def same_week_yoy(cube, ranges):
+    # The selected week and the same week a year earlier
+    return week_bids(cube, ranges['current_week']), week_bids(cube, ranges['previous_week'])
+
+def yearly_averages(cube, today):
+    # [Year, Average Bids per Day], the current year divided by the days up to today
+    total_bids_per_year = Dealer_Cube.yearly_totals(cube)
+    avg_bids_per_day = total_bids_per_year.astype(float) / Date_Dimension.days_elapsed(total_bids_per_year.index, today)
+    avg_bids_per_day = avg_bids_per_day.astype(int)
+    return pd.DataFrame({
+        'Year': avg_bids_per_day.index,
+        'Average Bids per Day': avg_bids_per_day.values
+    })
+
+def weekly_averages(cube, year):
+    # [Week, Average Bids per Day, Start Date, End Date] of each week of the year with bids
+    # Daily totals of the year, a date is a single day of a single week
+    year_data = Dealer_Cube.daily_calendar(cube, Dealer_Cube.year_range(year), ['Week', 'Week Start', 'Day'])
+    bids_per_day_per_week = year_data.groupby(['Week', 'Week Start', 'Day'])['Bids'].sum().reset_index()
+    avg_bids_per_day_per_week = bids_per_day_per_week.groupby(['Week', 'Week Start'])['Bids'].mean().reset_index()
+
+    week_avg_bids_per_day_df = pd.DataFrame({
+        'Week': avg_bids_per_day_per_week['Week'],
+        'Average Bids per Day': avg_bids_per_day_per_week['Bids'].round(0)  # Round to 0 decimal places
+    })
+    week_avg_bids_per_day_df['Start Date'] = avg_bids_per_day_per_week['Week Start'].dt.strftime('%d/%m/%Y')
+    week_avg_bids_per_day_df['End Date'] = (avg_bids_per_day_per_week['Week Start'] + pd.Timedelta(days=6)).dt.strftime('%d/%m/%Y')
+    return week_avg_bids_per_day_df
+
+def analyse(data, start_date=None, end_date=None, today=None):
+    # Every table of the dealer page. data is a cube from upload_cube or a bid DataFrame
+    # [Date, Dealer Name, Bids] with parsed dates
+    cube = data if isinstance(data, dict) else Dealer_Cube.build_cube(data)
+    today = today or today_date()
+    ranges = date_ranges(start_date, end_date, today)
+    current_week, previous_week = same_week_yoy(cube, ranges)
+    return {
+        'today': today,
+        'current_daily': daily_bids(cube, ranges['current']),
+        'previous_daily': daily_bids(cube, ranges['previous']),
+        'current_week': current_week,
+        'previous_week': previous_week,
+        'yearly_averages': yearly_averages(cube, today),
+        'weekly_averages': weekly_averages(cube, today.year),
+    }
+
+def benchmark(sizes=(10000, 1000000, 10000000), repeat=10):
+    # Each computation of the dealer page at several upload sizes, after the one-off cube build
+    today = today_date()
+    ranges = date_ranges(datetime(today.year, 3, 1), datetime(today.year, 6, 30), today)
+    computations = {
+        'yearly averages': lambda cube: yearly_averages(cube, today),
+        'weekly averages': lambda cube: weekly_averages(cube, today.year),
+        'same-week YoY': lambda cube: same_week_yoy(cube, ranges),
+        'whole page': lambda cube: analyse(cube, *ranges['current'], today=today),
+    }
+
+    print(f"{'rows':>12} {'cube build':>12} " + ' '.join(f"{name:>16}" for name in computations))
+    for rows in sizes:
+        df = Dealer_Cube.synthetic_bids(rows)
+        start = time.perf_counter()
+        cube = Dealer_Cube.build_cube(df)
+        build = time.perf_counter() - start
+        timings = []
+        for compute in computations.values():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                compute(cube)
+            timings.append((time.perf_counter() - start) / repeat)
+        print(f"{rows:>12,} {build:>11.3f}s " + ' '.join(f"{seconds * 1000:>13.2f} ms" for seconds in timings))
+        del df, cube
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Dealer bid analysis shared by the dashboards")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
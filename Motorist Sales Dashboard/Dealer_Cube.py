@@ -0,0 +1,124 @@
+import pandas as pd
+import numpy as np
+import argparse
+import time
+import Date_Dimension
+
+# Daily aggregates of an uploaded bid sheet, built once per upload. The dashboards answer every date range,
+# same week last year and per year question from these instead of grouping the raw rows again:
+#   daily      - one row per date: total bids and the number of distinct dealers
+#   cumulative - running total of the daily bids, the yearly totals are differences of two entries
+#   calendar   - Date_Dimension.calendar_table of the dates, joined onto the daily rows on 'Date'
+# Ranges are (start, end) with both ends included, like the dashboards' date pickers.
+
+def build_cube(df):
+    dated = df[df['Date'].notna()]
+    bids = dated.groupby('Date')['Bids'].sum()
+    dealer_count = dated.groupby('Date')['Dealer Name'].nunique().reindex(bids.index, fill_value=0)
+
+    daily = pd.DataFrame({'Bids': bids, 'Dealer Count': dealer_count.astype('int64')})
+    return {
+        'dates': daily.index.values,
+        'daily': daily,
+        'cumulative': np.concatenate([[0], np.cumsum(daily['Bids'].to_numpy())]),
+        'calendar': Date_Dimension.calendar_table(daily.index),
+    }
+
+def cube_bytes(cube):
+    return int(sum(cube[part].memory_usage(deep=True).sum() for part in ('daily', 'calendar')))
+
+def year_range(year):
+    return pd.Timestamp(year, 1, 1), pd.Timestamp(year + 1, 1, 1) - pd.Timedelta(1, 'ns')
+
+def intersect(first, second):
+    return max(first[0], second[0]), min(first[1], second[1])
+
+def _positions(dates, date_range):
+    start, end = date_range
+    return dates.searchsorted(np.datetime64(start), 'left'), dates.searchsorted(np.datetime64(end), 'right')
+
+def daily_range(cube, date_range):
+    # [Date, Bids, Dealer Count] of the dates in the range that have bids
+    left, right = _positions(cube['dates'], date_range)
+    return cube['daily'].iloc[left:right].reset_index()
+
+def daily_calendar(cube, date_range, columns):
+    # daily_range with the calendar columns of each date
+    return Date_Dimension.add_calendar(daily_range(cube, date_range), cube['calendar'], columns)
+
+def yearly_totals(cube):
+    # Total bids of every year with bids, from the running total at the year boundaries
+    dates = cube['dates']
+    if len(dates) == 0:
+        return pd.Series(dtype=cube['daily']['Bids'].dtype, index=pd.Index([], name='Year'), name='Bids')
+    years = np.arange(pd.Timestamp(dates[0]).year, pd.Timestamp(dates[-1]).year + 2)
+    bounds = dates.searchsorted(pd.to_datetime([f'{year}-01-01' for year in years]).values)
+    totals = pd.Series(cube['cumulative'][bounds[1:]] - cube['cumulative'][bounds[:-1]],
+                       index=pd.Index(years[:-1], name='Year'), name='Bids')
+    return totals[bounds[1:] > bounds[:-1]]
+
+def synthetic_bids(rows, dealers=500, years=3, seed=0):
+    # A bid sheet like the dashboards receive, one row per dealer bid day
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(pd.Timestamp.now().year - years + 1, 1, 1)
+    days = rng.integers(0, 365 * years, rows)
+    names = np.array([f'Dealer {dealer}' for dealer in range(dealers)], dtype=object)
+    return pd.DataFrame({
+        'Date': start + pd.to_timedelta(days, unit='D'),
+        'Dealer Name': names[rng.integers(0, dealers, rows)],
+        'Bids': rng.integers(1, 20, rows),
+    })
+
+def benchmark(rows=5000000, repeat=5):
+    # One callback's aggregates from the raw rows, as show_main_content did, against slicing the cube
+    df = synthetic_bids(rows)
+    year = pd.Timestamp.now().year
+    current = (pd.Timestamp(year, 3, 1), pd.Timestamp(year, 6, 30))
+    previous = (current[0].replace(year=year - 1), current[1].replace(year=year - 1))
+    week = (pd.Timestamp(year, 3, 2), pd.Timestamp(year, 3, 8))
+    print(f"{rows:,} rows, {df['Dealer Name'].nunique()} dealers")
+
+    def from_rows():
+        current_data = df[(df['Date'] >= current[0]) & (df['Date'] <= current[1])]
+        previous_data = df[(df['Date'] >= previous[0]) & (df['Date'] <= previous[1])]
+        week_data = current_data[(current_data['Date'] >= week[0]) & (current_data['Date'] <= week[1])]
+        return (current_data.groupby('Date').agg({'Bids': 'sum'}).reset_index(),
+                previous_data.groupby('Date').agg({'Bids': 'sum'}).reset_index(),
+                week_data.groupby('Date').agg({'Bids': 'sum', 'Dealer Name': 'nunique'}).reset_index(),
+                df.groupby(df['Date'].dt.year)['Bids'].sum())
+
+    def from_cube(cube):
+        return (daily_range(cube, current)[['Date', 'Bids']],
+                daily_range(cube, previous)[['Date', 'Bids']],
+                daily_range(cube, intersect(current, week)),
+                yearly_totals(cube))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        expected = from_rows()
+    raw = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    cube = build_cube(df)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = from_cube(cube)
+    sliced = (time.perf_counter() - start) / repeat
+
+    same = all([
+        expected[0].equals(result[0]),
+        expected[1].equals(result[1]),
+        expected[2]['Bids'].tolist() == result[2]['Bids'].tolist(),
+        expected[2]['Dealer Name'].tolist() == result[2]['Dealer Count'].tolist(),
+        expected[3].tolist() == result[3].tolist(),
+    ])
+    print(f"Cube: {len(cube['daily']):,} days, {cube_bytes(cube) / 1e6:.2f} MB, built in {build:.2f}s")
+    print(f"Per callback: raw rows {raw * 1000:.1f} ms, cube {sliced * 1000:.2f} ms, same results: {same}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Daily aggregates of the Dealer bid uploads")
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
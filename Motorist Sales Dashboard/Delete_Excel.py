@@ -1,18 +1,19 @@
 import os
 import sys
+import Data_Store
 
-def delete_excel_files(file_paths):
-    for file_path in file_paths:
+def delete_artifacts(script_dir, names):
+    for name in names:
         try:
-            # Check if the file exists
-            if os.path.exists(file_path):
-                # Delete the file
-                os.remove(file_path)
-                print(f"Deleted file: {file_path}")
+            # Remove the artifact from whichever storage format it was written in
+            removed = Data_Store.delete(script_dir, name)
+            if removed:
+                for path in removed:
+                    print(f"Deleted file: {path}")
             else:
-                print(f"File not found: {file_path}")
+                print(f"File not found: {name}")
         except Exception as e:
-            print(f"Error deleting file {file_path}: {e}")
+            print(f"Error deleting file {name}: {e}")
 
 def main_delete():   
     if getattr(sys, 'frozen', False):
@@ -22,19 +23,23 @@ def main_delete():
         # When running as a script
         script_dir = os.path.dirname(os.path.abspath(__file__))
 
-    files_to_delete = [
-        os.path.join(script_dir, "consolidated_&_formatted_data (new).xlsx"),
-        os.path.join(script_dir, "formatted_sales_dashboard (new).xlsx"),
-        os.path.join(script_dir, "sales_dashboard (new).xlsx"),
-        os.path.join(script_dir, "consignment_data.xlsx"),
-        os.path.join(script_dir, "new_data.xlsx"),
-        os.path.join(script_dir, "quotation_data.xlsx"),
-        os.path.join(script_dir, "scrapexport_data.xlsx"),
-        os.path.join(script_dir, "sold_data.xlsx"),
-        os.path.join(script_dir, "void_data.xlsx")
+    artifacts_to_delete = [
+        "consolidated_&_formatted_data (new)",
+        "formatted_sales_dashboard (new)",
+        "sales_dashboard (new)",
     ]
+    if not Data_Store.ARCHIVE_RAW:
+        # Raw tables left by earlier runs, kept when they are being archived
+        artifacts_to_delete += [
+            "consignment_data",
+            "new_data",
+            "quotation_data",
+            "scrapexport_data",
+            "sold_data",
+            "void_data"
+        ]
     
-    delete_excel_files(files_to_delete)
+    delete_artifacts(script_dir, artifacts_to_delete)
 
 if __name__ == "__main__":
     main_delete()
@@ -0,0 +1,153 @@
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import threading
+import time
+import os
+import re
+import Run_Report
+
+# Root of the admin site (set MOTORIST_BASE_URL to point the scrapers at Mock_Admin_Server.py)
+BASE_URL = os.environ.get('MOTORIST_BASE_URL', 'https://www.motorist.sg')
+LOGIN_URL = f'{BASE_URL}/admin-login'
+ENQUIRY_URL = BASE_URL + '/enquiry/sales?cso_id=&filter={}&page={}&state_id='
+
+# Worker pool and retry limits, each can be overridden with an environment variable
+MAX_WORKERS = int(os.environ.get('FETCH_MAX_WORKERS', 8))  # Total number of pages fetched at the same time
+PER_HOST_LIMIT = int(os.environ.get('FETCH_PER_HOST_LIMIT', 4))  # Pages fetched at the same time from one host
+MAX_RETRIES = int(os.environ.get('FETCH_MAX_RETRIES', 3))  # Extra attempts for a page after a failed request
+RETRY_BACKOFF = float(os.environ.get('FETCH_RETRY_BACKOFF', 1.0))  # Seconds to wait before the first retry
+
+# Save every fetched page into this folder so Mock_Admin_Server.py can serve it back offline
+RECORD_DIR = os.environ.get('FETCH_RECORD_DIR')
+
+# Credentials for login
+EMAIL = 'limtzekang@motorist.sg'  # Replace with your actual email
+PASSWORD = '16062002'  # Replace with your actual password
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Status codes worth retrying, anything else is returned to the caller as is
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_host_locks = {}
+_host_locks_guard = threading.Lock()
+
+def set_base_url(base_url):
+    # Point every URL in this module at another host (used by the offline benchmark)
+    global BASE_URL, LOGIN_URL, ENQUIRY_URL
+    BASE_URL = base_url.rstrip('/')
+    LOGIN_URL = f'{BASE_URL}/admin-login'
+    ENQUIRY_URL = BASE_URL + '/enquiry/sales?cso_id=&filter={}&page={}&state_id='
+
+def enquiry_urls(filter_value, page_limit):
+    return [ENQUIRY_URL.format(filter_value, page) for page in range(1, page_limit + 1)]
+
+def _count_response(response, *args, **kwargs):
+    # Every request the session makes (logins, pages, redirects, form posts) goes into the run report
+    Run_Report.count('http requests')
+    Run_Report.count('http bytes', len(response.content))
+    if response.status_code >= 400:
+        Run_Report.count('http failures')
+
+def open_session(max_workers=None):
+    # Size the connection pool to the worker pool so concurrent pages reuse connections
+    max_workers = max_workers or MAX_WORKERS
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.hooks['response'].append(_count_response)
+    return session
+
+def login(session):
+    # Get the login page to extract the authenticity token and any required cookies
+    login_page_response = session.get(LOGIN_URL)
+
+    # Check if the request was successful
+    if login_page_response.status_code != 200:
+        print(f"Failed to retrieve the login page. Status code: {login_page_response.status_code}")
+        return False
+    print("Login page retrieved successfully.")
+
+    # Parse the login page HTML to find the authenticity token
+    login_page_soup = BeautifulSoup(login_page_response.content, 'html.parser')
+    authenticity_token = login_page_soup.find('input', {'name': 'authenticity_token'}).get('value')
+
+    payload = {
+        'user_admin[email]': EMAIL,
+        'user_admin[password]': PASSWORD,
+        'authenticity_token': authenticity_token  # Include the authenticity token
+    }
+
+    # Headers (some sites check the referer header)
+    headers = {
+        'User-Agent': USER_AGENT,
+        'Referer': LOGIN_URL,
+    }
+
+    # Post the login payload to the login URL
+    login_response = session.post(LOGIN_URL, data=payload, headers=headers)
+
+    # Check if login was successful
+    if login_response.status_code == 200 and "Logout" in login_response.text:
+        print("Login successful!")
+        return True
+
+    print("Login failed. Check your credentials and try again.")
+    return False
+
+def _host_lock(url):
+    host = urlsplit(url).netloc
+    with _host_locks_guard:
+        if host not in _host_locks:
+            _host_locks[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_locks[host]
+
+def recording_name(url):
+    # File name a page is recorded under, shared with Mock_Admin_Server.py
+    parts = urlsplit(url)
+    name = re.sub(r'[^A-Za-z0-9]+', '_', f"{parts.path}_{parts.query}").strip('_')
+    return f"{name}.html"
+
+def _record(url, response):
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    with open(os.path.join(RECORD_DIR, recording_name(url)), 'wb') as f:
+        f.write(response.content)
+
+def fetch_page(session, url, retries=None):
+    with Run_Report.step('page fetch'):
+        return _fetch_page(session, url, retries)
+
+def _fetch_page(session, url, retries=None):
+    retries = MAX_RETRIES if retries is None else retries
+    response = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            with _host_lock(url):
+                response = session.get(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {url} (attempt {attempt + 1}): {e}")
+            Run_Report.count('http failures')
+            continue
+        if response.status_code not in RETRY_STATUS_CODES:
+            break
+        print(f"Retrying {url}. Status code: {response.status_code}")
+
+    if response is not None and RECORD_DIR and response.status_code == 200:
+        _record(url, response)
+    return response
+
+def fetch_pages(session, urls, max_workers=None, retries=None):
+    # Fetch every URL through a bounded worker pool, responses come back in the same order as urls
+    # (None for a page that could not be fetched at all)
+    max_workers = max_workers or MAX_WORKERS
+    if len(urls) <= 1 or max_workers == 1:
+        return [fetch_page(session, url, retries) for url in urls]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(lambda url: fetch_page(session, url, retries), urls))
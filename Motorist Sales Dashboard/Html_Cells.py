@@ -0,0 +1,177 @@
+from bs4 import BeautifulSoup
+import pandas as pd
+import argparse
+import tempfile
+import shutil
+import html
+import time
+import re
+import os
+
+# Values the filters take out of the enquiry cells, which hold the HTML BeautifulSoup wrote for each <td> (see
+# Page_Parser.py). Each function works on a whole column with regular expressions and the pandas .str methods
+# instead of building a soup for every cell:
+#   links           - the first <a href> of the cell as a motorist.sg URL, '' without one or for tel:/mailto:
+#   first_line      - the text in front of the first <br/>, the name in the Agent and Buyer cells
+#   vehicle_columns - Plate, Model, Manufacturing_date, Details and Country from a <br/> separated Vehicle cell
+# Check them against the per cell BeautifulSoup versions with --verify, time both with --benchmark.
+
+SITE_URL = 'https://www.motorist.sg'
+VEHICLE_COLUMNS = ['Plate', 'Model', 'Manufacturing_date', 'Details', 'Country']
+
+COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+# BeautifulSoup writes attribute values in double quotes, in single quotes when the value holds a double quote
+HREF = re.compile(r'''<a\s(?:[^>]*?\s)?href="([^"]*)"|<a\s(?:[^>]*?\s)?href='([^']*)\'''')
+FIRST_LINE = re.compile(r'([^<>]*)<br\b[^>]*>')
+LINE_BREAK = re.compile(r'<br/?>|</br>')  # Every way a line break is written in the Vehicle cells of New
+
+def _text(cells):
+    # String column with missing cells kept missing, comments removed like BeautifulSoup does for find()
+    cells = cells.astype('str')
+    if cells.str.contains('<!--', regex=False).any():
+        cells = cells.str.replace(COMMENT, '', regex=True)
+    return cells
+
+def _unescape(values):
+    # Entities decoded like BeautifulSoup does, only on the values that have one
+    escaped = values.str.contains('&', regex=False).fillna(False).astype(bool)
+    if escaped.any():
+        values = values.copy()
+        values[escaped] = values[escaped].map(html.unescape)
+    return values
+
+def links(cells):
+    found = _text(cells).str.extract(HREF)
+    href = _unescape(found[0].fillna(found[1]))
+    keep = (href.notna() & ~href.str.startswith(('tel:', 'mailto:')).fillna(False)).astype(bool)
+    return (SITE_URL + href).where(keep, '')
+
+def first_line(cells):
+    return _unescape(_text(cells).str.extract(FIRST_LINE, expand=False)).str.strip()
+
+def vehicle_columns(cells, separator='<br/>'):
+    # DataFrame with a column for each part of VEHICLE_COLUMNS, missing parts are empty
+    parts = cells.str.split(separator, expand=True, regex=False)
+    parts = parts.reindex(columns=range(len(VEHICLE_COLUMNS)))
+    parts.columns = VEHICLE_COLUMNS
+    return parts
+
+def insert_vehicle_columns(data, parts, loc=2):
+    for offset, column in enumerate(VEHICLE_COLUMNS):
+        data.insert(loc=loc + offset, column=column, value=parts[column])
+
+def soup_link(cell):
+    # The per cell version links replaces
+    if pd.notnull(cell):
+        soup = BeautifulSoup(cell, 'html.parser')
+        a_tag = soup.find('a', href=True)
+        if a_tag and not a_tag['href'].startswith(('tel:', 'mailto:')):
+            return f'{SITE_URL}{a_tag["href"]}'
+    return ''
+
+def soup_first_line(cell):
+    # The per cell version first_line replaces
+    return BeautifulSoup(cell, 'html.parser').find('br').previous_sibling.strip()
+
+def scraped_tables(data_dir=None):
+    # Raw tables of the six enquiry scrapers: the copies in data_dir written with DASHBOARD_ARCHIVE_RAW, or a
+    # scrape of Mock_Admin_Server.py
+    import Data_Store
+    names = ["new_data", "scrapexport_data", "quotation_data", "consignment_data", "sold_data", "void_data"]
+    if data_dir is not None:
+        try:
+            return {name: Data_Store.read_tables(data_dir, name) for name in names}
+        except FileNotFoundError:
+            print(f"No raw tables in {data_dir}, scraping Mock_Admin_Server.py instead")
+
+    import contextlib
+    import io
+    import Mock_Admin_Server
+    import Fetch_Pages
+    import Session_Manager
+    import New, ScrapExport, Quotation, Consignment, Sold, Void
+    server, base_url = Mock_Admin_Server.start_server(latency=0)
+    Fetch_Pages.set_base_url(base_url)
+    output_dir = tempfile.mkdtemp()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return {
+                "new_data": New.scrape(1, output_dir),
+                "scrapexport_data": ScrapExport.scrape(2, output_dir),
+                "quotation_data": Quotation.scrape_quotation(output_dir),
+                "consignment_data": Consignment.scrape_consignment(output_dir),
+                "sold_data": {'Sheet1': Sold.scrape(output_dir)},
+                "void_data": {'Sheet1': Void.scrape(output_dir)},
+            }
+    finally:
+        Session_Manager.close_session()
+        server.shutdown()
+        shutil.rmtree(output_dir)
+
+def extractions(tables):
+    # (table, sheet, column, vectorised function, per cell function) for every column the filters extract from
+    for name, sheets in tables.items():
+        for sheet, df in sheets.items():
+            if df.empty:
+                continue
+            yield name, sheet, 'Link', links, lambda cells: cells.apply(soup_link)
+            for column in ('Agent', 'Buyer'):
+                if column in df.columns:
+                    yield name, sheet, column, first_line, lambda cells: cells.apply(soup_first_line)
+            if 'Vehicle' in df.columns:
+                yield name, sheet, 'Vehicle', vehicle_columns, \
+                    lambda cells: pd.DataFrame([cell.split('<br/>')[:5] for cell in cells], columns=VEHICLE_COLUMNS)
+
+def _cells(df, column):
+    # The Link column is extracted from the last column of the scraped table
+    return df.iloc[:, -1] if column == 'Link' else df[column]
+
+def _same(new, old):
+    if isinstance(new, pd.DataFrame):
+        return all(_same(new[column], old[column]) for column in new.columns)
+    return new.fillna('').astype(object).tolist() == old.fillna('').astype(object).tolist()
+
+def verify(tables):
+    all_same = True
+    print(f"{'table':<18} {'sheet':<18} {'column':<8} {'rows':>6}  same")
+    for name, sheet, column, vectorised, per_cell in extractions(tables):
+        cells = _cells(tables[name][sheet], column)
+        same = _same(vectorised(cells).reset_index(drop=True), per_cell(cells).reset_index(drop=True))
+        all_same = all_same and same
+        print(f"{name:<18} {sheet:<18} {column:<8} {len(cells):>6}  {same}")
+    return all_same
+
+def benchmark(tables, rows=100000, repeat=3):
+    # Every extraction on the cells of the scraped tables repeated up to rows cells
+    print(f"{'column':<8} {'rows':>9} {'per cell':>12} {'vectorised':>12}")
+    done = set()
+    for name, sheet, column, vectorised, per_cell in extractions(tables):
+        if column in done:
+            continue
+        done.add(column)
+        cells = _cells(tables[name][sheet], column)
+        cells = pd.concat([cells] * (rows // len(cells) + 1), ignore_index=True)[:rows]
+        timings = []
+        for function in (per_cell, vectorised):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                function(cells)
+            timings.append((time.perf_counter() - start) / repeat)
+        print(f"{column:<8} {rows:>9,} {timings[0] * 1000:>9.1f} ms {timings[1] * 1000:>9.1f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Vectorised extraction of the enquiry cells")
+    parser.add_argument('--data-dir', help="Folder with raw tables written with DASHBOARD_ARCHIVE_RAW")
+    parser.add_argument('--verify', action='store_true', help="Compare with the per cell BeautifulSoup versions")
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tables = scraped_tables(args.data_dir)
+    same = True
+    if args.verify or not args.benchmark:
+        same = verify(tables)
+    if args.benchmark:
+        benchmark(tables, args.rows, args.repeat)
+    raise SystemExit(0 if same else 1)
@@ -0,0 +1,282 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, unquote
+import pandas as pd
+import requests
+import argparse
+import threading
+import tracemalloc
+import zipfile
+import shutil
+import json
+import time
+import os
+import sys
+
+# The DataMall archives only change monthly. Each archive is kept in a local cache together with its ETag and
+# Last-Modified headers, later launches only ask the site whether it changed (a conditional GET) and use the
+# cached copy when it did not or when the site can not be reached.
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+LTA_BASE_URL = os.environ.get('LTA_BASE_URL', 'https://datamall.lta.gov.sg').rstrip('/')
+LTA_PATHS = [
+    "/content/dam/datamall/datasets/Facts_Figures/Vehicle%20Registration/Monthly%20New%20Registration%20of%20Motor%20Vehicles%20by%20Vehicle%20Quota%20Categories.zip",
+    "/content/dam/datamall/datasets/Facts_Figures/Vehicle%20Registration/Monthly%20De-Registered%20Motor%20Vehicles%20under%20Vehicle%20Quota%20System%20(VQS).zip",
+    "/content/dam/datamall/datasets/Facts_Figures/Vehicle%20Population/Monthly%20Motor%20Vehicle%20Population%20by%20Vehicle%20Type.zip",
+    "/content/dam/datamall/datasets/Facts_Figures/Vehicle%20Ownership%20n%20Transfer/Monthly%20Type%20and%20Number%20of%20Vehicles%20Transferred.zip",
+    "/content/dam/datamall/datasets/Facts_Figures/Vehicle%20Registration/Monthly%20Revalidation%20of%20COE%20of%20Existing%20Vehicles.zip"
+]
+
+CACHE_DIR = os.environ.get('LTA_CACHE_DIR', os.path.join(script_dir, "lta_cache"))
+TIMEOUT = int(os.environ.get('LTA_TIMEOUT', 60))
+INDEX_FILE = "index.json"
+CHUNK_SIZE = 1024 * 1024
+
+# Columns of the DataMall CSVs. Text columns are read as categoricals, counts as integers, and the month is
+# parsed with its fixed format instead of letting pandas guess it row by row
+MONTH_COLUMN = 'month'
+MONTH_FORMAT = '%Y-%m'
+LTA_SCHEMAS = {
+    "M02-New_Reg_by_Quota.csv": {'category': 'category', 'number': 'int64'},
+    "M05-Dereg_by_Quota.csv": {'category': 'category', 'number': 'int64'},
+    "M06-Vehs_by_Type.csv": {'vehicle_type': 'category', 'number': 'int64'},
+    "M07-Trf_by_type.csv": {'type': 'category', 'numbers': 'int64'},
+    "M10-Monthly_COE_Revalidation.csv": {'type': 'category', 'category': 'category', 'number': 'int64'},
+}
+
+# Measure the peak traced memory of downloading and reading each archive. tracemalloc counts the whole
+# process, so the archives are then ingested one at a time instead of concurrently, and more slowly
+MEASURE_PEAK = os.environ.get('LTA_MEASURE_PEAK', '').lower() in ('1', 'true', 'yes')
+
+# csv name -> {'archive', 'downloaded_at', 'seconds', 'bytes', 'rows', 'table_bytes', 'peak_bytes'} of the last
+# load_tables. 'table_bytes' is the size of the DataFrame kept, 'peak_bytes' the most memory traced while its
+# archive was downloaded and read (the zip buffers and parsing included), None unless the peak is measured
+ingest_stats = {}
+
+_index_lock = threading.Lock()
+
+def set_base_url(base_url):
+    global LTA_BASE_URL
+    LTA_BASE_URL = base_url.rstrip('/')
+
+def lta_urls():
+    return [LTA_BASE_URL + path for path in LTA_PATHS]
+
+def cache_name(url):
+    # Archives are cached under the file name they have on the site
+    return unquote(os.path.basename(urlsplit(url).path))
+
+def _load_index(cache_dir):
+    # url -> {file, etag, last_modified, downloaded_at, files, extracted}
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_index(cache_dir, index):
+    temp_file = os.path.join(cache_dir, f".{INDEX_FILE}.tmp")
+    with open(temp_file, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(temp_file, os.path.join(cache_dir, INDEX_FILE))
+
+def fetch_archive(session, url, cache_dir, entry=None):
+    # Return (cache entry, True if a new version was downloaded), the entry is None if there is nothing to use
+    cached = entry is not None and os.path.exists(os.path.join(cache_dir, entry['file']))
+    headers = {}
+    if cached:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        with session.get(url, headers=headers, timeout=TIMEOUT, stream=True) as response:
+            if response.status_code == 304 and cached:
+                print(f"Not modified, using cached {entry['file']}")
+                return entry, False
+            response.raise_for_status()
+
+            # Written in chunks so the whole archive is never held in memory
+            file_name = cache_name(url)
+            temp_path = os.path.join(cache_dir, f".{file_name}.tmp")
+            with open(temp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+
+        # Check the archive before it replaces the cached one
+        with zipfile.ZipFile(temp_path) as z:
+            z.namelist()
+        os.replace(temp_path, os.path.join(cache_dir, file_name))
+        print(f"Downloaded {url}")
+
+        return {
+            'file': file_name,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'downloaded_at': time.time(),
+        }, True
+    except (requests.exceptions.RequestException, zipfile.BadZipFile) as e:
+        if cached:
+            print(f"Error downloading {url}: {e}, using cached {entry['file']}")
+            return entry, False
+        print(f"Error downloading {url}: {e}")
+        return None, False
+
+def extract_archive(archive_path, dest_folder):
+    # Every file of the archive goes straight into dest_folder, folders inside the archive are dropped
+    extracted = []
+    with zipfile.ZipFile(archive_path) as z:
+        for member in z.infolist():
+            if member.is_dir():
+                continue
+            file_name = os.path.basename(member.filename)
+            temp_path = os.path.join(dest_folder, f".{file_name}.tmp")
+            with z.open(member) as source, open(temp_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(temp_path, os.path.join(dest_folder, file_name))
+            extracted.append(file_name)
+    return extracted
+
+def read_csv_member(z, member):
+    # Parse one CSV of an open archive straight from its decompressing stream
+    schema = LTA_SCHEMAS.get(os.path.basename(member.filename), {})
+    dtypes = {MONTH_COLUMN: 'str', **schema}
+    try:
+        with z.open(member) as f:
+            df = pd.read_csv(f, dtype=dtypes)
+    except ValueError as e:
+        # A count that is not a whole number (a blank or a '-'), read the counts as text and coerce them
+        print(f"Unexpected value in {member.filename}: {e}")
+        counts = [column for column, dtype in schema.items() if dtype != 'category']
+        with z.open(member) as f:
+            df = pd.read_csv(f, dtype={**dtypes, **{column: 'str' for column in counts}})
+        for column in counts:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    if MONTH_COLUMN in df.columns:
+        df[MONTH_COLUMN] = pd.to_datetime(df[MONTH_COLUMN], format=MONTH_FORMAT, errors='coerce')
+    return df
+
+def read_archive(archive):
+    # Every CSV of an archive (a path or a file object) as a typed DataFrame, nothing is extracted to disk
+    tables = {}
+    with zipfile.ZipFile(archive) as z:
+        for member in z.infolist():
+            if not member.is_dir() and member.filename.lower().endswith('.csv'):
+                tables[os.path.basename(member.filename)] = read_csv_member(z, member)
+    return tables
+
+def load_tables(urls=None, cache_dir=None, measure_peak=None):
+    # Revalidate and parse the five archives concurrently, return {csv name: DataFrame}
+    urls = urls or lta_urls()
+    cache_dir = cache_dir or CACHE_DIR
+    measure_peak = MEASURE_PEAK if measure_peak is None else measure_peak
+    os.makedirs(cache_dir, exist_ok=True)
+
+    def ingest(session, url, entry):
+        start = time.perf_counter()
+        entry, changed = fetch_archive(session, url, cache_dir, entry)
+        if entry is None:
+            return None, {}, 0, None
+        tables = read_archive(os.path.join(cache_dir, entry['file']))
+        return entry, tables, time.perf_counter() - start, None
+
+    def ingest_traced(session, url, entry):
+        # ingest with the peak traced memory above what was traced before it
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            entry, tables, seconds, _ = ingest(session, url, entry)
+            return entry, tables, seconds, tracemalloc.get_traced_memory()[1] - before
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+    with _index_lock:
+        index = _load_index(cache_dir)
+        with requests.Session() as session:
+            if measure_peak:
+                results = [ingest_traced(session, url, index.get(url)) for url in urls]
+            else:
+                with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+                    results = list(executor.map(lambda url: ingest(session, url, index.get(url)), urls))
+
+        all_tables = {}
+        ingest_stats.clear()
+        for url, (entry, tables, seconds, peak_bytes) in zip(urls, results):
+            if entry is None:
+                continue
+            index[url] = entry
+            archive_bytes = os.path.getsize(os.path.join(cache_dir, entry['file']))
+            for file_name, df in tables.items():
+                all_tables[file_name] = df
+                ingest_stats[file_name] = {
+                    'archive': entry['file'],
+                    'downloaded_at': entry['downloaded_at'],
+                    'seconds': seconds,
+                    'bytes': archive_bytes,
+                    'rows': len(df),
+                    'table_bytes': int(df.memory_usage(deep=True).sum()),
+                    'peak_bytes': peak_bytes,
+                }
+                peak = f", {peak_bytes / 1e6:.2f} MB peak" if peak_bytes is not None else ""
+                print(f"Loaded {file_name}: {len(df)} rows, {ingest_stats[file_name]['table_bytes'] / 1e6:.2f} MB in memory{peak}, {seconds:.3f}s")
+
+        _save_index(cache_dir, index)
+    return all_tables
+
+def update_datasets(dest_dir, urls=None, cache_dir=None):
+    # Make sure dest_dir holds the files of the current version of every archive, return their paths
+    urls = urls or lta_urls()
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with _index_lock:
+        index = _load_index(cache_dir)
+
+        # Revalidate all archives at once
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            results = list(executor.map(lambda url: fetch_archive(session, url, cache_dir, index.get(url)), urls))
+
+        data_files = []
+        for url, (entry, changed) in zip(urls, results):
+            if entry is None:
+                continue
+            if changed:
+                entry['extracted'] = {}
+            index[url] = entry
+
+            # Extract again only for a new version or when a file is missing from dest_dir
+            files = entry.get('files') or []
+            extracted = entry.setdefault('extracted', {})
+            missing = not files or any(not os.path.exists(os.path.join(dest_dir, f)) for f in files)
+            if extracted.get(dest_dir) != entry['downloaded_at'] or missing:
+                entry['files'] = extract_archive(os.path.join(cache_dir, entry['file']), dest_dir)
+                extracted[dest_dir] = entry['downloaded_at']
+                print(f"Extracted {', '.join(entry['files'])} to {dest_dir}")
+            data_files.extend(os.path.join(dest_dir, f) for f in entry['files'])
+
+        _save_index(cache_dir, index)
+    return data_files
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bring the LTA DataMall data up to date")
+    parser.add_argument('--extract', action='store_true', help="Extract the CSV files into the working directory")
+    parser.add_argument('--peak-memory', action='store_true', help="Measure the peak memory of each archive, one at a time")
+    args = parser.parse_args()
+
+    if args.extract:
+        for path in update_datasets(os.getcwd()):
+            print(path)
+    else:
+        for file_name, df in load_tables(measure_peak=args.peak_memory or None).items():
+            print(file_name)
+            print(df.dtypes.to_string())
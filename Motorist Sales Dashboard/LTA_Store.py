@@ -0,0 +1,176 @@
+import pandas as pd
+import threading
+import argparse
+import time
+import os
+import LTA_Downloads
+
+# The LTA tables kept in memory for the dashboard callbacks. Each dataset is indexed by (dataset, year, month,
+# category) and the monthly totals the callbacks plot are computed once per load, so a callback only slices.
+# A refresh builds a complete new store and swaps it in, a callback always sees one version of the data.
+
+REFRESH_HOURS = float(os.environ.get('LTA_REFRESH_HOURS', 12))
+
+# Column that categorises each dataset and the column with its counts
+CATEGORY_COLUMNS = ['category', 'vehicle_type', 'type']
+VALUE_COLUMNS = ['number', 'numbers']
+
+_store = None
+_store_lock = threading.Lock()
+_refresh_thread = None
+
+def _columns(df):
+    category = next((c for c in CATEGORY_COLUMNS if c in df.columns), None)
+    value = next((c for c in VALUE_COLUMNS if c in df.columns), None)
+    return category, value
+
+def _monthly_totals(rows, value_column):
+    # rows indexed by (year, month, category) -> {year: [month, value column]}, None holds the empty frame
+    totals = rows.groupby(level=['year', 'month']).sum()
+    years = totals.index.get_level_values('year')
+    months = pd.to_datetime(pd.DataFrame({'year': years, 'month': totals.index.get_level_values('month'), 'day': 1}))
+    frame = pd.DataFrame({'month': months.values, value_column: totals.values})
+    by_year = {year: part.reset_index(drop=True) for year, part in frame.groupby(years.values)}
+    by_year[None] = frame.iloc[:0]
+    return by_year
+
+def build_store(tables, selections=()):
+    # tables: {dataset: DataFrame from LTA_Downloads}, selections: (dataset, categories) totals to precompute
+    frames = []
+    value_columns = {}
+    for dataset, df in tables.items():
+        category, value = _columns(df)
+        if value is None or LTA_Downloads.MONTH_COLUMN not in df.columns:
+            continue
+        value_columns[dataset] = value
+        months = df[LTA_Downloads.MONTH_COLUMN]
+        frames.append(pd.DataFrame({
+            'dataset': dataset,
+            'year': months.dt.year,
+            'month': months.dt.month,
+            'category': df[category].astype(str) if category else '',
+            'value': pd.to_numeric(df[value], errors='coerce'),
+        }).dropna(subset=['year']))
+
+    if frames:
+        rows = pd.concat(frames, ignore_index=True)
+        rows['year'] = rows['year'].astype(int)
+        rows['month'] = rows['month'].astype(int)
+        index = rows.groupby(['dataset', 'year', 'month', 'category'])['value'].sum().sort_index()
+    else:
+        index = pd.Series(dtype='float64', index=pd.MultiIndex.from_tuples([], names=['dataset', 'year', 'month', 'category']))
+
+    store = {
+        'index': index,
+        'value_columns': value_columns,
+        'totals': {},
+        'versions': {name: stats.get('downloaded_at') for name, stats in LTA_Downloads.ingest_stats.items()},
+        'loaded_at': time.time(),
+    }
+    for dataset in value_columns:
+        _totals(store, dataset, None)
+    for dataset, categories in selections:
+        if dataset in value_columns:
+            _totals(store, dataset, categories)
+    return store
+
+def _totals(store, dataset, categories):
+    key = (dataset, tuple(categories) if categories else None)
+    totals = store['totals'].get(key)
+    if totals is None:
+        rows = store['index'].xs(dataset, level='dataset')
+        if categories:
+            rows = rows[rows.index.get_level_values('category').isin(categories)]
+        totals = _monthly_totals(rows, store['value_columns'][dataset])
+        store['totals'][key] = totals
+    return totals
+
+def refresh(tables, selections=()):
+    # Build the new version completely before it replaces the current one
+    global _store
+    previous = current()
+    if previous is not None:
+        # Keep the totals the callbacks asked for since the last load
+        selections = list(selections) + [key for key in previous['totals'] if key[1]]
+    store = build_store(tables, selections)
+    with _store_lock:
+        _store = store
+    print(f"LTA store loaded: {len(store['index'])} rows for {len(store['value_columns'])} datasets")
+    return store
+
+def current():
+    with _store_lock:
+        return _store
+
+def monthly_totals(dataset, year, categories=None):
+    # [month, value column] for one year, None if the dataset is not loaded
+    store = current()
+    if store is None or dataset not in store['value_columns']:
+        return None
+    totals = _totals(store, dataset, categories)
+    return totals.get(year, totals[None]).copy()
+
+def start_refresh(selections=(), hours=None):
+    # Revalidate the archives in the background, the store is only rebuilt when one of them changed
+    global _refresh_thread
+    interval = (hours if hours is not None else REFRESH_HOURS) * 3600
+    if _refresh_thread is not None or interval <= 0:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                tables = LTA_Downloads.load_tables()
+                versions = {name: stats.get('downloaded_at') for name, stats in LTA_Downloads.ingest_stats.items()}
+                if tables and versions != current()['versions']:
+                    refresh(tables, selections)
+            except Exception as e:
+                print(f"Error refreshing the LTA data: {e}")
+
+    _refresh_thread = threading.Thread(target=run, daemon=True)
+    _refresh_thread.start()
+
+def benchmark(year, repeat=100):
+    # One dropdown change the previous way (copy, regex clean, parse, filter and group the whole dataset)
+    # against slicing the store
+    tables = LTA_Downloads.load_tables()
+    refresh(tables)
+
+    def previous(dataset, categories):
+        df = tables[dataset].copy()
+        value = _columns(df)[1]
+        if categories:
+            df = df[df['category'].isin(categories)]
+        df['month'] = pd.to_datetime(df['month'].astype(str).str.replace('Week ', '', regex=False), errors='coerce')
+        df[value] = pd.to_numeric(df[value].replace({r'[\$,]': '', r'[\%]': ''}, regex=True), errors='coerce')
+        df = df[df['month'].dt.year == year]
+        return df.groupby('month').agg({value: 'sum'}).reset_index()
+
+    for dataset in current()['value_columns']:
+        quota = ('Category A', 'Category B') if 'category' in tables[dataset].columns else None
+        for categories in dict.fromkeys((None, quota)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                old = previous(dataset, categories)
+            old_time = (time.perf_counter() - start) / repeat
+            start = time.perf_counter()
+            for _ in range(repeat):
+                new = monthly_totals(dataset, year, categories)
+            new_time = (time.perf_counter() - start) / repeat
+            same = old[old.columns[1]].tolist() == new[new.columns[1]].tolist() and \
+                old['month'].tolist() == new['month'].tolist()
+            label = f"{dataset} {'A+B' if categories else 'all'}"
+            print(f"{label:<38} {len(new):>3} months: previous {old_time * 1000:7.2f} ms, store {new_time * 1000:6.3f} ms, same: {same}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="In-memory LTA tables for the dashboards")
+    parser.add_argument('--benchmark', action='store_true', help="Time one dropdown change, previous way and from the store")
+    parser.add_argument('--year', type=int, default=time.localtime().tm_year)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.year, args.repeat)
+    else:
+        refresh(LTA_Downloads.load_tables())
@@ -0,0 +1,233 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from http.cookies import SimpleCookie
+import argparse
+import threading
+import random
+import time
+import os
+import sys
+import Fetch_Pages
+
+# Local stand-in for the admin site. Pages recorded with FETCH_RECORD_DIR are served back as they were,
+# anything that was not recorded is generated with the same layout as the real enquiry pages.
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_RECORD_DIR = os.path.join(script_dir, "recorded_pages")
+
+LOGIN_PAGE = '''<html><body>
+<form action="/admin-login" method="post">
+<input type="hidden" name="authenticity_token" value="offline-token">
+<input type="email" id="user_admin_email" name="user_admin[email]">
+<input type="password" id="user_admin_password" name="user_admin[password]">
+<input type="submit" class="btn btn-success" value="Login">
+</form>
+</body></html>'''
+
+LOGGED_IN_PAGE = '<html><body><a href="/admin-logout">Logout</a></body></html>'
+
+# Tables shown on each enquiry filter, with the raw column headers of the admin site
+ENQUIRY_TABLES = {
+    '1': {
+        "New": ["Seller", "Vehicle", "Created Date", "Action"],
+        "Followup": ["Seller", "Vehicle", "Follow-Up Date", "Action"],
+    },
+    '2': {
+        "Active New": ["Seller", "Vehicle", "No of Offers", "Highest Offer", "Closing Date", "Action"],
+        "Active Requote": ["Seller", "Vehicle", "No of Offers", "Highest Offer", "Closing Date", "Action"],
+        "Followup": ["Seller", "Vehicle", "No of Offers", "Highest Offer", "Follow-Up Date", "Action"],
+        "Pending Agreement": ["Seller", "Vehicle", "No of Offers", "Highest Offer", "Follow-Up Date", "Action"],
+        "Appointment": ["Seller", "Vehicle", "No of Offers", "Highest Offer", "Appointment Date", "Action"],
+    },
+    '4': {
+        "New": ["Seller", "Vehicle", "Agent", "Created Date", "Action"],
+        "Followup": ["Seller", "Vehicle", "Agent", "Follow-Up Date", "Action"],
+        "Appointment": ["Seller", "Vehicle", "Agent", "Appointment Date", "Action"],
+        "Consigned": ["Seller", "Vehicle", "Price", "Stats", "Duration", "Agent", "Action"],
+    },
+    '5': {
+        "Sold": ["Sold Date", "Vehicle", "Price", "Seller", "Buyer", "Action"],
+    },
+    '6': {
+        "Void": ["Void Date", "Vehicle", "Seller", "Buyer", "Valid", "Action"],
+    },
+}
+ENQUIRY_TABLES['3'] = ENQUIRY_TABLES['2']
+
+def _cell(header, rng, row_id):
+    if header == "Seller":
+        return f"Seller {row_id}<br>9{rng.randint(1000000, 9999999)}<br>"
+    if header == "Vehicle":
+        return (f"SG{rng.choice('ABCDEFGHJKLMZ')}{rng.randint(1000, 9999)}{rng.choice('ABCDEHJKLMPRSTXYZ')}<br>"
+                f"{rng.choice(['Toyota Corolla', 'Honda Vezel', 'Mazda 3', 'BMW 320i'])}<br>"
+                f"{rng.randint(2010, 2023)}-{rng.randint(1, 12):02d}<br>Auto<br>Singapore")
+    if header in ("Agent", "Buyer"):
+        return f"{rng.choice(['Alex', 'Ben', 'Chloe', 'Dave'])} Motors<br>6{rng.randint(1000000, 9999999)}"
+    if header == "No of Offers":
+        return str(rng.randint(0, 30))
+    if header in ("Highest Offer", "Price"):
+        return f"${rng.randint(5000, 150000):,}"
+    if header.endswith("Date"):
+        return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+    if header == "Action":
+        return f'<a href="/enquiry/{row_id}">View</a> <a href="tel:9{row_id}">Call</a>'
+    return rng.choice(["Yes", "No", "Active", "30 days"])
+
+def enquiry_page(filter_value, page, rows_per_table=50):
+    # Build a page with the same h2 + table layout as the admin site, seeded so it is identical every time
+    rng = random.Random(f"{filter_value}-{page}")
+    parts = ['<html><body><a href="/admin-logout">Logout</a>']
+    for title, headers in ENQUIRY_TABLES.get(filter_value, {}).items():
+        parts.append(f'<h2>{title}</h2><table><tr>' + ''.join(f'<th>{h}</th>' for h in headers) + '</tr>')
+        for i in range(rows_per_table):
+            row_id = int(page) * 1000 + i
+            parts.append('<tr>' + ''.join(f'<td>{_cell(h, rng, row_id)}</td>' for h in headers) + '</tr>')
+        parts.append('</table>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+# Rows and columns of the weekly sales report behind the 'generatebutton2' button
+REPORT_CATEGORIES = [
+    "New", "Active", "Follow-up", "Appt Set", "Conversion", "Consigned", "Loan Submission",
+    "Appt Today", "Sold", "Conversion", "Revenue", "Void", "Void Sold", "Revert"
+]
+REPORT_COLUMNS = [
+    "New", "Scrap", "Quotation", "Consignment", "Sales", "Coe Renewal", "Loan Paperwork",
+    "Consignment Purchase", "Dealer Purchase", "Floor", "Purchases", "Insurances", "Total"
+]
+
+def review_page(query):
+    # Report page before the Generate button is clicked, the button submits a plain form
+    fields = ''.join(f'<input type="hidden" name="{name}" value="{values[0]}">' for name, values in query.items())
+    return ('<html><body><a href="/admin-logout">Logout</a>'
+            f'<form action="/review/sales/generate" method="get">{fields}'
+            '<button id="generatebutton2" type="submit">Generate</button></form></body></html>')
+
+def report_page(query):
+    rng = random.Random(query.get('start', [''])[0])
+    head = ''.join(f'<th><div class="th-inner">{column}</div></th>' for column in [""] + REPORT_COLUMNS)
+    rows = []
+    for category in REPORT_CATEGORIES:
+        if category == "Revenue":
+            values = [f"${rng.randint(0, 50000):,}" for _ in REPORT_COLUMNS]
+        elif category == "Conversion":
+            values = [f"{rng.randint(0, 100)}%" for _ in REPORT_COLUMNS]
+        else:
+            values = [str(rng.randint(0, 200)) for _ in REPORT_COLUMNS]
+        rows.append('<tr>' + ''.join(f'<td>{value}</td>' for value in [category] + values) + '</tr>')
+    return ('<html><body><a href="/admin-logout">Logout</a>'
+            '<table class="table table-striped table-condensed table-fixed-column table-no-bordered">'
+            f'<thead><tr>{head}</tr></thead><tbody>{"".join(rows)}</tbody></table></body></html>')
+
+def make_handler(record_dir, latency):
+    class AdminHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, body, status=200, cookie=None):
+            content = body if isinstance(body, bytes) else body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(content)))
+            if cookie:
+                self.send_header('Set-Cookie', f'_session_id={cookie}; Path=/')
+            self.end_headers()
+            self.wfile.write(content)
+
+        def _logged_in(self):
+            cookies = SimpleCookie(self.headers.get('Cookie', ''))
+            return '_session_id' in cookies and cookies['_session_id'].value in self.server.valid_sessions
+
+        def _redirect_to_login(self):
+            self.send_response(302)
+            self.send_header('Location', '/admin-login')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_GET(self):
+            # Emulate the time the real site spends generating a page
+            time.sleep(latency)
+            parts = urlsplit(self.path)
+            if parts.path == '/admin-login':
+                return self._send(LOGIN_PAGE)
+            if not self._logged_in():
+                return self._redirect_to_login()
+
+            recorded = os.path.join(record_dir, Fetch_Pages.recording_name(self.path))
+            if os.path.exists(recorded):
+                with open(recorded, 'rb') as f:
+                    return self._send(f.read())
+
+            if parts.path == '/enquiry/sales':
+                query = parse_qs(parts.query)
+                return self._send(enquiry_page(query.get('filter', [''])[0], query.get('page', ['1'])[0]))
+            if parts.path == '/review/sales':
+                return self._send(review_page(parse_qs(parts.query, keep_blank_values=True)))
+            if parts.path == '/review/sales/generate':
+                return self._send(report_page(parse_qs(parts.query, keep_blank_values=True)))
+            return self._send('Not Found', status=404)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            if urlsplit(self.path).path == '/admin-login':
+                session_id = f"offline-{time.monotonic_ns()}"
+                self.server.valid_sessions.add(session_id)
+                return self._send(LOGGED_IN_PAGE, cookie=session_id)
+            return self._send('Not Found', status=404)
+
+    return AdminHandler
+
+def start_server(port=0, record_dir=DEFAULT_RECORD_DIR, latency=0.2):
+    # Start the stand-in on a background thread and return it together with its base URL
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(record_dir, latency))
+    server.valid_sessions = set()  # Clear this to log every client out
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def benchmark(filters=('1', '2', '3', '4', '5', '6'), page_limit=3, latency=0.2, record_dir=DEFAULT_RECORD_DIR):
+    server, base_url = start_server(record_dir=record_dir, latency=latency)
+    Fetch_Pages.set_base_url(base_url)
+    urls = [url for filter_value in filters for url in Fetch_Pages.enquiry_urls(filter_value, page_limit)]
+    print(f"Benchmarking {len(urls)} pages against {base_url} with {latency}s latency per request")
+
+    try:
+        for label, max_workers in (("Sequential", 1), ("Concurrent", Fetch_Pages.MAX_WORKERS)):
+            with Fetch_Pages.open_session(max_workers) as session:
+                Fetch_Pages.login(session)
+                start = time.perf_counter()
+                responses = Fetch_Pages.fetch_pages(session, urls, max_workers=max_workers)
+                elapsed = time.perf_counter() - start
+            fetched = sum(1 for response in responses if response is not None and response.status_code == 200)
+            print(f"{label}: {fetched}/{len(urls)} pages in {elapsed:.2f}s (max_workers={max_workers}, per_host_limit={Fetch_Pages.PER_HOST_LIMIT})")
+    finally:
+        server.shutdown()
+
+def main_mock_admin_server():
+    parser = argparse.ArgumentParser(description="Serve recorded admin pages locally")
+    parser.add_argument('--port', type=int, default=8060)
+    parser.add_argument('--record-dir', default=DEFAULT_RECORD_DIR)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds added to every request")
+    parser.add_argument('--benchmark', action='store_true', help="Compare sequential and concurrent page fetching")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(latency=args.latency, record_dir=args.record_dir)
+        return
+
+    server, base_url = start_server(args.port, args.record_dir, args.latency)
+    print(f"Serving admin pages on {base_url}, run the scrapers with MOTORIST_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main_mock_admin_server()
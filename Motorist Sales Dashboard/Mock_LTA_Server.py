@@ -0,0 +1,237 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from email.utils import formatdate
+from io import BytesIO
+import argparse
+import threading
+import tempfile
+import tracemalloc
+import hashlib
+import zipfile
+import shutil
+import time
+import os
+import sys
+import pandas as pd
+import requests
+import LTA_Downloads
+
+# Local stand-in for DataMall. Serves the five archives built from the sample CSVs in 'Data Files', answers
+# conditional requests like the real site and counts how many bytes it actually sent.
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_DATA_DIR = os.path.join(script_dir, "..", "Data Files")
+
+# CSV inside each archive, in the order of LTA_Downloads.LTA_PATHS
+ARCHIVE_FILES = [
+    "M02-New_Reg_by_Quota.csv",
+    "M05-Dereg_by_Quota.csv",
+    "M06-Vehs_by_Type.csv",
+    "M07-Trf_by_type.csv",
+    "M10-Monthly_COE_Revalidation.csv"
+]
+
+def build_archive(csv_path, comment=b''):
+    # Same layout as the DataMall archives, the CSV inside a folder named after it
+    name = os.path.basename(csv_path)
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.write(csv_path, f"{os.path.splitext(name)[0]}/{name}")
+        z.comment = comment
+    return buffer.getvalue()
+
+def publish(server, path, content):
+    # Put a new version of an archive on the server
+    with server.lock:
+        server.archives[path] = {
+            'content': content,
+            'etag': f'"{hashlib.md5(content).hexdigest()}"',
+            'last_modified': formatdate(time.time(), usegmt=True),
+        }
+
+def make_handler():
+    class LTAHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            with self.server.lock:
+                archive = self.server.archives.get(self.path)
+                self.server.requests += 1
+            if archive is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            if self.headers.get('If-None-Match') == archive['etag']:
+                self.send_response(304)
+                self.send_header('ETag', archive['etag'])
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/zip')
+            self.send_header('Content-Length', str(len(archive['content'])))
+            self.send_header('ETag', archive['etag'])
+            self.send_header('Last-Modified', archive['last_modified'])
+            self.end_headers()
+            self.wfile.write(archive['content'])
+            with self.server.lock:
+                self.server.bytes_sent += len(archive['content'])
+
+    return LTAHandler
+
+def start_server(port=0, data_dir=DEFAULT_DATA_DIR):
+    # Start the stand-in on a background thread and return it together with its base URL
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler())
+    server.lock = threading.Lock()
+    server.archives = {}
+    server.requests = 0
+    server.bytes_sent = 0  # Archive bytes sent, 304 answers send none
+    for path, file_name in zip(LTA_Downloads.LTA_PATHS, ARCHIVE_FILES):
+        publish(server, path, build_archive(os.path.join(data_dir, file_name)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def verify(data_dir=DEFAULT_DATA_DIR):
+    # First launch, unchanged launch, one archive updated, and a launch with the site down
+    server, base_url = start_server(data_dir=data_dir)
+    LTA_Downloads.set_base_url(base_url)
+    cache_dir = tempfile.mkdtemp()
+    dest_dir = tempfile.mkdtemp()
+
+    def launch(label):
+        with server.lock:
+            requests_before, bytes_before = server.requests, server.bytes_sent
+        start = time.perf_counter()
+        files = LTA_Downloads.update_datasets(dest_dir, cache_dir=cache_dir)
+        elapsed = time.perf_counter() - start
+        with server.lock:
+            sent = server.bytes_sent - bytes_before
+            requests = server.requests - requests_before
+        print(f"{label:<22} {len(files)} files, {requests} requests, {sent:>9,} bytes transferred, {elapsed:.3f}s")
+        return files
+
+    try:
+        launch("First launch")
+        launch("Unchanged")
+        publish(server, LTA_Downloads.LTA_PATHS[0], build_archive(os.path.join(data_dir, ARCHIVE_FILES[0]), b'next month'))
+        launch("One archive updated")
+        server.shutdown()
+        server.server_close()
+        files = launch("Site unreachable")
+        print(f"All files present offline: {all(os.path.exists(f) for f in files) and len(files) == len(ARCHIVE_FILES)}")
+    finally:
+        shutil.rmtree(cache_dir)
+        shutil.rmtree(dest_dir)
+
+def scaled_data_dir(data_dir, scale):
+    # Copies of the sample CSVs with their rows repeated, to time archives closer to the real sizes
+    scaled_dir = tempfile.mkdtemp()
+    for file_name in ARCHIVE_FILES:
+        with open(os.path.join(data_dir, file_name)) as f:
+            header, *rows = f.readlines()
+        with open(os.path.join(scaled_dir, file_name), 'w') as f:
+            f.write(header)
+            f.writelines(rows * scale)
+    return scaled_dir
+
+def benchmark(data_dir=DEFAULT_DATA_DIR, scale=1):
+    # Previous ingestion (serial download, extract to disk, read_csv, guessed dates) against the streaming one,
+    # per archive wall time, peak traced memory and size of the resulting table, then both stages end to end
+    scaled_dir = scaled_data_dir(data_dir, scale)
+    server, base_url = start_server(data_dir=scaled_dir)
+    LTA_Downloads.set_base_url(base_url)
+    urls = LTA_Downloads.lta_urls()
+    cache_dir = tempfile.mkdtemp()
+    dest_dir = tempfile.mkdtemp()
+
+    def previous(url):
+        response = requests.get(url)
+        with zipfile.ZipFile(BytesIO(response.content)) as z:
+            z.extractall(dest_dir)
+            members = [m.filename for m in z.infolist() if not m.is_dir()]
+        tables = {}
+        for member in members:
+            file_name = os.path.basename(member)
+            shutil.move(os.path.join(dest_dir, member), os.path.join(dest_dir, file_name))
+            df = pd.read_csv(os.path.join(dest_dir, file_name))
+            df[df.columns[0]] = pd.to_datetime(df[df.columns[0]], errors='coerce')
+            tables[file_name] = df
+        return tables
+
+    def streaming(url):
+        with requests.Session() as session:
+            entry, _ = LTA_Downloads.fetch_archive(session, url, cache_dir)
+        return LTA_Downloads.read_archive(os.path.join(cache_dir, entry['file']))
+
+    def measure(function, url):
+        # Timed untraced, tracing slows pandas down several times
+        start = time.perf_counter()
+        tables = function(url)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        function(url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return tables, elapsed, peak
+
+    try:
+        print(f"{'Archive':<34} {'rows':>8} {'previous (time, peak, table)':>30} {'streaming (time, peak, table)':>30}  same data")
+        for url, file_name in zip(urls, ARCHIVE_FILES):
+            old, old_time, old_peak = measure(previous, url)
+            new, new_time, new_peak = measure(streaming, url)
+            old_df, new_df = old[file_name], new[file_name]
+            same = old_df.astype(str).equals(new_df.astype(str))
+            old_size = old_df.memory_usage(deep=True).sum()
+            new_size = new_df.memory_usage(deep=True).sum()
+            print(f"{file_name:<34} {len(new_df):>8,} {old_time:7.3f}s {old_peak / 1e6:7.1f} MB {old_size / 1e6:7.1f} MB "
+                  f"{new_time:7.3f}s {new_peak / 1e6:7.1f} MB {new_size / 1e6:7.1f} MB  {same}")
+
+        start = time.perf_counter()
+        for url in urls:
+            previous(url)
+        old_total = time.perf_counter() - start
+        shutil.rmtree(cache_dir)
+        start = time.perf_counter()
+        LTA_Downloads.load_tables(urls, cache_dir=cache_dir)
+        new_total = time.perf_counter() - start
+        print(f"All archives: previous {old_total:.3f}s, streaming and concurrent {new_total:.3f}s")
+    finally:
+        server.shutdown()
+        server.server_close()
+        for folder in (scaled_dir, cache_dir, dest_dir):
+            shutil.rmtree(folder, ignore_errors=True)
+
+def main_mock_lta_server():
+    parser = argparse.ArgumentParser(description="Serve the LTA DataMall archives locally")
+    parser.add_argument('--port', type=int, default=8070)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--verify', action='store_true', help="Check the download cache against the stand-in")
+    parser.add_argument('--benchmark', action='store_true', help="Compare the previous and the streaming ingestion")
+    parser.add_argument('--scale', type=int, default=1, help="Repeat the sample rows this many times for --benchmark")
+    args = parser.parse_args()
+
+    if args.verify:
+        verify(args.data_dir)
+        return
+    if args.benchmark:
+        benchmark(args.data_dir, args.scale)
+        return
+
+    server, base_url = start_server(args.port, args.data_dir)
+    print(f"Serving LTA archives on {base_url}, run the dashboards with LTA_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main_mock_lta_server()
@@ -0,0 +1,256 @@
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+import argparse
+import tempfile
+import shutil
+import time
+import os
+import sys
+import Run_Report
+
+# The tables the enquiry scrapers read from the admin pages, with a choice of HTML parser. Every backend returns
+# the same rows, cells are the HTML inside each <td> split on a separator, as BeautifulSoup writes it:
+#   'html.parser' - BeautifulSoup with Python's parser over the whole page, as the scrapers always did
+#   'lxml'        - BeautifulSoup with lxml, only the <h2> and <table> elements are built
+#   'lxml-xpath'  - lxml directly, the cells are written back the way BeautifulSoup does it (default)
+# lxml repairs broken markup (an unclosed <td>, a bare boolean attribute) differently from Python's parser, so
+# check a backend against pages recorded from the site with --verify before relying on it. Set SCRAPER_PARSER to
+# 'html.parser' for the old behaviour, without lxml installed everything uses it.
+PARSER = os.environ.get('SCRAPER_PARSER', 'lxml-xpath').lower()
+PARSERS = ('html.parser', 'lxml', 'lxml-xpath')
+
+_warned_no_lxml = False
+parse_seconds = 0.0  # Time spent parsing pages
+pages_parsed = 0
+
+# Elements BeautifulSoup writes as <br/>, and attributes it stores as a list of words (written back with single
+# spaces between them)
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+                 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+                 'image', 'isindex', 'nextid', 'spacer'}
+LIST_ATTRIBUTES = {'*': {'class', 'accesskey', 'dropzone'}, 'a': {'rel', 'rev'}, 'link': {'rel', 'rev'},
+                   'td': {'headers'}, 'th': {'headers'}, 'form': {'accept-charset'}, 'object': {'archive'},
+                   'area': {'rel'}, 'icon': {'sizes'}, 'iframe': {'sandbox'}, 'output': {'for'}}
+
+def get_parser(parser=None):
+    global _warned_no_lxml
+    parser = (parser or PARSER).lower()
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown HTML parser '{parser}', expected one of {PARSERS}")
+    if parser != 'html.parser':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            if not _warned_no_lxml:
+                print(f"lxml is not installed, parsing pages with html.parser instead of {parser}.")
+                _warned_no_lxml = True
+            return 'html.parser'
+    return parser
+
+def _timed(function, content, parser, *args):
+    global parse_seconds, pages_parsed
+    start = time.perf_counter()
+    try:
+        with Run_Report.step('parse'):
+            return function(content, get_parser(parser), *args)
+    finally:
+        parse_seconds += time.perf_counter() - start
+        pages_parsed += 1
+        Run_Report.count('pages parsed')
+
+def titled_tables(content, separator='<br>', parser=None):
+    # Every <h2> of the page in order as (title text, title string, headers, rows), with the headers and rows
+    # of the first table after it (None for both without one). The title string is BeautifulSoup's h2.string,
+    # what soup.find('h2', string=...) matches
+    tables = _timed(_titled_tables, content, parser, separator)
+    Run_Report.count('rows parsed', sum(len(rows) for _, _, _, rows in tables if rows))
+    return tables
+
+def page_table(content, separator='<br>', parser=None):
+    # (headers, rows) of every <th> and every <tr> after the first on the page
+    headers, rows = _timed(_page_table, content, parser, separator)
+    Run_Report.count('rows parsed', len(rows))
+    return headers, rows
+
+def find_titled(tables, title):
+    # The first entry of titled_tables whose title string is exactly title, None if there is none
+    return next((entry for entry in tables if entry[1] == title), None)
+
+def _titled_tables(content, parser, separator):
+    if parser == 'lxml-xpath':
+        return _lxml_titled_tables(_lxml_document(content), separator)
+    only = SoupStrainer(['h2', 'table']) if parser != 'html.parser' else None
+    soup = BeautifulSoup(content, parser, parse_only=only)
+    tables = []
+    for title in soup.find_all('h2'):
+        table = title.find_next('table')
+        headers = rows = None
+        if table:
+            headers = [header.text.strip() for header in table.find_all('th')]
+            rows = [_soup_row(row, separator) for row in table.find_all('tr')[1:]]  # Skip the header row
+        string = str(title.string) if title.string is not None else None
+        tables.append((title.text.strip(), string, headers, rows))
+    return tables
+
+def _page_table(content, parser, separator):
+    if parser == 'lxml-xpath':
+        root = _lxml_document(content)
+        return ([header.text_content().strip() for header in root.iter('th')],
+                [_lxml_row(row, separator) for row in list(root.iter('tr'))[1:]])
+    only = SoupStrainer('table') if parser != 'html.parser' else None
+    soup = BeautifulSoup(content, parser, parse_only=only)
+    return ([header.text.strip() for header in soup.find_all('th')],
+            [_soup_row(row, separator) for row in soup.find_all('tr')[1:]])
+
+def _soup_row(row, separator):
+    row_data = []
+    for col in row.find_all('td'):
+        row_data.extend(line.strip() for line in col.decode_contents().split(separator))
+    return row_data
+
+def _lxml_document(content):
+    from lxml import html
+    # Decoded the way BeautifulSoup does, lxml would guess differently for pages without a charset
+    markup = content if isinstance(content, str) else UnicodeDammit(content, is_html=True).unicode_markup
+    return html.document_fromstring(markup)
+
+def _lxml_titled_tables(root, separator):
+    tables = []
+    for title in root.iter('h2'):
+        following = title.xpath('following::table[1]')
+        headers = rows = None
+        if following:
+            table = following[0]
+            headers = [header.text_content().strip() for header in table.iter('th')]
+            rows = [_lxml_row(row, separator) for row in list(table.iter('tr'))[1:]]  # Skip the header row
+        tables.append((title.text_content().strip(), _single_string(title), headers, rows))
+    return tables
+
+def _lxml_row(row, separator):
+    row_data = []
+    for col in row.iter('td'):
+        row_data.extend(line.strip() for line in _inner_html(col).split(separator))
+    return row_data
+
+def _single_string(element):
+    # BeautifulSoup's .string: the text of an element holding nothing else, followed through single children
+    children = [child for child in element if isinstance(child.tag, str)]
+    if not children:
+        return element.text or None if len(element) == 0 else None
+    if len(children) == 1 and len(element) == 1 and not element.text and not children[0].tail:
+        return _single_string(children[0])
+    return None
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def _attribute(tag, name, value):
+    if name in LIST_ATTRIBUTES['*'] or name in LIST_ATTRIBUTES.get(tag, ()):
+        value = ' '.join(value.split())
+    value = _escape(value)
+    quote = '"'
+    if '"' in value:
+        if "'" in value:
+            value = value.replace('"', '&quot;')
+        else:
+            quote = "'"
+    return f' {name}={quote}{value}{quote}'
+
+def _outer_html(element):
+    from lxml import etree
+    if element.tag is etree.Comment:
+        markup = f'<!--{element.text or ""}-->'
+    elif not isinstance(element.tag, str):
+        markup = ''
+    else:
+        tag = element.tag
+        attributes = ''.join(_attribute(tag, name, value) for name, value in element.attrib.items())
+        if tag in VOID_ELEMENTS and len(element) == 0 and not element.text:
+            markup = f'<{tag}{attributes}/>'
+        else:
+            markup = f'<{tag}{attributes}>{_inner_html(element)}</{tag}>'
+    return markup + _escape(element.tail or '')
+
+def _inner_html(element):
+    # What BeautifulSoup's decode_contents() returns for the same element
+    return _escape(element.text or '') + ''.join(_outer_html(child) for child in element)
+
+def record_fixtures(fixture_dir):
+    # Save the pages every enquiry scraper fetches, as generated by Mock_Admin_Server.py
+    import requests
+    import Mock_Admin_Server
+    import Fetch_Pages
+    server, base_url = Mock_Admin_Server.start_server(record_dir=fixture_dir, latency=0)
+    try:
+        paths = ['/enquiry/sales?filter=3&cso_id=&state_id=']
+        paths += [f'/enquiry/sales?cso_id=&filter={filter_value}&page={page}&state_id='
+                  for filter_value in (1, 2, 4, 5, 6) for page in (1, 2, 3)]
+        session = requests.Session()
+        session.post(f'{base_url}/admin-login', data={})
+        os.makedirs(fixture_dir, exist_ok=True)
+        for path in paths:
+            response = session.get(base_url + path)
+            with open(os.path.join(fixture_dir, Fetch_Pages.recording_name(base_url + path)), 'wb') as f:
+                f.write(response.content)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def verify(fixture_dir, parsers=PARSERS, repeat=3):
+    # Every table of every page with each backend against 'html.parser', with the time each backend takes for
+    # the three extractions of a page
+    pages = sorted(file_name for file_name in os.listdir(fixture_dir) if file_name.endswith('.html'))
+    totals = dict.fromkeys(parsers, 0.0)
+    all_same = True
+    print(f"{'page':<48} {'KB':>6} " + ' '.join(f"{parser:>12}" for parser in parsers) + "  same rows")
+    for file_name in pages:
+        with open(os.path.join(fixture_dir, file_name), 'rb') as f:
+            content = f.read()
+        results = {}
+        timings = []
+        for parser in parsers:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = [_titled_tables(content, parser, '<br>'), _titled_tables(content, parser, '<td>'),
+                          _page_table(content, parser, '<br>')]
+            seconds = (time.perf_counter() - start) / repeat
+            totals[parser] += seconds
+            timings.append(seconds)
+            results[parser] = result
+        reference = results.get('html.parser') or results[parsers[0]]
+        same = all(result == reference for result in results.values())
+        all_same = all_same and same
+        print(f"{file_name[:48]:<48} {len(content) / 1024:>6.1f} " +
+              ' '.join(f"{seconds * 1000:>9.2f} ms" for seconds in timings) + f"  {same}")
+    print(f"{'all ' + str(len(pages)) + ' pages':<48} {'':>6} " +
+          ' '.join(f"{totals[parser] * 1000:>9.2f} ms" for parser in parsers) + f"  {all_same}")
+    return all_same
+
+if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # When running as a bundled executable (e.g., PyInstaller)
+        script_dir = os.path.dirname(sys.executable)
+    else:
+        # When running as a script
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="HTML parsing of the enquiry pages")
+    parser.add_argument('--verify', action='store_true', help="Compare every backend on recorded pages, with timings")
+    parser.add_argument('--fixtures', default=os.path.join(script_dir, "recorded_pages"),
+                        help="Pages recorded with FETCH_RECORD_DIR, generated by Mock_Admin_Server.py if there are none")
+    parser.add_argument('--parsers', nargs='+', default=list(PARSERS), choices=PARSERS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.verify:
+        fixture_dir = args.fixtures
+        generated = not os.path.isdir(fixture_dir) or not any(f.endswith('.html') for f in os.listdir(fixture_dir))
+        if generated:
+            fixture_dir = tempfile.mkdtemp()
+            record_fixtures(fixture_dir)
+            print(f"No recorded pages in {args.fixtures}, using pages generated by Mock_Admin_Server.py")
+        try:
+            same = verify(fixture_dir, args.parsers, args.repeat)
+        finally:
+            if generated:
+                shutil.rmtree(fixture_dir)
+        sys.exit(0 if same else 1)
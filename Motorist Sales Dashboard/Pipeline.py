@@ -0,0 +1,417 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import importlib.util
+import traceback
+import importlib
+import argparse
+import hashlib
+import json
+import time
+import os
+import sys
+import Run_Report
+import Stage_Profile
+
+# The stages of 'All Dashboards.py' with the tables each one reads and writes. A stage waits for the earlier
+# stages that write its inputs, that read or write its outputs, everything else runs at the same time in a pool
+# of PIPELINE_WORKERS processes (1 runs the stages one after another in this process). A stage that fails stops
+# every stage after it that depends on it, the others carry on. The run ends with the time of every stage and
+# the critical path, the chain of stages the run had to wait for.
+#   name     - shown in the summary
+#   target   - 'Module.function', imported in the worker so stages do not share any state
+#   inputs   - tables (or other artifacts) the stage reads
+#   outputs  - tables the stage writes or deletes
+#   params   - environment variables that change what the stage writes
+#   source   - fetches from the admin site, reruns once its last run is SOURCE_MAX_AGE seconds old
+#   serve    - runs in this process after the summary, the dashboards keep serving until they are stopped
+#
+# Stages are only rerun when something they depend on changed. After a stage runs, STATE_FILE records its key
+# (a hash of its module, its params, the outputs of the stages it waited for and the content of any other input)
+# and the content hash of each of its outputs. A stage whose key is unchanged and whose outputs (those no later
+# stage rewrites) still hold what it wrote is up to date and skipped.
+#
+# Every run also writes a JSON report (see Run_Report.py) with the wall and CPU time of each stage, the time of
+# its sub-steps and what it fetched, parsed, read and wrote. Stages named with --profile (or PIPELINE_PROFILE)
+# run under cProfile and tracemalloc, see Stage_Profile.py.
+
+WORKERS = int(os.environ.get('PIPELINE_WORKERS', 4))
+SOURCE_MAX_AGE = float(os.environ.get('PIPELINE_SOURCE_MAX_AGE', 60 * 60))
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+STATE_FILE = os.environ.get('PIPELINE_STATE_FILE', os.path.join(script_dir, "pipeline_state.json"))
+PARAMS = ['DASHBOARD_STORE']  # Every stage
+
+FILTERED = ["filtered_new_data", "filtered_scrapexport_data", "filtered_quotation_data",
+            "filtered_consignment_data", "filtered_sold_data", "filtered_void_data"]
+HISTORICAL = "consolidated_&_formatted_data (historical)"
+SCRAPER_PARAMS = ['MOTORIST_BASE_URL', 'DASHBOARD_ARCHIVE_RAW', 'SCRAPER_PARSER']
+
+STAGES = [
+    {'name': 'login', 'target': 'Session_Manager.save_session', 'inputs': [], 'outputs': ['admin session'],
+     'params': ['MOTORIST_BASE_URL'], 'source': True},
+    {'name': 'new', 'target': 'New.main_new', 'inputs': ['admin session'], 'outputs': ['new_data', 'filtered_new_data'],
+     'params': SCRAPER_PARAMS, 'source': True},
+    {'name': 'scrapexport', 'target': 'ScrapExport.main_scrapexport', 'inputs': ['admin session'],
+     'outputs': ['scrapexport_data', 'filtered_scrapexport_data'], 'params': SCRAPER_PARAMS, 'source': True},
+    {'name': 'quotation', 'target': 'Quotation.main_quotation', 'inputs': ['admin session'],
+     'outputs': ['quotation_data', 'filtered_quotation_data'], 'params': SCRAPER_PARAMS, 'source': True},
+    {'name': 'consignment', 'target': 'Consignment.main_consignment', 'inputs': ['admin session'],
+     'outputs': ['consignment_data', 'filtered_consignment_data'], 'params': SCRAPER_PARAMS, 'source': True},
+    {'name': 'sold', 'target': 'Sold.main_sold', 'inputs': ['admin session'], 'outputs': ['sold_data', 'filtered_sold_data'],
+     'params': SCRAPER_PARAMS, 'source': True},
+    {'name': 'void', 'target': 'Void.main_void', 'inputs': ['admin session'], 'outputs': ['void_data', 'filtered_void_data'],
+     'params': SCRAPER_PARAMS, 'source': True},
+    # Starts from the last week of the history written by the previous run
+    {'name': 'sales dashboard', 'target': 'SalesDashboard.main_salesdashboard', 'inputs': ['admin session', HISTORICAL],
+     'outputs': ['sales_dashboard (new)'], 'params': ['MOTORIST_BASE_URL', 'SALES_REPORT_URL'], 'source': True},
+    {'name': 'consolidate', 'target': 'Consolidate_Format_Data.main_consolidate_format_data',
+     'inputs': ['sales_dashboard (new)'], 'outputs': ['consolidated_&_formatted_data (new)']},
+    {'name': 'combine', 'target': 'Combine_Data.main_combine_data',
+     'inputs': ['consolidated_&_formatted_data (new)', HISTORICAL], 'outputs': [HISTORICAL, 'cleaned_consolidated_data']},
+    {'name': 'sales summary', 'target': 'salescalculation.salescalculation', 'inputs': FILTERED,
+     'outputs': ['sales_calculations_summary']},
+    # Deletes the tables of this run once the stages reading them are done. The raw scraped tables are only
+    # written with DASHBOARD_ARCHIVE_RAW, which keeps them, so they are not outputs of any stage
+    {'name': 'delete', 'target': 'Delete_Excel.main_delete', 'inputs': [],
+     'outputs': ['consolidated_&_formatted_data (new)', 'formatted_sales_dashboard (new)', 'sales_dashboard (new)'],
+     'params': ['DASHBOARD_ARCHIVE_RAW']},
+    {'name': 'export excel', 'target': 'Data_Store.main_export_excel',
+     'inputs': ['cleaned_consolidated_data', HISTORICAL] + FILTERED, 'outputs': [], 'params': ['DASHBOARD_EXPORT_EXCEL']},
+    {'name': 'marketshare', 'target': 'Marketshare.main_marketshare',
+     'inputs': ['cleaned_consolidated_data'] + FILTERED, 'outputs': [], 'serve': True},
+]
+
+def dependencies(stages):
+    # {stage name: names of the earlier stages it has to wait for}
+    names = [stage['name'] for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Stage names are not unique: {names}")
+    depends = {}
+    for index, stage in enumerate(stages):
+        depends[stage['name']] = [
+            earlier['name'] for earlier in stages[:index]
+            if set(stage['inputs']) & set(earlier['outputs'])  # Reads what the earlier stage writes
+            or set(stage['outputs']) & set(earlier['inputs'] + earlier['outputs'])  # Replaces what it reads or writes
+        ]
+    return depends
+
+def downstream(stages, names):
+    # names with every stage that waits for one of them, directly or not
+    depends = dependencies(stages)
+    found = set(names)
+    for stage in stages:
+        if any(dep in found for dep in depends[stage['name']]):
+            found.add(stage['name'])
+    return found
+
+def _artifact_files(output_dir, name):
+    # The files Data_Store reads the artifact from (see Data_Store._resolve), found without importing pandas so
+    # a run with nothing to do stays quick
+    backend = os.environ.get('DASHBOARD_STORE', 'parquet').lower()
+    if backend != 'excel' and importlib.util.find_spec('pyarrow') is None:
+        backend = 'excel'
+    path = os.path.join(output_dir, f"{name}.{'xlsx' if backend == 'excel' else backend}")
+    if not os.path.exists(path):
+        path = os.path.join(output_dir, f"{name}.xlsx")
+    if os.path.isdir(path):
+        return sorted(os.path.join(folder, file_name) for folder, _, file_names in os.walk(path) for file_name in file_names)
+    return [path] if os.path.exists(path) else []
+
+def _file_hash(path, hashes):
+    # hashes keeps the hash of each file with its size and modification time, unchanged files are not read again
+    stat = os.stat(path)
+    cached = hashes.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    hashes[path] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+    return hashes[path][2]
+
+def content_hash(output_dir, name, hashes):
+    # Hash of the stored artifact, None when there is none
+    files = _artifact_files(output_dir, name)
+    if not files:
+        return None
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(os.path.relpath(path, output_dir).encode())
+        digest.update(_file_hash(path, hashes).encode())
+    return digest.hexdigest()
+
+def _module_hash(target):
+    spec = importlib.util.find_spec(target.rsplit('.', 1)[0])
+    if spec is None or not spec.origin or not os.path.exists(spec.origin):
+        return None
+    with open(spec.origin, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def stage_key(stage, depends, pipeline_written, state, output_dir, hashes):
+    # Hash of everything the stage's outputs are made from. pipeline_written holds the artifacts another stage
+    # writes, those are followed through the stages writing them
+    key = {
+        'target': stage['target'],
+        'module': _module_hash(stage['target']),
+        'params': {name: os.environ.get(name) for name in PARAMS + stage.get('params', [])},
+        'after': {dep: state.get(dep, {}).get('address') for dep in depends},
+        # Inputs no stage writes, the stage's own outputs are checked on their own
+        'inputs': {name: content_hash(output_dir, name, hashes) for name in stage['inputs']
+                   if name not in pipeline_written and name not in stage['outputs']},
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+def load_state(path=None):
+    path = path or STATE_FILE
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'stages': {}, 'hashes': {}}
+
+def save_state(state, path=None):
+    path = path or STATE_FILE
+    temp_file = f"{path}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(state, f)
+    os.replace(temp_file, path)
+
+def _run_stage(target, name=None, profile=None):
+    # (start, end, CPU seconds, what Run_Report recorded) of the stage, run in a worker process. The import is
+    # part of the stage, a new worker imports pandas and the stage's modules first
+    Run_Report.take()  # Anything left by the previous stage of this worker
+    start, cpu = time.time(), time.process_time()
+    module_name, function_name = target.rsplit('.', 1)
+    function = getattr(importlib.import_module(module_name), function_name)
+    profile_path = None
+    if name is not None and Stage_Profile.chosen(name, target, profile):
+        profile_path = Stage_Profile.profile_call(name, function)
+    else:
+        function()
+    end, cpu = time.time(), time.process_time() - cpu
+    recorded = Run_Report.take()
+    if profile_path:
+        recorded['profile'] = profile_path  # The times of a profiled stage are not comparable with other runs
+    return start, end, cpu, recorded
+
+def run(stages=None, workers=None, only=None, force=False, output_dir=None, state_file=None, report_dir=None,
+        profile=None):
+    # Run every stage that is not up to date except the serving ones, return {stage name: {'status', 'start',
+    # 'end', 'error', 'cpu', 'recorded'}}. With only, just those stages run (up to date or not) and the stages
+    # after them that they change, force reruns everything. profile names the stages to profile (they run even
+    # when up to date), PIPELINE_PROFILE by default
+    stages = [stage for stage in (stages or STAGES) if not stage.get('serve')]
+    workers = WORKERS if workers is None else workers
+    output_dir = output_dir or script_dir
+    depends = dependencies(stages)
+    by_name = {stage['name']: stage for stage in stages}
+    unknown = set(only or []) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stages {sorted(unknown)}, expected some of {list(by_name)}")
+    selected = downstream(stages, only) if only else set(by_name)
+    state = load_state(state_file)
+    stage_state, hashes = state['stages'], state['hashes']
+    # Artifacts each stage may find already written by an earlier stage, and the ones a later stage rewrites
+    produced = {stage['name']: {output for earlier in stages[:index] for output in earlier['outputs']}
+                for index, stage in enumerate(stages)}
+    rewritten = {stage['name']: {output for later in stages[index + 1:] for output in later['outputs']}
+                 for index, stage in enumerate(stages)}
+    results = {}
+    keys = {}
+    pending = [stage['name'] for stage in stages]
+    run_start = time.time()
+
+    def up_to_date(name):
+        stage = by_name[name]
+        keys[name] = stage_key(stage, depends[name], produced[name] | rewritten[name], stage_state, output_dir, hashes)
+        if force or (only and name in only) or Stage_Profile.chosen(name, stage['target'], profile):
+            return False  # Asked for by name, a profiled stage runs so its profile is written
+        recorded = stage_state.get(name)
+        if recorded is None or recorded['key'] != keys[name]:
+            return False
+        if stage.get('source') and time.time() - recorded['finished'] > SOURCE_MAX_AGE:
+            return False
+        return all(content_hash(output_dir, output, hashes) == recorded['outputs'].get(output)
+                   for output in stage['outputs'] if output not in rewritten[name])
+
+    def finish(name, start=None, end=None, error=None, cpu=None, recorded=None):
+        results[name] = {'status': 'failed' if error else 'done', 'start': start, 'end': end, 'error': error,
+                         'cpu': cpu, 'recorded': recorded}
+        if error:
+            print(f"Stage '{name}' failed: {error!r}")
+            stage_state.pop(name, None)
+        else:
+            print(f"Stage '{name}' done in {end - start:.1f}s")
+            outputs = {output: content_hash(output_dir, output, hashes) for output in by_name[name]['outputs']}
+            stage_state[name] = {
+                'key': keys[name],
+                'outputs': outputs,
+                'address': hashlib.sha256(json.dumps(outputs, sort_keys=True).encode()).hexdigest(),
+                'finished': end,
+            }
+        save_state(state, state_file)
+
+    def ready():
+        # Stages to run now. Stages after a failed one are skipped, up to date (and not selected) ones are kept
+        found = []
+        for name in list(pending):
+            statuses = [results[dep]['status'] if dep in results else None for dep in depends[name]]
+            if any(status in ('failed', 'skipped') for status in statuses):
+                pending.remove(name)
+                results[name] = {'status': 'skipped', 'start': None, 'end': None, 'error': None}
+                print(f"Stage '{name}' skipped, it depends on a stage that did not finish")
+            elif all(status in ('done', 'up to date', 'not selected') for status in statuses):
+                pending.remove(name)
+                if name not in selected:
+                    results[name] = {'status': 'not selected', 'start': None, 'end': None, 'error': None}
+                elif up_to_date(name):
+                    results[name] = {'status': 'up to date', 'start': None, 'end': None, 'error': None}
+                else:
+                    found.append(name)
+        return found
+
+    if workers <= 1:
+        while pending:
+            for name in ready():
+                start = time.time()
+                try:
+                    start, end, cpu, recorded = _run_stage(by_name[name]['target'], name, profile)
+                    finish(name, start, end, cpu=cpu, recorded=recorded)
+                except Exception as e:
+                    traceback.print_exc()
+                    finish(name, start, time.time(), e)
+    else:
+        executor = None
+        running = {}
+        try:
+            while pending or running:
+                for name in ready():
+                    if executor is None:
+                        if multiprocessing.get_start_method() == 'fork':
+                            # Forked workers start with the stage modules (and pandas) already imported
+                            for pending_name in [name] + pending:
+                                importlib.import_module(by_name[pending_name]['target'].rsplit('.', 1)[0])
+                        executor = ProcessPoolExecutor(max_workers=workers)
+                    running[executor.submit(_run_stage, by_name[name]['target'], name, profile)] = (name, time.time())
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, submitted = running.pop(future)
+                    try:
+                        start, end, cpu, recorded = future.result()
+                        finish(name, start, end, cpu=cpu, recorded=recorded)
+                    except Exception as e:
+                        traceback.print_exception(e)
+                        finish(name, submitted, time.time(), e)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    run_end = time.time()
+    print_summary(stages, results, run_start, run_end)
+    path = Run_Report.write_report(run_report(stages, results, run_start, run_end, workers), report_dir)
+    if path:
+        print(f"Run report written to {path}")
+    return results
+
+def critical_path(stages, results):
+    # (seconds, stage names) of the longest chain of dependent stages that ran
+    depends = dependencies(stages)
+    longest = {}
+    for stage in stages:
+        name = stage['name']
+        result = results.get(name, {})
+        if result.get('status') != 'done':
+            continue
+        before = max((longest[dep] for dep in depends[name] if dep in longest), default=(0.0, []))
+        longest[name] = (before[0] + result['end'] - result['start'], before[1] + [name])
+    return max(longest.values(), default=(0.0, []))
+
+def run_report(stages, results, run_start, run_end, workers):
+    # What Run_Report.write_report saves, times in seconds from the start of the run
+    seconds, path = critical_path(stages, results)
+    report = {
+        'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run_start)),
+        'wall': round(run_end - run_start, 4),
+        'workers': workers,
+        'critical path': {'seconds': round(seconds, 4), 'stages': path},
+        'stages': {},
+    }
+    for stage in stages:
+        result = results.get(stage['name'], {'status': 'not run', 'start': None})
+        entry = {'status': result['status']}
+        if result['start'] is not None:
+            entry['start'] = round(result['start'] - run_start, 4)
+            entry['wall'] = round(result['end'] - result['start'], 4)
+        if result.get('cpu') is not None:
+            entry['cpu'] = round(result['cpu'], 4)
+        if result.get('error') is not None:
+            entry['error'] = repr(result['error'])
+        entry.update(result.get('recorded') or {})
+        report['stages'][stage['name']] = entry
+    return report
+
+def print_summary(stages, results, run_start, run_end):
+    print(f"\n{'stage':<18} {'start':>8} {'time':>8} {'cpu':>8}  status")
+    for stage in stages:
+        result = results.get(stage['name'], {'status': 'not run', 'start': None})
+        if result['start'] is None:
+            print(f"{stage['name']:<18} {'':>8} {'':>8} {'':>8}  {result['status']}")
+        else:
+            cpu = f"{result['cpu']:>7.1f}s" if result.get('cpu') is not None else f"{'':>8}"
+            print(f"{stage['name']:<18} {result['start'] - run_start:>7.1f}s {result['end'] - result['start']:>7.1f}s {cpu}  {result['status']}")
+
+    seconds, path = critical_path(stages, results)
+    added_up = sum(result['end'] - result['start'] for result in results.values() if result['status'] == 'done')
+    print(f"Critical path ({seconds:.1f}s): {' -> '.join(path) or '-'}")
+    print(f"Wall time {run_end - run_start:.2f}s, stages added up {added_up:.1f}s")
+
+def serve(stages=None, results=None, profile=None):
+    # Run the serving stages whose dependencies finished or were up to date
+    stages = stages or STAGES
+    depends = dependencies(stages)
+    for stage in stages:
+        if not stage.get('serve'):
+            continue
+        if results is not None and any(results.get(dep, {}).get('status') in ('failed', 'skipped')
+                                       for dep in depends[stage['name']]):
+            print(f"Not starting '{stage['name']}', it depends on a stage that did not finish")
+            continue
+        _run_stage(stage['target'], stage['name'], profile)
+
+def print_plan(stages=None):
+    stages = stages or STAGES
+    for name, depends in dependencies(stages).items():
+        print(f"{name:<18} after {', '.join(depends) if depends else '-'}")
+
+def main_pipeline(workers=None, serve_dashboards=True, only=None, force=False, profile=None):
+    results = run(STAGES, workers, only, force, profile=profile)
+    if serve_dashboards:
+        serve(STAGES, results, profile)
+    return results
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Run the dashboard pipeline with independent stages in parallel")
+    parser.add_argument('--workers', type=int, default=None, help="Stages run at the same time (1 runs them in order)")
+    parser.add_argument('--stage', action='append', dest='only', metavar='NAME',
+                        help="Run this stage and the stages after it that it changes (repeat for several)")
+    parser.add_argument('--force', action='store_true', help="Rerun every stage, up to date or not")
+    parser.add_argument('--profile', action='append', metavar='NAME',
+                        help="Run this stage (name or main_* function, 'all' for every stage) under cProfile and tracemalloc")
+    parser.add_argument('--plan', action='store_true', help="Print what every stage waits for and exit")
+    parser.add_argument('--no-serve', action='store_true', help="Stop after the pipeline without starting the dashboards")
+    args = parser.parse_args()
+
+    if args.plan:
+        print_plan()
+    else:
+        main_pipeline(args.workers, not args.no_serve, args.only, args.force, args.profile)
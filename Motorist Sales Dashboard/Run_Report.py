@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+import threading
+import argparse
+import json
+import time
+import os
+import sys
+
+# Where a pipeline run spends its time. While a stage runs, the modules it uses record into this module:
+#   step(name)         - wall and CPU time of a sub-step: 'login', 'page fetch', 'week fetch', 'parse', 'filter',
+#                        'read', 'write', 'append'. Steps can sit inside each other (the 'write' at the end of a
+#                        'filter'), so they do not add up to the time of the stage
+#   count(name, value) - a counter: 'http requests', 'http bytes', 'http failures', 'logins', 'login failures',
+#                        'pages parsed', 'rows parsed' and '<backend> bytes read' / '<backend> bytes written'
+# Pipeline.py takes what every stage recorded with take() and writes a JSON report of the run into REPORT_DIR
+# (the newest REPORT_KEEP are kept). Compare two reports with
+#   python Run_Report.py OLD.json NEW.json
+# or the two newest with no arguments. Times that grew by more than THRESHOLD are marked as slower.
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+REPORT_DIR = os.environ.get('PIPELINE_REPORT_DIR', os.path.join(script_dir, "run_reports"))  # Empty for no reports
+REPORT_KEEP = int(os.environ.get('PIPELINE_REPORT_KEEP', 50))  # 0 keeps every report
+THRESHOLD = float(os.environ.get('PIPELINE_REPORT_THRESHOLD', 0.2))  # Fraction a time can grow before it is marked
+MIN_SECONDS = 0.05  # Times that grew by less than this are never marked
+
+_counts = {}
+_steps = {}  # {step: [calls, wall seconds, CPU seconds]}
+_lock = threading.Lock()
+
+def count(name, value=1):
+    with _lock:
+        _counts[name] = _counts.get(name, 0) + value
+
+@contextmanager
+def step(name):
+    # CPU time is the time of this thread, steps run in the fetch threads too
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+        with _lock:
+            totals = _steps.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+
+def take():
+    # {'counts': {...}, 'steps': {step: {'calls', 'wall', 'cpu'}}} recorded since the last take()
+    with _lock:
+        taken = {
+            'counts': dict(_counts),
+            'steps': {name: {'calls': calls, 'wall': round(wall, 4), 'cpu': round(cpu, 4)}
+                      for name, (calls, wall, cpu) in _steps.items()},
+        }
+        _counts.clear()
+        _steps.clear()
+    return taken
+
+def write_report(report, report_dir=None):
+    # Path of the report written, None with reports switched off
+    report_dir = REPORT_DIR if report_dir is None else report_dir
+    if not report_dir:
+        return None
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"run_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(report_dir, f"run_{time.strftime('%Y%m%d_%H%M%S')}_{suffix}.json")
+        suffix += 1
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    if REPORT_KEEP > 0:
+        for old_path in reports(report_dir)[:-REPORT_KEEP]:
+            os.remove(old_path)
+    return path
+
+def reports(report_dir=None):
+    # Report files oldest first
+    report_dir = REPORT_DIR if report_dir is None else report_dir
+    if not os.path.isdir(report_dir):
+        return []
+    paths = [os.path.join(report_dir, file_name) for file_name in os.listdir(report_dir)
+             if file_name.startswith('run_') and file_name.endswith('.json')]
+    return sorted(paths, key=os.path.getmtime)
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _metrics(stage):
+    # (label, value, is a time) for everything recorded about a stage
+    yield 'wall', stage.get('wall'), True
+    yield 'cpu', stage.get('cpu'), True
+    for name, value in sorted(stage.get('counts', {}).items()):
+        yield name, value, False
+    for name, totals in sorted(stage.get('steps', {}).items()):
+        yield f"{name} wall", totals['wall'], True
+        yield f"{name} cpu", totals['cpu'], True
+
+def _format(value, is_time):
+    if value is None:
+        return '-'
+    return f"{value:.2f}s" if is_time else f"{value:,}"
+
+def _row(label, old_value, new_value, is_time, threshold):
+    # Print one metric of both reports, True when it is a time that got slower
+    if old_value is None and new_value is None:
+        return False
+    change = ''
+    if old_value is not None and new_value is not None and old_value != new_value:
+        change = f"{(new_value - old_value) / old_value:+.0%}" if old_value else 'new'
+    slower = (is_time and old_value is not None and new_value is not None
+              and new_value - old_value > max(MIN_SECONDS, old_value * threshold))
+    print(f"  {label:<38} {_format(old_value, is_time):>12} {_format(new_value, is_time):>12} {change:>8}"
+          f"{'  slower' if slower else ''}")
+    return slower
+
+def compare(old, new, threshold=None):
+    # Print the two reports side by side, return the (stage, metric) pairs that got slower
+    threshold = THRESHOLD if threshold is None else threshold
+    slower = []
+    print(f"{'':<40} {'old':>12} {'new':>12} {'change':>8}")
+    print("run")
+    if _row('wall', old['wall'], new['wall'], True, threshold):
+        slower.append(('run', 'wall'))
+    for name in list(old['stages']) + [name for name in new['stages'] if name not in old['stages']]:
+        old_stage, new_stage = old['stages'].get(name, {}), new['stages'].get(name, {})
+        print(f"{name} ({old_stage.get('status', '-')} / {new_stage.get('status', '-')})")
+        old_metrics = {label: (value, is_time) for label, value, is_time in _metrics(old_stage)}
+        new_metrics = {label: (value, is_time) for label, value, is_time in _metrics(new_stage)}
+        for label in list(old_metrics) + [label for label in new_metrics if label not in old_metrics]:
+            old_value, is_time = old_metrics.get(label, (None, None))
+            new_value, is_time = new_metrics.get(label, (None, is_time))
+            if _row(label, old_value, new_value, is_time, threshold):
+                slower.append((name, label))
+    print(f"{len(slower)} times slower by more than {threshold:.0%}" if slower else "Nothing got slower")
+    return slower
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare two pipeline run reports")
+    parser.add_argument('reports', nargs='*', metavar='REPORT', help="Old and new report, the two newest without any")
+    parser.add_argument('--report-dir', default=REPORT_DIR)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="Fraction a time can grow before it is marked")
+    args = parser.parse_args()
+
+    paths = args.reports or reports(args.report_dir)[-2:]
+    if len(paths) != 2:
+        parser.error(f"Need two reports to compare, found {len(paths)}")
+    print(f"old {paths[0]}\nnew {paths[1]}\n")
+    slower = compare(load_report(paths[0]), load_report(paths[1]), args.threshold)
+    sys.exit(1 if slower else 0)
@@ -2,6 +2,9 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
 import os
@@ -9,12 +12,43 @@ import sys
 import time
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import pandas as pd
-from datetime import datetime
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import threading
+import Fetch_Pages
+import Session_Manager
+import Data_Store
+import Run_Report
+
+# How each week's report is fetched:
+#   'http'  - request the report behind the 'generatebutton2' button directly, falls back to 'wait'
+#   'wait'  - drive Chrome but wait for the report to appear instead of sleeping
+#   'sleep' - the original Chrome path with fixed sleeps
+FETCH_MODE = os.environ.get('SALES_FETCH_MODE', 'http')
+FETCH_MODES = ('http', 'wait', 'sleep')
+
+# Report request to use in 'http' mode if it is known (e.g. copied from the browser's network tab),
+# formatted with start= and end= in dd/mm/yyyy. Otherwise the form around the Generate button is submitted.
+REPORT_URL = os.environ.get('SALES_REPORT_URL')
+
+# Weeks fetched at the same time, each worker has its own webdriver in the browser modes
+BACKFILL_WORKERS = int(os.environ.get('SALES_BACKFILL_WORKERS', 4))
+WEEK_RETRIES = int(os.environ.get('SALES_WEEK_RETRIES', 2))  # Extra attempts for a week that failed
+
+WAIT_TIMEOUT = int(os.environ.get('SALES_WAIT_TIMEOUT', 60))  # Seconds 'wait' mode waits for the report
+REPORT_TABLE_CLASS = 'table table-striped table-condensed table-fixed-column table-no-bordered'
+REPORT_ROW_SELECTOR = 'table.table-fixed-column tbody tr td'
+
+# Every webdriver started by this module, one per thread that needed one
+_drivers = []
+_drivers_lock = threading.Lock()
+_local = threading.local()
+_http_available = True
 
-def read_last_row_first_column(file_path, sheet_name=0):
-    # Load the Excel file
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
+def read_last_row_first_column(output_dir, name, sheet_name=0):
+    # Load the stored sheet
+    df = Data_Store.read_table(output_dir, name, sheet_name)
     
     # Access the last row and first column
     last_row_first_column = df.iloc[-1, 0]
@@ -22,6 +56,13 @@ def read_last_row_first_column(file_path, sheet_name=0):
     return last_row_first_column
 
 def parse_week_string(week_str):
+    # The history stores its weeks as dates (see Table_Schemas.py), histories written before that as
+    # 'Week 2024-01-05'
+    if not isinstance(week_str, str):
+        if pd.isna(week_str):
+            return None
+        return pd.Timestamp(week_str).to_pydatetime() + timedelta(days=7)
+
     # Extract the date part from the string
     date_str = week_str.split(' ')[1]
     
@@ -34,192 +75,447 @@ def parse_week_string(week_str):
     
     return new_date_obj
 
-def scrape(output_dir):
+def week_url(week_start, week_end):
+    return f'{Fetch_Pages.BASE_URL}/review/sales?filter=2&show_only_month=true&start={week_start}&end={week_end}&state_id='
+
+def start_driver(mode):
     # Setup Selenium with Chrome
     chrome_options = Options()
     chrome_options.add_argument("--headless")  # Run headless mode (no GUI)
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
-    
-    try:
-        # URL of the login page
-        login_url = 'https://www.motorist.sg/admin-login'
-
-        # Navigate to the login page
-        print("Navigating to login page...")
-        driver.get(login_url)
-
-        # Find and fill login fields
-        print("Filling login fields...")
-        driver.find_element(By.ID, 'user_admin_email').send_keys('limtzekang@motorist.sg')
-        driver.find_element(By.ID, 'user_admin_password').send_keys('16062002')
-        submit_button = driver.find_element(By.CLASS_NAME, 'btn-success')
-        submit_button.click()
-
-        # Wait for login to complete
-        print("Waiting for login to complete...")
+    with _drivers_lock:
+        _drivers.append(driver)
+
+    # Navigate to the login page
+    print("Navigating to login page...")
+    driver.get(Fetch_Pages.LOGIN_URL)
+
+    # Find and fill login fields
+    print("Filling login fields...")
+    driver.find_element(By.ID, 'user_admin_email').send_keys(Fetch_Pages.EMAIL)
+    driver.find_element(By.ID, 'user_admin_password').send_keys(Fetch_Pages.PASSWORD)
+    submit_button = driver.find_element(By.CLASS_NAME, 'btn-success')
+    submit_button.click()
+
+    # Wait for login to complete
+    print("Waiting for login to complete...")
+    if mode == 'sleep':
         time.sleep(5)
+    else:
+        WebDriverWait(driver, WAIT_TIMEOUT).until(EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, 'Logout')))
+
+    return driver
+
+def get_driver(mode):
+    # Each thread gets its own logged in webdriver
+    if getattr(_local, 'driver', None) is None:
+        _local.driver = start_driver(mode)
+    return _local.driver
+
+def reset_driver():
+    # Drop this thread's webdriver so the next attempt starts a fresh browser
+    driver = getattr(_local, 'driver', None)
+    _local.driver = None
+    if driver is not None:
+        with _drivers_lock:
+            if driver in _drivers:
+                _drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+def quit_drivers():
+    print("Quitting the browser...")
+    with _drivers_lock:
+        for driver in _drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Error quitting the browser: {e}")
+        _drivers.clear()
+    _local.driver = None
+
+def has_report(page_source):
+    soup = BeautifulSoup(page_source, 'html.parser')
+    return bool(soup.find_all('table', class_=REPORT_TABLE_CLASS))
+
+def fetch_week_sleep(driver, url):
+    # Navigate to the base URL
+    driver.get(url)
+
+    # Wait for the page to load
+    time.sleep(10)
 
-        # Find Latest Pulled Data
-        historic_data = os.path.join(output_dir, "consolidated_&_formatted_data (historical).xlsx")
-        latest_date_str = read_last_row_first_column(historic_data, "New")
-        latest_date = parse_week_string(latest_date_str)
+    # Click the "Generate" button
+    generate_button = driver.find_element(By.ID, 'generatebutton2')
+    generate_button.click()
 
+    # Wait for data to load
+    time.sleep(20)
+
+    # Execute JavaScript to ensure the page is fully loaded
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    time.sleep(5)
+
+    return driver.page_source
+
+def fetch_week_wait(driver, url):
+    driver.get(url)
+    wait = WebDriverWait(driver, WAIT_TIMEOUT)
+
+    # Click the "Generate" button as soon as it can be clicked
+    generate_button = wait.until(EC.element_to_be_clickable((By.ID, 'generatebutton2')))
+    old_rows = driver.find_elements(By.CSS_SELECTOR, REPORT_ROW_SELECTOR)
+    generate_button.click()
+
+    try:
+        # Wait for any report already on the page to be replaced, then for the new rows to be rendered
+        if old_rows:
+            wait.until(EC.staleness_of(old_rows[0]))
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, REPORT_ROW_SELECTOR)))
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+    except TimeoutException:
+        print(f"No report rows appeared within {WAIT_TIMEOUT}s for {url}")
+
+    return driver.page_source
+
+def fetch_week_http(week_start, week_end):
+    session = Session_Manager.get_session()
+    if session is None:
+        return None
+
+    if REPORT_URL:
+        response = Session_Manager.fetch_pages([REPORT_URL.format(start=week_start, end=week_end)])[0]
+    else:
+        response = Session_Manager.fetch_pages([week_url(week_start, week_end)])[0]
+        if response is None or response.status_code != 200:
+            return None
+
+        # Submit the form behind the Generate button the same way the browser would
+        soup = BeautifulSoup(response.content, 'html.parser')
+        generate_button = soup.find(id='generatebutton2')
+        form = generate_button.find_parent('form') if generate_button else None
+        if form is None:
+            return None
+
+        action = urljoin(response.url, form.get('action') or response.url)
+        fields = {field['name']: field.get('value', '') for field in form.find_all('input') if field.get('name')}
+        if generate_button.get('name'):
+            fields[generate_button['name']] = generate_button.get('value', '')
+
+        if form.get('method', 'get').lower() == 'post':
+            response = session.post(action, data=fields)
+        else:
+            response = session.get(action, params=fields)
+
+    if response is None or response.status_code != 200 or not has_report(response.text):
+        return None
+    return response.text
+
+def fetch_week(week_start, week_end, mode=None):
+    # Return the page source of one week's report
+    global _http_available
+    mode = mode or FETCH_MODE
+
+    if mode == 'http':
+        if _http_available:
+            page_source = fetch_week_http(week_start, week_end)
+            if page_source is not None:
+                return page_source
+            _http_available = False
+            print("Report could not be fetched over HTTP, falling back to the browser.")
+        mode = 'wait'
+
+    driver = get_driver(mode)
+    url = week_url(week_start, week_end)
+    if mode == 'sleep':
+        return fetch_week_sleep(driver, url)
+    return fetch_week_wait(driver, url)
+
+# Function to separate the list based on entries with words
+def separate_entries(data):
+    result = []
+    current_entry = []
+    for item in data:
+        if item.isalpha() or any(char.isalpha() for char in item):
+            if current_entry:
+                result.append(current_entry)
+            current_entry = [item]
+        else:
+            current_entry.append(item)
+    if current_entry:
+        result.append(current_entry)
+    return result
+
+def parse_week(page_source, week_start, week_end):
+    # Parse the page content
+    soup = BeautifulSoup(page_source, 'html.parser')
+
+    tables = soup.find_all('table', class_=REPORT_TABLE_CLASS)
+    if tables is None:
+        raise ValueError("Table with the specified class was not found.")
+
+    dataframes = []
+
+    for table in tables:
+        row_headers = []
+        col_headers = []
+        t_head = table.find('thead')
+        t_body = table.find('tbody')
+        if t_head is None:
+            print("No thead")
+        else:
+            print("Found thead")
+            tr = t_head.find('tr')
+            for th in tr.find_all('th'):
+                col_header = th.find('div', class_='th-inner').get_text(strip=True)
+                col_headers.append(col_header)
+
+        if t_body is None:
+            print("No tbody")
+        else:
+            print("Found tbody")
+            for tr in table.find_all('tr'):
+                for td in tr.find_all('td'):
+                    row_header = td.get_text(strip=True)
+                    row_headers.append(row_header)
+
+        # Separate the tbody list
+        if t_body and t_head:
+            separated_data = separate_entries(row_headers)
+            col_headers.pop(0)
+
+            # Create a list of DataFrames for each entry
+            for entry in separated_data:
+                name = entry[0]
+                values = entry[1:]
+                if len(values) == len(col_headers):
+                    df = pd.DataFrame([values], columns=col_headers)
+                    df.insert(0, 'Category', name)  # Insert category name in the first column
+                    dataframes.append(df)
+
+    if not dataframes:
+        return None
+
+    week_df = pd.concat(dataframes, ignore_index=True)
+    week_df.insert(0, 'Week Start', week_start)  # Add a column for the week start date
+    week_df.insert(1, 'Week End', week_end)  # Add a column for the week end date
+    return week_df
+
+def fetch_week_frame(current_date, mode=None, retries=None):
+    # Fetch and parse one week, retrying only this week if it fails
+    retries = WEEK_RETRIES if retries is None else retries
+    week_start = current_date.strftime("%d/%m/%Y")
+    week_end = (current_date + timedelta(days=6)).strftime("%d/%m/%Y")
+
+    for attempt in range(retries + 1):
+        print(f"Scraping data for week from {week_start} to {week_end}...")
+        try:
+            with Run_Report.step('week fetch'):
+                page_source = fetch_week(week_start, week_end, mode)
+            with Run_Report.step('parse'):
+                week_df = parse_week(page_source, week_start, week_end)
+            Run_Report.count('pages parsed')
+            Run_Report.count('rows parsed', 0 if week_df is None else len(week_df))
+            return week_df
+        except Exception as e:
+            print(f"Attempt {attempt + 1} for week from {week_start} failed: {e}")
+            reset_driver()
+    raise RuntimeError(f"Week from {week_start} to {week_end} failed after {retries + 1} attempts")
+
+def scrape_weeks(week_dates, mode=None, workers=None):
+    # Fetch every week across a pool of workers, results are collected by week start date
+    workers = workers or BACKFILL_WORKERS
+    results = {}
+    failed = []
+
+    def run(current_date):
+        try:
+            results[current_date] = fetch_week_frame(current_date, mode)
+        except Exception as e:
+            print(e)
+            failed.append(current_date)
+
+    if workers == 1 or len(week_dates) <= 1:
+        for current_date in week_dates:
+            run(current_date)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(week_dates))) as executor:
+            list(executor.map(run, week_dates))
+
+    return results, sorted(failed)
+
+def write_weeks(output_dir, output_name, results):
+    # Write every week to its own sheet, in week order
+    sheets = {}
+    for current_date in sorted(results):
+        week_df = results[current_date]
+        if week_df is not None:
+            sheet_name = f"Week {current_date.strftime('%Y-%m-%d')}"
+            sheets[sheet_name[:31]] = week_df  # Ensure the sheet name is not too long
+            print(f"Scraped data from {week_df['Week Start'].iloc[0]} to {week_df['Week End'].iloc[0]}")
+    Data_Store.write_tables(output_dir, output_name, sheets)
+
+def scrape(output_dir, mode=None, workers=None, backfill_weeks=None):
+    try:
         # Calculate dates
         end_date = datetime.now()
-        if latest_date > end_date:
-            latest_date -= timedelta(days=7)
-
-        # For Pulling Historic Data
-        # start_date = end_date - timedelta(weeks=52)
-        # days_difference = 1
 
-        # For Pulling New Data
-        start_date = latest_date
-        difference = end_date - start_date
-        days_difference = difference.days
+        if backfill_weeks:
+            # For Pulling Historic Data
+            start_date = end_date - timedelta(weeks=backfill_weeks)
+        else:
+            # For Pulling New Data, starting from the latest pulled week
+            latest_date_str = read_last_row_first_column(output_dir, "consolidated_&_formatted_data (historical)", "New")
+            latest_date = parse_week_string(latest_date_str)
+            if latest_date > end_date:
+                latest_date -= timedelta(days=7)
+            start_date = latest_date
 
+        week_dates = []
         current_date = start_date
+        while current_date < end_date:
+            week_dates.append(current_date)
+            # Increment the current date by one week
+            current_date += timedelta(weeks=1)
 
-        if days_difference > 0:
-            # Initialize the Excel writer
-            excel_filename = os.path.join(output_dir, "sales_dashboard (new).xlsx")
-            writer = pd.ExcelWriter(excel_filename, engine='openpyxl')
-
-            while current_date < end_date:
-                week_start = current_date.strftime("%d/%m/%Y")
-                week_end = (current_date + timedelta(days=6)).strftime("%d/%m/%Y")
-                print(f"Scraping data for week from {week_start} to {week_end}...")
-                
-                base_url = f'https://www.motorist.sg/review/sales?filter=2&show_only_month=true&start={week_start}&end={week_end}&state_id='
-                
-                # Navigate to the base URL
-                #print(f"Navigating to URL: {base_url}")
-                driver.get(base_url)
-
-                # Wait for the page to load
-                #print("Waiting for page to load...")
-                time.sleep(10)
-
-                # Click the "Generate" button
-                #print("Clicking the 'Generate' button...")
-                generate_button = driver.find_element(By.ID, 'generatebutton2')
-                generate_button.click()
-
-                # Wait for data to load
-                #print("Waiting for data to load...")
-                time.sleep(20)
-
-                # Execute JavaScript to ensure the page is fully loaded
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(5)
-
-                # Print the page content for debugging
-                page_source = driver.page_source
-
-                # Parse the page content
-                #print("Parsing the page content...")
-                soup = BeautifulSoup(page_source, 'html.parser')
-            
-                tables = soup.find_all('table', class_='table table-striped table-condensed table-fixed-column table-no-bordered')
-                if tables is None:
-                    raise ValueError("Table with the specified class was not found.")        
-
-                dataframes = []
-
-                for table in tables:
-                    row_headers = []
-                    col_headers = []
-                    t_head = table.find('thead')
-                    t_body = table.find('tbody')
-                    if t_head is None:
-                        print("No thead")
-                    else:
-                        print("Found thead")
-                        tr = t_head.find('tr')
-                        for th in tr.find_all('th'):
-                            col_header = th.find('div', class_='th-inner').get_text(strip=True)
-                            col_headers.append(col_header)
-
-                    if t_body is None:
-                        print("No tbody")
-                    else:
-                        print("Found tbody")
-                        for tr in table.find_all('tr'):
-                            for td in tr.find_all('td'):
-                                row_header = td.get_text(strip=True)
-                                row_headers.append(row_header)
-                    
-                    # Function to separate the list based on entries with words
-                    def separate_entries(data):
-                        result = []
-                        current_entry = []
-                        for item in data:
-                            if item.isalpha() or any(char.isalpha() for char in item):
-                                if current_entry:
-                                    result.append(current_entry)
-                                current_entry = [item]
-                            else:
-                                current_entry.append(item)
-                        if current_entry:
-                            result.append(current_entry)
-                        return result
-
-                    # Separate the tbody list
-                    if t_body and t_head:
-                        separated_data = separate_entries(row_headers)
-                        col_headers.pop(0)
-
-                        # Create a list of DataFrames for each entry
-                        for entry in separated_data:
-                            name = entry[0]
-                            values = entry[1:]
-                            if len(values) == len(col_headers):
-                                df = pd.DataFrame([values], columns=col_headers)
-                                df.insert(0, 'Category', name)  # Insert category name in the first column
-                                dataframes.append(df)
-
-                if dataframes:
-                    week_df = pd.concat(dataframes, ignore_index=True)
-                    week_df.insert(0, 'Week Start', week_start)  # Add a column for the week start date
-                    week_df.insert(1, 'Week End', week_end)  # Add a column for the week end date
-                    sheet_name = f"Week {current_date.strftime('%Y-%m-%d')}"
-                    week_df.to_excel(writer, sheet_name=sheet_name[:31], index=False)  # Ensure the sheet name is not too long
-                    print(f"Scraped data from {week_start} to {week_end}")
-
-                # Increment the current date by one week
-                current_date += timedelta(weeks=1)
-
-            # Save the Excel file
-            writer.close()
-            print(f"Data scraped and saved to {excel_filename}")
+        if week_dates:
+            results, failed = scrape_weeks(week_dates, mode, workers)
+
+            output_name = "sales_dashboard (new)"
+            write_weeks(output_dir, output_name, results)
+            print(f"Data scraped and saved to {output_name}")
+            if failed:
+                print(f"Weeks that could not be scraped: {', '.join(d.strftime('%Y-%m-%d') for d in failed)}")
         else:
-            excel_filename = None
+            output_name = None
             print("Data is already Updated!")
-    
+
     except Exception as e:
         print(f"An error occurred: {e}")
-        excel_filename = None
+        output_name = None
+    finally:
+        quit_drivers()
+
+    return output_name
+
+def compare_modes(modes=FETCH_MODES, weeks=1):
+    # Time each fetch mode on the report fixture served by Mock_Admin_Server.py
+    import Mock_Admin_Server
+    global _http_available
+
+    server, base_url = Mock_Admin_Server.start_server(latency=0.2)
+    Fetch_Pages.set_base_url(base_url)
+    first_week = datetime(2024, 1, 1)
+    results = {}
+
+    try:
+        for mode in modes:
+            _http_available = True
+            start = time.perf_counter()
+            try:
+                frames = []
+                for week in range(weeks):
+                    current_date = first_week + timedelta(weeks=week)
+                    week_start = current_date.strftime("%d/%m/%Y")
+                    week_end = (current_date + timedelta(days=6)).strftime("%d/%m/%Y")
+                    frames.append(parse_week(fetch_week(week_start, week_end, mode), week_start, week_end))
+                results[mode] = (time.perf_counter() - start, frames)
+            except Exception as e:
+                print(f"Mode '{mode}' failed: {e}")
+            finally:
+                quit_drivers()
+    finally:
+        Session_Manager.close_session()
+        server.shutdown()
+
+    print(f"Fetch mode timings for {weeks} week(s):")
+    for mode, (elapsed, frames) in results.items():
+        rows = sum(len(frame) for frame in frames if frame is not None)
+        print(f"  {mode:<6} {elapsed:8.2f}s  {elapsed / weeks:8.2f}s per week  {rows} rows")
+
+    # Every mode should have parsed the same report
+    outputs = [frames for _, frames in results.values()]
+    if len(outputs) > 1:
+        identical = all(
+            all((a is None and b is None) or (a is not None and b is not None and a.equals(b)) for a, b in zip(outputs[0], other))
+            for other in outputs[1:]
+        )
+        print("All modes parsed identical data." if identical else "Modes parsed different data!")
+    return results
+
+def verify_weekly_runs(weeks=3):
+    # Two runs one after the other against Mock_Admin_Server.py, starting from the sample history: a backfill,
+    # then the normal run that starts from the last week the first one stored. True when the second run
+    # scraped and every stored week is a date, once
+    import contextlib
+    import io
+    import shutil
+    import tempfile
+    import Mock_Admin_Server
+    import Consolidate_Format_Data
+    import Combine_Data
+
+    sample_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Files')
+    server, base_url = Mock_Admin_Server.start_server(latency=0)
+    Fetch_Pages.set_base_url(base_url)
+    data_dir = tempfile.mkdtemp()
+    try:
+        shutil.copy(os.path.join(sample_dir, f"{Combine_Data.historical_name}.xlsx"), data_dir)
+        outputs = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for backfill_weeks in (weeks, None):
+                outputs.append(scrape(data_dir, 'http', backfill_weeks=backfill_weeks))
+                Consolidate_Format_Data.consolidate_format_data(data_dir)
+                Combine_Data.combine_data(data_dir)
+        dates = Data_Store.read_table(data_dir, Combine_Data.historical_name, 'New')['Date']
     finally:
-        print("Quitting the browser...")
-        driver.quit()
+        Session_Manager.close_session()
+        server.shutdown()
+        shutil.rmtree(data_dir)
 
-    return excel_filename
+    checks = {
+        'first run scraped': outputs[0] is not None,
+        'second run scraped': outputs[1] is not None,
+        'weeks stored as dates': pd.api.types.is_datetime64_any_dtype(dates),
+        'every week stored once': len(dates) > 0 and dates.is_unique and dates.is_monotonic_increasing,
+    }
+    for check, passed in checks.items():
+        print(f"{check:<24} {passed}")
+    return all(checks.values())
 
-def main_salesdashboard():
+def main_salesdashboard(mode=None, workers=None, backfill_weeks=None):
     if getattr(sys, 'frozen', False):
         # When running as a bundled executable (e.g., PyInstaller)
         script_dir = os.path.dirname(sys.executable)
-        excel_file = scrape(script_dir)
+        output_name = scrape(script_dir, mode, workers, backfill_weeks)
     else:
         # When running as a script
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        excel_file = scrape(script_dir)
+        output_name = scrape(script_dir, mode, workers, backfill_weeks)
     
-    if excel_file:
-        print(f"Excel file saved at {excel_file}")
+    if output_name:
+        print(f"Sales dashboard saved as {output_name}")
     else:
         print("No file was saved.")
 
 if __name__ == '__main__':
-    main_salesdashboard()
+    parser = argparse.ArgumentParser(description="Scrape the weekly sales dashboard")
+    parser.add_argument('--mode', choices=FETCH_MODES, default=None, help="How each week's report is fetched")
+    parser.add_argument('--backfill-weeks', type=int, default=None, help="Scrape this many past weeks instead of only new ones")
+    parser.add_argument('--workers', type=int, default=None, help="Weeks scraped at the same time")
+    parser.add_argument('--compare-modes', action='store_true', help="Time every fetch mode on a local fixture page")
+    parser.add_argument('--weeks', type=int, default=1, help="Weeks to fetch with --compare-modes")
+    parser.add_argument('--verify-weekly-runs', action='store_true',
+                        help="Backfill and then run again against Mock_Admin_Server.py, check the second run resumes")
+    args = parser.parse_args()
+
+    if args.compare_modes:
+        compare_modes(weeks=args.weeks)
+    elif args.verify_weekly_runs:
+        sys.exit(0 if verify_weekly_runs() else 1)
+    else:
+        main_salesdashboard(args.mode, args.workers, args.backfill_weeks)
@@ -0,0 +1,125 @@
+from urllib.parse import urlsplit
+import threading
+import pickle
+import time
+import os
+import sys
+import Fetch_Pages
+import Run_Report
+
+# One logged in session shared by every scraper for the whole run. The cookie jar is saved to disk so the
+# next run can skip the login, and the session only logs in again when the site answers with the login page.
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+SESSION_FILE = os.environ.get('SESSION_FILE', os.path.join(script_dir, "admin_session.pkl"))
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 8 * 60 * 60))  # Seconds a saved cookie jar is trusted for
+
+_session = None
+_login_count = 0  # Bumped on every login so concurrent workers only log in again once
+_lock = threading.Lock()
+
+def _load_cookies(session):
+    if not os.path.exists(SESSION_FILE):
+        return False
+    try:
+        with open(SESSION_FILE, 'rb') as f:
+            saved = pickle.load(f)
+    except Exception as e:
+        print(f"Error reading saved session {SESSION_FILE}: {e}")
+        return False
+
+    if saved.get('base_url') != Fetch_Pages.BASE_URL or saved.get('expires_at', 0) < time.time():
+        print("Saved session has expired.")
+        return False
+
+    session.cookies.update(saved['cookies'])
+    print("Reusing saved session.")
+    return True
+
+def _save_cookies(session):
+    saved = {
+        'base_url': Fetch_Pages.BASE_URL,
+        'expires_at': time.time() + SESSION_TTL,
+        'cookies': session.cookies,
+    }
+    try:
+        with open(SESSION_FILE, 'wb') as f:
+            pickle.dump(saved, f)
+    except Exception as e:
+        print(f"Error saving session to {SESSION_FILE}: {e}")
+
+def _login(session):
+    global _login_count
+    session.cookies.clear()
+    with Run_Report.step('login'):
+        logged_in = Fetch_Pages.login(session)
+    if not logged_in:
+        Run_Report.count('login failures')
+        return False
+    Run_Report.count('logins')
+    _login_count += 1
+    _save_cookies(session)
+    return True
+
+def get_session():
+    # Return the shared session, logging in only if there is no usable saved cookie jar
+    global _session
+    with _lock:
+        if _session is None:
+            session = Fetch_Pages.open_session()
+            if not _load_cookies(session) and not _login(session):
+                session.close()
+                return None
+            _session = session
+        return _session
+
+def save_session():
+    # Log in before the scrapers start (a pipeline stage), so scrapers in other processes reuse the saved cookie jar
+    if get_session() is None:
+        raise RuntimeError("Could not log in to the admin site")
+
+def is_logged_out(response):
+    # The site sends logged out requests back to the login form
+    if response is None:
+        return False
+    if 'admin-login' in urlsplit(response.url).path:
+        return True
+    return 'user_admin[password]' in response.text and 'Logout' not in response.text
+
+def reauthenticate(seen_login_count):
+    # Log in again unless another worker already did since seen_login_count was read
+    with _lock:
+        if _session is None:
+            return False
+        if _login_count != seen_login_count:
+            return True
+        print("Session expired, logging in again...")
+        return _login(_session)
+
+def fetch_pages(urls):
+    # Fetch urls with the shared session, logging in again once if any page came back logged out
+    session = get_session()
+    if session is None:
+        return [None for _ in urls]
+
+    seen_login_count = _login_count
+    responses = Fetch_Pages.fetch_pages(session, urls)
+    logged_out = [i for i, response in enumerate(responses) if is_logged_out(response)]
+    if logged_out and reauthenticate(seen_login_count):
+        retried = Fetch_Pages.fetch_pages(session, [urls[i] for i in logged_out])
+        for i, response in zip(logged_out, retried):
+            responses[i] = response
+    return responses
+
+def close_session():
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
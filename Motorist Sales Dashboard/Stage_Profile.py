@@ -0,0 +1,119 @@
+import threading
+import argparse
+import importlib
+import time
+import os
+import re
+import sys
+import io
+
+# Opt-in cProfile and tracemalloc around the main_* entry point of chosen pipeline stages. PIPELINE_PROFILE (or
+# Pipeline.py --profile) names the stages, comma separated, by stage name or by function ('sold',
+# 'main_combine_data', 'Marketshare.main_marketshare', 'all'). Every profiled stage writes into PROFILE_DIR
+#   <stage>_<time>.pstats - the cProfile statistics, open them with python -m pstats
+#   <stage>_<time>.txt    - the PROFILE_TOP functions by cumulative time, the peak traced memory and the
+#                           PROFILE_TOP lines holding the most memory at the highest point seen
+# cProfile only sees the thread the entry point runs in, pages fetched by the worker threads show up as time
+# spent waiting for them. tracemalloc sees every thread but makes a stage several times slower, set
+# PIPELINE_PROFILE_MEMORY=0 to leave it out. Stages that are not chosen are called exactly as before, nothing
+# is imported or started for them. Profile a single entry point outside the pipeline with
+#   python Stage_Profile.py Combine_Data.main_combine_data
+
+if getattr(sys, 'frozen', False):
+    # When running as a bundled executable (e.g., PyInstaller)
+    script_dir = os.path.dirname(sys.executable)
+else:
+    # When running as a script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+PROFILE = os.environ.get('PIPELINE_PROFILE', '')
+PROFILE_DIR = os.environ.get('PIPELINE_PROFILE_DIR', os.path.join(script_dir, "profiles"))
+PROFILE_TOP = int(os.environ.get('PIPELINE_PROFILE_TOP', 20))
+PROFILE_MEMORY = os.environ.get('PIPELINE_PROFILE_MEMORY', '1').lower() in ('1', 'true', 'yes')
+PEAK_INTERVAL = 0.2  # Seconds between looks at the traced memory
+PEAK_GROWTH = 1.1  # A new snapshot is taken once the traced memory grew this much past the last one
+
+def chosen(name, target, profile=None):
+    # True when the stage is named in profile (a list, or a comma separated string), PROFILE by default
+    profile = PROFILE if profile is None else profile
+    if not profile:
+        return False
+    names = profile.split(',') if isinstance(profile, str) else profile
+    names = {entry.strip().lower() for entry in names}
+    return bool(names & {'all', name.lower(), target.lower(), target.rsplit('.', 1)[-1].lower()})
+
+def _watch_peak(stop, peak):
+    # Keep the snapshot taken at the highest traced memory seen
+    import tracemalloc
+    while not stop.wait(PEAK_INTERVAL):
+        current = tracemalloc.get_traced_memory()[0]
+        if current > peak['size'] * PEAK_GROWTH:
+            peak['size'] = current
+            peak['snapshot'] = tracemalloc.take_snapshot()
+
+def _memory_summary(peak, peak_size, top):
+    import tracemalloc
+    lines = [f"Peak traced memory {peak_size / 1024 ** 2:.1f} MB"]
+    if peak['snapshot'] is None:
+        return lines[0]
+    snapshot = peak['snapshot'].filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    lines.append(f"Top {top} lines at {peak['size'] / 1024 ** 2:.1f} MB traced, the highest point seen")
+    for statistic in snapshot.statistics('lineno')[:top]:
+        frame = statistic.traceback[0]
+        lines.append(f"  {statistic.size / 1024 ** 2:8.2f} MB {statistic.count:>9,} blocks  {frame.filename}:{frame.lineno}")
+    return '\n'.join(lines)
+
+def profile_call(name, function, profile_dir=None, top=None, memory=None):
+    # Call function() under cProfile (and tracemalloc), write the files for the stage and return the path of
+    # the .pstats file. The files are written even when the function raises or is stopped with Ctrl+C
+    import cProfile
+    import pstats
+    import tracemalloc
+    profile_dir = profile_dir or PROFILE_DIR
+    top = PROFILE_TOP if top is None else top
+    memory = (PROFILE_MEMORY if memory is None else memory) and not tracemalloc.is_tracing()
+    os.makedirs(profile_dir, exist_ok=True)
+    stem = os.path.join(profile_dir, f"{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+    profiler = cProfile.Profile()
+    peak = {'size': 0, 'snapshot': None}
+    if memory:
+        tracemalloc.start()
+        stop = threading.Event()
+        watcher = threading.Thread(target=_watch_peak, args=(stop, peak), daemon=True)
+        watcher.start()
+    start = time.perf_counter()
+    try:
+        profiler.runcall(function)
+    finally:
+        seconds = time.perf_counter() - start
+        summary = [f"Stage '{name}', {seconds:.2f}s"]
+        if memory:
+            stop.set()
+            watcher.join()
+            current, peak_size = tracemalloc.get_traced_memory()
+            if current > peak['size']:
+                peak['size'], peak['snapshot'] = current, tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            summary.append(_memory_summary(peak, peak_size, top))
+
+        profiler.dump_stats(f"{stem}.pstats")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+        summary.append(f"Top {top} functions by cumulative time\n{stream.getvalue().strip()}")
+        with open(f"{stem}.txt", 'w') as f:
+            f.write('\n\n'.join(summary) + '\n')
+        print(f"Profile of '{name}' written to {stem}.pstats and {stem}.txt")
+    return f"{stem}.pstats"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Profile a main_* entry point with cProfile and tracemalloc")
+    parser.add_argument('target', help="Module.function, e.g. Sold.main_sold")
+    parser.add_argument('--profile-dir', default=PROFILE_DIR)
+    parser.add_argument('--top', type=int, default=PROFILE_TOP)
+    parser.add_argument('--no-memory', action='store_true', help="Only cProfile, without tracemalloc")
+    args = parser.parse_args()
+
+    module_name, function_name = args.target.rsplit('.', 1)
+    function = getattr(importlib.import_module(module_name), function_name)
+    profile_call(args.target, function, args.profile_dir, args.top, False if args.no_memory else None)
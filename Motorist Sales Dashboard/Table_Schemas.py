@@ -0,0 +1,150 @@
+import pandas as pd
+import argparse
+import time
+
+# Column types of the stored tables. The admin site shows numbers and dates as text ('$12,345', '45%',
+# '1,204', '28/02/2024', 'Week 2024-01-05'), the filter stages convert them once with the formats below
+# before the tables are written, so salescalculation and the dashboards read numbers and dates directly.
+# Tables stored before that are converted by the same functions when they are read, a column that already
+# has its type is passed through untouched.
+#   'currency' - '$12,345' -> 12345
+#   'percent'  - '45%' -> 45, percentage points as the dashboards show them
+#   'count'    - '1,204' -> 1204
+#   'date'     - DATE_FORMAT, as the admin site writes dates (a time after it is ignored)
+#   'week'     - WEEK_FORMAT, the first day of the week in the consolidated sheets
+# Columns that are not listed keep the types Data_Store gives them.
+
+DATE_FORMAT = '%d/%m/%Y'
+WEEK_FORMAT = '%Y-%m-%d'  # Found anywhere in the value, the sheets write 'Week 2024-01-05'
+
+NUMBER_PATTERNS = {
+    'currency': r'[\$,]',
+    'percent': r'[%,]',
+    'count': r',',
+}
+
+# Enquiry columns, typed the same way in every sheet they appear in
+ENQUIRY_COLUMNS = {
+    'No of Offers': 'count',
+    'Highest Offer': 'currency',
+    'Price': 'currency',
+    'Created Date': 'date',
+    'Follow-Up Date': 'date',
+    'Closing Date': 'date',
+    'Appointment Date': 'date',
+    'Sold Date': 'date',
+    'Void Date': 'date',
+}
+
+# Columns of the weekly sales report, one sheet per report row once consolidated
+REPORT_COLUMNS = [
+    "New", "Scrap", "Quotation", "Consignment", "Sales", "Coe Renewal",
+    "Loan Paperwork", "Consignment Purchase", "Dealer Purchase", "Floor",
+    "Purchases", "Insurances", "Total"
+]
+# Report rows that are not counts
+REPORT_ROW_TYPES = {
+    'Revenue': 'currency',
+    'Conversion': 'percent',
+    'Conversion_1': 'percent',
+}
+
+def report_sheet_columns(sheet):
+    column_type = REPORT_ROW_TYPES.get(sheet, 'count')
+    return {'Date': 'week', **{column: column_type for column in REPORT_COLUMNS}}
+
+# Stored table -> {sheet: {column: type}} with None for every other sheet, or a function of the sheet name
+SCHEMAS = {
+    "filtered_new_data": {None: ENQUIRY_COLUMNS},
+    "filtered_scrapexport_data": {None: ENQUIRY_COLUMNS},
+    "filtered_quotation_data": {None: ENQUIRY_COLUMNS},
+    "filtered_consignment_data": {None: ENQUIRY_COLUMNS},
+    "filtered_sold_data": {None: ENQUIRY_COLUMNS},
+    "filtered_void_data": {None: ENQUIRY_COLUMNS},
+    "consolidated_&_formatted_data (new)": report_sheet_columns,
+    "consolidated_&_formatted_data (historical)": report_sheet_columns,
+    "cleaned_consolidated_data": report_sheet_columns,
+}
+
+def sheet_schema(name, sheet):
+    schema = SCHEMAS.get(name)
+    if schema is None:
+        return {}
+    if callable(schema):
+        return schema(sheet)
+    return schema.get(sheet, schema.get(None, {}))
+
+def has_type(series, column_type):
+    if column_type in ('date', 'week'):
+        return pd.api.types.is_datetime64_any_dtype(series)
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+def convert_column(series, column_type):
+    if column_type is None or has_type(series, column_type):
+        return series
+    text = series.astype('string')
+    if column_type == 'date':
+        return pd.to_datetime(text, format=DATE_FORMAT, exact=False, errors='coerce')
+    if column_type == 'week':
+        return pd.to_datetime(text, format=WEEK_FORMAT, exact=False, errors='coerce')
+    numbers = pd.to_numeric(text.str.replace(NUMBER_PATTERNS[column_type], '', regex=True).str.strip(), errors='coerce')
+    # Plain NumPy types like the columns Data_Store reads, whole numbers without gaps as integers
+    numbers = numbers.astype('float64')
+    if numbers.notna().all() and (numbers % 1 == 0).all():
+        return numbers.astype('int64')
+    return numbers
+
+def convert_table(name, sheet, df):
+    # df with the columns of the schema converted, the same frame if there is nothing to convert
+    schema = sheet_schema(name, sheet)
+    converted = {column: convert_column(df[column], column_type)
+                 for column, column_type in schema.items()
+                 if column in df.columns and not has_type(df[column], column_type)}
+    if not converted:
+        return df
+    df = df.copy(deep=False)
+    for column, series in converted.items():
+        df[column] = series
+    return df
+
+def convert_tables(name, tables):
+    return {sheet: convert_table(name, sheet, df) for sheet, df in tables.items()}
+
+def is_typed(name, tables):
+    # True when every column of the schema already has its type
+    return all(convert_table(name, sheet, df) is df for sheet, df in tables.items())
+
+def benchmark(rows=100000, repeat=5):
+    # Cleaning the display strings on every read as before, against reading columns that were typed once
+    import numpy as np
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame({
+        'No of Offers': rng.integers(0, 30, rows).astype(str),
+        'Highest Offer': pd.Series(rng.integers(5000, 150000, rows)).map('${:,}'.format),
+        'Follow-Up Date': pd.Series(pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')).dt.strftime(DATE_FORMAT),
+    })
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        offers = pd.to_numeric(raw['Highest Offer'].replace({r'\$': '', ',': ''}, regex=True), errors='coerce')
+        dates = pd.to_datetime(raw['Follow-Up Date'], errors='coerce', dayfirst=True)
+    per_read = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    typed = convert_table("filtered_quotation_data", "Followup", raw)
+    once = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        convert_table("filtered_quotation_data", "Followup", typed)
+    typed_read = (time.perf_counter() - start) / repeat
+
+    same = offers.tolist() == typed['Highest Offer'].tolist() and dates.tolist() == typed['Follow-Up Date'].tolist()
+    print(f"{rows:,} rows: cleaning per read {per_read * 1000:.1f} ms, typing once {once * 1000:.1f} ms, "
+          f"typed read {typed_read * 1000:.3f} ms, same values: {same}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Column types of the stored tables")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
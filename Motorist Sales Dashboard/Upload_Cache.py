@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from io import BytesIO
+import pandas as pd
+import threading
+import argparse
+import hashlib
+import base64
+import time
+import os
+
+# Uploaded bid files for the Dealer dashboards, parsed once and kept on the server. The browser only holds the
+# key (a hash of the file content) in its dcc.Store, so changing the sheet or the date range is a filter on a
+# DataFrame already in memory. The least recently used uploads are dropped once the cache is over MAX_BYTES.
+
+MAX_BYTES = int(float(os.environ.get('DEALER_UPLOAD_CACHE_MB', 512)) * 1024 * 1024)
+
+CSV_SHEET = 'csv'  # A CSV upload is kept as a single sheet under this name
+
+_cache = OrderedDict()  # key -> {'filename', 'sheets', 'derived', 'bytes'}
+_cache_lock = threading.Lock()
+_cache_bytes = 0
+
+stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def file_type(filename):
+    if 'xls' in filename:
+        return 'excel'
+    elif 'csv' in filename:
+        return 'csv'
+    return None
+
+def parse_file(decoded, filename):
+    # {sheet: DataFrame} with the 'Date' column already parsed
+    if file_type(filename) == 'excel':
+        sheets = pd.read_excel(BytesIO(decoded), sheet_name=None)
+    else:
+        sheets = {CSV_SHEET: pd.read_csv(BytesIO(decoded))}
+
+    for df in sheets.values():
+        if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce', format='%d/%m/%y')
+    return sheets
+
+def store_upload(contents, filename):
+    # Parse a dcc.Upload 'contents' string unless the same file is already cached, return its key
+    global _cache_bytes
+    decoded = base64.b64decode(contents.split(',')[1])
+    key = f"{hashlib.sha256(decoded).hexdigest()}.{file_type(filename)}"
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            stats['hits'] += 1
+            return key
+
+    start = time.perf_counter()
+    sheets = parse_file(decoded, filename)
+    size = sum(int(df.memory_usage(deep=True).sum()) for df in sheets.values())
+    print(f"Parsed {filename}: {len(sheets)} sheets, {size / 1e6:.1f} MB in memory, {time.perf_counter() - start:.2f}s")
+
+    with _cache_lock:
+        stats['misses'] += 1
+        if key not in _cache:
+            _cache[key] = {'filename': filename, 'sheets': sheets, 'derived': {}, 'bytes': size}
+            _cache_bytes += size
+        _cache.move_to_end(key)
+
+        # Drop the least recently used uploads, the one just stored always stays
+        while _cache_bytes > MAX_BYTES and len(_cache) > 1:
+            evicted_key, evicted = _cache.popitem(last=False)
+            _cache_bytes -= evicted['bytes']
+            stats['evictions'] += 1
+            print(f"Dropped {evicted['filename']} from the upload cache")
+    return key
+
+def sheet_names(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        return list(entry['sheets']) if entry is not None else []
+
+def get_sheet(key, sheet):
+    # The parsed sheet or None once the upload was dropped. A shallow copy, new columns do not reach the cache
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None or sheet not in entry['sheets']:
+            return None
+        _cache.move_to_end(key)
+        return entry['sheets'][sheet].copy(deep=False)
+
+def derived(key, sheet, name, build, size=None):
+    # build(sheet DataFrame), computed on the first call and kept (and dropped) with the upload, None once the
+    # upload was dropped
+    global _cache_bytes
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None or sheet not in entry['sheets']:
+            return None
+        _cache.move_to_end(key)
+        value = entry['derived'].get((sheet, name))
+        if value is not None:
+            return value
+        df = entry['sheets'][sheet]
+
+    value = build(df)
+    added = size(value) if size is not None else 0
+    with _cache_lock:
+        if _cache.get(key) is entry and (sheet, name) not in entry['derived']:
+            entry['derived'][(sheet, name)] = value
+            entry['bytes'] += added
+            _cache_bytes += added
+    return value
+
+def clear():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+def benchmark(rows=200000, dealers=300, clicks=10):
+    # A synthetic bid workbook, re-parsed on every click as before against one parse and cached lookups
+    dates = pd.date_range('2023-01-01', periods=730, freq='D')
+    index = pd.RangeIndex(rows)
+    df = pd.DataFrame({
+        'Date': dates[index % len(dates)].strftime('%d/%m/%y'),
+        'Dealer Name': 'Dealer ' + (index * 7919 % dealers).astype(str),
+        'Bids': index % 13,
+    })
+    buffer = BytesIO()
+    df.to_excel(buffer, sheet_name='Bids', index=False)
+    contents = 'data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,' + \
+        base64.b64encode(buffer.getvalue()).decode()
+    print(f"{rows:,} rows, workbook {len(buffer.getvalue()) / 1e6:.1f} MB, upload string {len(contents) / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    for _ in range(clicks):
+        decoded = base64.b64decode(contents.split(',')[1])
+        previous = pd.read_excel(pd.ExcelFile(BytesIO(decoded)), sheet_name='Bids')
+        previous['Date'] = pd.to_datetime(previous['Date'], errors='coerce', format='%d/%m/%y')
+    per_click = (time.perf_counter() - start) / clicks
+
+    clear()
+    start = time.perf_counter()
+    key = store_upload(contents, 'bids.xlsx')
+    parse = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(clicks):
+        cached = get_sheet(key, 'Bids')
+    cached_click = (time.perf_counter() - start) / clicks
+
+    print(f"Re-parsing per click {per_click:.2f}s, parsing once {parse:.2f}s then {cached_click * 1000:.3f} ms per click")
+    print(f"Same data: {previous.equals(cached)}, browser holds {len(key)} bytes instead of {len(contents):,}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Server-side cache of the Dealer uploads")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--clicks', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.rows, clicks=args.clicks)
@@ -2,6 +2,11 @@ import pandas as pd
 import datetime
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import Data_Store
+import Table_Schemas
 
 currentdate = datetime.datetime.now()
 currentmonth = currentdate.month
@@ -11,158 +16,171 @@ if getattr(sys, 'frozen', False):
 else:
     # When running as a script
     script_directory = os.path.dirname(os.path.abspath(__file__))
-index = [
-    'New Count New', 
-    'New Count FollowUp', 
-    'Scrap/Export Count (Active New)', 
-    'Scrap/Export Total Number of Offers (Active New)', 
-    'Scrap/Export Total Sum of Offers (Active New)', 
-    'Scrap/Export Highest Offer (Active New)',
-    'Scrap/Export Count (Active Requote)', 
-    'Scrap/Export Total Number of Offers (Active Requote)', 
-    'Scrap/Export Total Sum of Offers (Active Requote)', 
-    'Scrap/Export Highest Offer (Active Requote)',
-    'Scrap/Export Count (Followup)', 
-    'Scrap/Export Count Overdue (Followup)',
-    'Scrap/Export Count (Appointment)', 
-    'Scrap/Export Highest Number of Offers (Appointment)', 
-    'Scrap/Export Average Number of Offers (Appointment)',
-    'Quotation Count (Active New)', 
-    'Quotation Total Number of Offers (Active New)', 
-    'Quotation Total Sum of Offers (Active New)', 
-    'Quotation Highest Offer (Active New)',
-    'Quotation Count (Active Requote)', 
-    'Quotation Total Number of Offers (Active Requote)', 
-    'Quotation Total Sum of Offers (Active Requote)', 
-    'Quotation Highest Offer (Active Requote)',
-    'Quotation Count (Followup)', 
-    'Quotation Count Overdue (Followup)',
-    'Quotation Total Number of Offers (Followup)',
-    'Quotation Highest Number of Offers (Followup)',
-    'Quotation Total Sum of Offers (Followup)',
-    'Quotation Highest Offer (Followup)',
-    'Quotation Count (Appointment)', 
-    'Quotation Highest Number of Offers (Appointment)', 
-    'Quotation Average Number of Offers (Appointment)',
-    'Sold Count of Sold',
-    'Sold Total Sum of Price',
-    'Sold Highest Price Sold',
-    'Void Count of Void'
+# Stored tables the summary is calculated from
+NEW = "filtered_new_data"
+SE = "filtered_scrapexport_data"
+QN = "filtered_quotation_data"
+SOLD = "filtered_sold_data"
+VOID = "filtered_void_data"
+input_names = [NEW, SE, QN, SOLD, VOID]
+
+# Every metric of the summary, in the order it is shown:
+#   (name, source, sheet, aggregation, column, category, format)
+# sheet None is the first sheet of the source, aggregation is 'count', 'sum', 'max', 'mean' or 'overdue'
+# (rows whose date is before now). 'max' and 'mean' of plain numbers are rounded to whole numbers.
+metric_table = [
+    ('New Count New', NEW, 'New', 'count', None, 'New', 'number'),
+    ('New Count FollowUp', NEW, 'Followup', 'count', None, 'New', 'number'),
+
+    ('Scrap/Export Count (Active New)', SE, 'Active New', 'count', None, 'Scrap/Export', 'number'),
+    ('Scrap/Export Total Number of Offers (Active New)', SE, 'Active New', 'sum', 'No of Offers', 'Scrap/Export', 'number'),
+    ('Scrap/Export Total Sum of Offers (Active New)', SE, 'Active New', 'sum', 'Highest Offer', 'Scrap/Export', 'currency'),
+    ('Scrap/Export Highest Offer (Active New)', SE, 'Active New', 'max', 'Highest Offer', 'Scrap/Export', 'currency'),
+    ('Scrap/Export Count (Active Requote)', SE, 'Active Requote', 'count', None, 'Scrap/Export', 'number'),
+    ('Scrap/Export Total Number of Offers (Active Requote)', SE, 'Active Requote', 'sum', 'No of Offers', 'Scrap/Export', 'number'),
+    ('Scrap/Export Total Sum of Offers (Active Requote)', SE, 'Active Requote', 'sum', 'Highest Offer', 'Scrap/Export', 'currency'),
+    ('Scrap/Export Highest Offer (Active Requote)', SE, 'Active Requote', 'max', 'Highest Offer', 'Scrap/Export', 'currency'),
+    ('Scrap/Export Count (Followup)', SE, 'Followup', 'count', None, 'Scrap/Export', 'number'),
+    ('Scrap/Export Count Overdue (Followup)', SE, 'Followup', 'overdue', 'Follow-Up Date', 'Scrap/Export', 'number'),
+    ('Scrap/Export Count (Appointment)', SE, 'Appointment', 'count', None, 'Scrap/Export', 'number'),
+    ('Scrap/Export Highest Number of Offers (Appointment)', SE, 'Appointment', 'max', 'No of Offers', 'Scrap/Export', 'number'),
+    ('Scrap/Export Average Number of Offers (Appointment)', SE, 'Appointment', 'mean', 'No of Offers', 'Scrap/Export', 'number'),
+
+    ('Quotation Count (Active New)', QN, 'Active New', 'count', None, 'Quotation', 'number'),
+    ('Quotation Total Number of Offers (Active New)', QN, 'Active New', 'sum', 'No of Offers', 'Quotation', 'number'),
+    ('Quotation Total Sum of Offers (Active New)', QN, 'Active New', 'sum', 'Highest Offer', 'Quotation', 'currency'),
+    ('Quotation Highest Offer (Active New)', QN, 'Active New', 'max', 'Highest Offer', 'Quotation', 'currency'),
+    ('Quotation Count (Active Requote)', QN, 'Active Requote', 'count', None, 'Quotation', 'number'),
+    ('Quotation Total Number of Offers (Active Requote)', QN, 'Active Requote', 'sum', 'No of Offers', 'Quotation', 'number'),
+    ('Quotation Total Sum of Offers (Active Requote)', QN, 'Active Requote', 'sum', 'Highest Offer', 'Quotation', 'currency'),
+    ('Quotation Highest Offer (Active Requote)', QN, 'Active Requote', 'max', 'Highest Offer', 'Quotation', 'currency'),
+    ('Quotation Count (Followup)', QN, 'Followup', 'count', None, 'Quotation', 'number'),
+    ('Quotation Count Overdue (Followup)', QN, 'Followup', 'overdue', 'Follow-Up Date', 'Quotation', 'number'),
+    ('Quotation Total Number of Offers (Followup)', QN, 'Followup', 'sum', 'No of Offers', 'Quotation', 'number'),
+    ('Quotation Highest Number of Offers (Followup)', QN, 'Followup', 'max', 'No of Offers', 'Quotation', 'number'),
+    ('Quotation Total Sum of Offers (Followup)', QN, 'Followup', 'sum', 'Highest Offer', 'Quotation', 'currency'),
+    ('Quotation Highest Offer (Followup)', QN, 'Followup', 'max', 'Highest Offer', 'Quotation', 'currency'),
+    ('Quotation Count (Appointment)', QN, 'Appointment', 'count', None, 'Quotation', 'number'),
+    ('Quotation Highest Number of Offers (Appointment)', QN, 'Appointment', 'max', 'No of Offers', 'Quotation', 'number'),
+    ('Quotation Average Number of Offers (Appointment)', QN, 'Appointment', 'mean', 'No of Offers', 'Quotation', 'number'),
+
+    ('Sold Count of Sold', SOLD, None, 'count', None, 'Sold', 'number'),
+    ('Sold Total Sum of Price', SOLD, None, 'sum', 'Price', 'Sold', 'currency'),
+    ('Sold Highest Price Sold', SOLD, None, 'max', 'Price', 'Sold', 'currency'),
+
+    ('Void Count of Void', VOID, None, 'count', None, 'Void', 'number'),
+]
+metrics = [
+    dict(zip(('name', 'source', 'sheet', 'aggregation', 'column', 'category', 'format'), entry))
+    for entry in metric_table
 ]
 
-def clean_and_convert(column):
-    column = column.replace({'\$': '', ',': ''}, regex=True)
-    return pd.to_numeric(column, errors='coerce')
-    
-
-def calculate_new():
-    new_path =  os.path.join(script_directory,"filtered_new_data.xlsx") 
-    new = pd.read_excel(new_path, "New")
-    tabulated_results.append(new.shape[0])
-    
-    new_fu = pd.read_excel(new_path, "Followup")
-    tabulated_results.append(new_fu.shape[0])
-    
-    return tabulated_results
-
-def calculate_se():
-    se_path =  os.path.join(script_directory,"filtered_scrapexport_data.xlsx") 
-    se_an = pd.read_excel(se_path, "Active New")
-    se_an['Highest Offer'] = clean_and_convert(se_an['Highest Offer'])
-
-    tabulated_results.append(se_an.shape[0])
-    tabulated_results.append(se_an['No of Offers'].sum())
-    tabulated_results.append((se_an['Highest Offer'].sum()))
-    tabulated_results.append((se_an['Highest Offer'].max()))
-
-    se_ar = pd.read_excel(se_path, "Active Requote")
-    se_ar['Highest Offer'] = clean_and_convert(se_ar['Highest Offer'])
-
-    tabulated_results.append(se_ar.shape[0])
-    tabulated_results.append(se_ar['No of Offers'].sum())
-    tabulated_results.append((se_ar['Highest Offer'].sum()))
-    tabulated_results.append((se_ar['Highest Offer'].max()))
-
-    se_fu = pd.read_excel(se_path, "Followup")
-    tabulated_results.append(se_fu.shape[0])
-    se_fu['Follow-Up Date'] = pd.to_datetime(se_fu['Follow-Up Date'], errors='coerce')
-    tabulated_results.append(se_fu[se_fu['Follow-Up Date'] < datetime.datetime.now()].shape[0])
-
-    se_ap = pd.read_excel(se_path, "Appointment")
-    tabulated_results.append(se_ap.shape[0])
-    tabulated_results.append(round(se_ap['No of Offers'].max(), 0))
-    tabulated_results.append(round(se_ap['No of Offers'].mean(), 0))
-    
-    return tabulated_results
-
-def calculate_qn():
-    qn_path =  os.path.join(script_directory,"filtered_quotation_data.xlsx") 
-    qn_an = pd.read_excel(qn_path, "Active New")
-    qn_an['Highest Offer'] = clean_and_convert(qn_an['Highest Offer'])
-
-    tabulated_results.append(qn_an.shape[0])
-    tabulated_results.append(qn_an['No of Offers'].sum())
-    tabulated_results.append((qn_an['Highest Offer'].sum()))
-    tabulated_results.append((qn_an['Highest Offer'].max()))
-
-    qn_ar = pd.read_excel(qn_path, "Active Requote")
-    qn_ar['Highest Offer'] = clean_and_convert(qn_ar['Highest Offer'])
-
-    tabulated_results.append(qn_ar.shape[0])
-    tabulated_results.append(qn_ar['No of Offers'].sum())
-    tabulated_results.append((qn_ar['Highest Offer'].sum()))
-    tabulated_results.append((qn_ar['Highest Offer'].max()))
-
-    qn_fu = pd.read_excel(qn_path, "Followup")
-    qn_fu['Highest Offer'] = clean_and_convert(qn_fu['Highest Offer'])
-    qn_fu['Follow-Up Date'] = pd.to_datetime(qn_fu['Follow-Up Date'], errors='coerce')
-
-    tabulated_results.append(qn_fu.shape[0])
-    tabulated_results.append(qn_fu[qn_fu['Follow-Up Date'] < datetime.datetime.now()].shape[0])
-    tabulated_results.append(qn_fu['No of Offers'].sum())
-    tabulated_results.append(round(qn_fu['No of Offers'].max(), 0))
-    tabulated_results.append((qn_fu['Highest Offer'].sum()))
-    tabulated_results.append((qn_fu['Highest Offer'].max()))
-
-    qn_ap = pd.read_excel(qn_path, "Appointment")
-    tabulated_results.append(qn_ap.shape[0])
-    tabulated_results.append(round(qn_ap['No of Offers'].max(), 0))
-    tabulated_results.append(round(qn_ap['No of Offers'].mean(), 0))
-    
-    return tabulated_results
-
-def calculate_sold():
-    sold_path =  os.path.join(script_directory,"filtered_sold_data.xlsx") 
-    sold = pd.read_excel(sold_path)
-    sold['Price'] = clean_and_convert(sold['Price'])
-
-    tabulated_results.append(sold.shape[0])
-    tabulated_results.append((sold['Price'].sum()))
-    tabulated_results.append((sold['Price'].max()))
-    
-    return tabulated_results
-
-def calculate_void():
-    void_path =  os.path.join(script_directory,"filtered_void_data.xlsx") 
-    void = pd.read_excel(void_path)
-    tabulated_results.append(void.shape[0])
-    
-    return tabulated_results
-
-def salescalculation():
-    global tabulated_results
-    tabulated_results = []
-    calculate_new()
-    calculate_se()
-    calculate_qn()
-    calculate_sold()
-    calculate_void()
+# Plotly value format and prefix of each metric format
+value_formats = {
+    'number': (",.0f", ""),
+    'currency': (",.2f", "$")
+}
+
+index = [metric['name'] for metric in metrics]
+sales_categories = list(dict.fromkeys(metric['category'] for metric in metrics))
+metric_to_category = {metric['name']: metric['category'] for metric in metrics}
+metric_formats = {metric['name']: value_formats[metric['format']] for metric in metrics}
+
+# Last summary per folder together with the signature of the inputs it was calculated from
+_cache = {}
+_cache_lock = threading.Lock()
+
+# Seconds spent loading each source in the last run
+load_times = {}
+
+def load_tables(script_dir, name, sheets=None, columns=None):
+    # One read per source, only the sheets and columns the metrics use ('Seller' keeps the row counts)
+    start = time.perf_counter()
+    tables = Data_Store.read_tables(script_dir, name, sheets=sheets, columns=['Seller'] + (columns or []))
+    # The filters store prices and dates typed, only tables written before that still need converting
+    tables = Table_Schemas.convert_tables(name, tables)
+    load_times[name] = time.perf_counter() - start
+    return tables
+
+def evaluate_sheet(frame, sheet_metrics):
+    # Aggregate every column the sheet's metrics need in a single pass
+    values = {}
+    aggregations = {}
+    for metric in sheet_metrics:
+        if metric['aggregation'] in ('sum', 'max', 'mean'):
+            aggregations.setdefault(metric['column'], [])
+            if metric['aggregation'] not in aggregations[metric['column']]:
+                aggregations[metric['column']].append(metric['aggregation'])
+
+    columns = {metric['column'] for metric in sheet_metrics if metric['column']}
+    frame = frame[list(columns)]
+    stats = frame.agg(aggregations) if aggregations else None
+
+    for metric in sheet_metrics:
+        aggregation, column = metric['aggregation'], metric['column']
+        if aggregation == 'count':
+            value = frame.shape[0]
+        elif aggregation == 'overdue':
+            value = int((frame[column] < datetime.datetime.now()).sum())
+        else:
+            value = stats.loc[aggregation, column]
+            if metric['format'] == 'number' and aggregation in ('max', 'mean'):
+                value = round(value, 0)
+        values[metric['name']] = value
+    return values
+
+def calculate_source(script_dir, source):
+    # Evaluate every metric of one source from a single read of it
+    source_metrics = [metric for metric in metrics if metric['source'] == source]
+    sheets = list(dict.fromkeys(metric['sheet'] for metric in source_metrics))
+    columns = list(dict.fromkeys(metric['column'] for metric in source_metrics if metric['column']))
+
+    tables = load_tables(script_dir, source, None if None in sheets else sheets, columns)
+    values = {}
+    for sheet in sheets:
+        frame = tables[sheet] if sheet is not None else next(iter(tables.values()))
+        values.update(evaluate_sheet(frame, [metric for metric in source_metrics if metric['sheet'] == sheet]))
+    return values
+
+def salescalculation(script_dir=None):
+    script_dir = script_dir or script_directory
+
+    # Every source is read and summarised on its own thread, the summary has the metrics in registry order
+    load_times.clear()
+    values = {}
+    with ThreadPoolExecutor(max_workers=len(input_names)) as executor:
+        for source_values in executor.map(lambda source: calculate_source(script_dir, source), input_names):
+            values.update(source_values)
+
+    for name in input_names:
+        print(f"Loaded {name} in {load_times[name]:.3f}s")
     
-    results_df = pd.DataFrame([tabulated_results], columns=index)
-    sales_summary_path = os.path.join(script_directory,"sales_calculations_summary.xlsx") 
-    results_df.to_excel(sales_summary_path, index=False)
+    results_df = pd.DataFrame([values], columns=index)
+    Data_Store.write_tables(script_dir, "sales_calculations_summary", {'Sheet1': results_df})
     
     return results_df
 
+def input_signature(script_dir):
+    return tuple(Data_Store.signature(script_dir, name) for name in input_names)
+
+def cached_salescalculation(script_dir=None):
+    # Only recalculate when one of the filtered_* inputs was rewritten since the last call
+    script_dir = script_dir or script_directory
+    signature = input_signature(script_dir)
+    with _cache_lock:
+        cached = _cache.get(script_dir)
+        if cached is None or cached[0] != signature:
+            cached = (signature, salescalculation(script_dir))
+            _cache[script_dir] = cached
+        return cached[1].copy()
+
+def invalidate_cache(script_dir=None):
+    # Called once new scrapes have been filtered, drops the cached summary (of every folder if none is given)
+    with _cache_lock:
+        if script_dir is None:
+            _cache.clear()
+        else:
+            _cache.pop(script_dir, None)
+
 if __name__ == '__main__':
     salescalculation()